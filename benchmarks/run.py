@@ -0,0 +1,283 @@
+"""Performance benchmarks of the envs, data loaders and policies.
+
+Results are written as JSON and compared against ``benchmarks/baseline.json``,
+the process exits with status 1 when a metric regresses by more than the
+tolerance.
+
+Usage:
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --ticks-per-sample 20000 --tolerance 0.5
+    python -m benchmarks.run --update-baseline
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from market_maker_algos.algorithms import AvellanedaStoikov
+from market_maker_algos.data_loader import RandomCoveredWarrantLoader, SingleBrownianMotion
+from market_maker_algos.envs import AvellanedaStoikovEnv, LehalleEnv
+
+from .synthetic import make_covered_warrant_ticks
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+CORE_MODULES = [
+    "market_maker_algos.envs",
+    "market_maker_algos.data_loader",
+    "market_maker_algos.algorithms",
+]
+# must only be imported on first use, never by the core modules
+HEAVY_MODULES = ["matplotlib", "scipy", "yaml", "numba", "quantstats"]
+
+
+def _best_of(fn: Callable[[], float], repeat: int, higher_is_better: bool) -> float:
+    values = [fn() for _ in range(repeat)]
+    return max(values) if higher_is_better else min(values)
+
+
+def env_steps_per_sec(env, policy, n_steps: int, seed: int = 0) -> float:
+    """Steps per second of ``env`` driven by ``policy``, resetting at the end of episodes"""
+    obs, _ = env.reset(seed=seed)
+    start = time.perf_counter()
+    for _ in range(n_steps):
+        action, _ = policy.get_action(obs)
+        obs, _, terminated, truncated, _ = env.step(action)
+        if terminated or truncated:
+            obs, _ = env.reset()
+    return n_steps / (time.perf_counter() - start)
+
+
+def policy_actions_per_sec(policy, n_envs: int, n_calls: int) -> float:
+    """Actions per second of the batched ``get_actions`` for ``n_envs`` observations"""
+    rng = np.random.default_rng(0)
+    obs = np.column_stack(
+        [
+            100 + rng.standard_normal(n_envs),
+            rng.integers(-5, 5, n_envs),
+            rng.integers(0, 1000, n_envs),
+            np.full(n_envs, 0.1),
+            np.full(n_envs, 1.5),
+            np.full(n_envs, 2.0),
+            np.ones(n_envs),
+            np.full(n_envs, 1e-3),
+        ]
+    ).astype(np.float32)
+    start = time.perf_counter()
+    for _ in range(n_calls):
+        policy.get_actions(obs)
+    return n_envs * n_calls / (time.perf_counter() - start)
+
+
+def reset_latency(loader, n_resets: int) -> float:
+    """Median ``reset`` latency of ``loader`` in seconds"""
+    timings = np.empty(n_resets)
+    for i in range(n_resets):
+        start = time.perf_counter()
+        loader.reset()
+        timings[i] = time.perf_counter() - start
+    return float(np.median(timings))
+
+
+def episode_peak_memory(env, policy, seed: int = 0) -> float:
+    """Peak traced memory in bytes of stepping ``env`` through one episode
+    with ``policy``, a plain step loop so envs without step info are measured too
+    """
+    tracemalloc.start()
+    try:
+        obs, _ = env.reset(seed=seed)
+        terminated = truncated = False
+        while not (terminated or truncated):
+            action, _ = policy.get_action(obs)
+            obs, _, terminated, truncated, _ = env.step(action)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return float(peak)
+
+
+def core_import(repeat: int) -> Dict[str, float]:
+    """Import time in seconds of the core modules in a fresh interpreter, and
+    the number of heavy modules they pulled in.
+    """
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"for name in {CORE_MODULES!r}: __import__(name)\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(elapsed, sum(name in sys.modules for name in {HEAVY_MODULES!r}))\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    timings, n_heavy = [], 0
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env
+        ).stdout.split()
+        timings.append(float(output[0]))
+        n_heavy = int(output[1])
+    return {"seconds": min(timings), "heavy_modules": n_heavy}
+
+
+def run_benchmarks(
+    ticks_per_sample: int = 2000,
+    n_days: int = 5,
+    n_secs: int = 10,
+    n_steps: int = 5000,
+    repeat: int = 3,
+) -> Dict[str, Dict]:
+    results = {}
+
+    def record(name: str, value: float, unit: str, higher_is_better: bool) -> None:
+        results[name] = {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+    imports = core_import(repeat)
+    record("core_import_s", imports["seconds"], "s", False)
+    # any heavy module is a regression against the baseline of 0
+    record("core_import_heavy_modules", imports["heavy_modules"], "modules", False)
+
+    policy = AvellanedaStoikov(order_quantity=1)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tick_path = make_covered_warrant_ticks(
+            os.path.join(tmp_dir, "ticks.csv"),
+            n_days=n_days,
+            n_secs=n_secs,
+            ticks_per_sample=ticks_per_sample,
+        )
+        start = time.perf_counter()
+        cw_loader = RandomCoveredWarrantLoader(tick_path)
+        record("covered_warrant_load_s", time.perf_counter() - start, "s", False)
+
+        brownian_env = AvellanedaStoikovEnv(SingleBrownianMotion(100, 1000, 2))
+        lehalle_env = LehalleEnv(cw_loader, k=40, risk_factor=0.5)
+        # RL loop mode: observation written in place, no step info or history
+        lehalle_fast_env = LehalleEnv(
+            cw_loader, k=40, risk_factor=0.5, reuse_observation=True, record_info=False
+        )
+        for name, env in [
+            ("avellaneda_stoikov_env", brownian_env),
+            ("lehalle_env", lehalle_env),
+            ("lehalle_fast_env", lehalle_fast_env),
+        ]:
+            # warm up loader caches before measuring
+            env_steps_per_sec(env, policy, n_steps)
+            record(
+                f"{name}_steps_per_s",
+                _best_of(lambda: env_steps_per_sec(env, policy, n_steps), repeat, True),
+                "steps/s",
+                True,
+            )
+            record(f"{name}_episode_peak_bytes", episode_peak_memory(env, policy), "B", False)
+
+        record(
+            "avellaneda_stoikov_get_actions_per_s",
+            _best_of(lambda: policy_actions_per_sec(policy, 1000, 200), repeat, True),
+            "actions/s",
+            True,
+        )
+        record(
+            "brownian_reset_s",
+            reset_latency(SingleBrownianMotion(100, 1000, 2), 200),
+            "s",
+            False,
+        )
+        record(
+            "brownian_pool_reset_s",
+            reset_latency(SingleBrownianMotion(100, 1000, 2, pool_size=1000, as_frame=False), 2000),
+            "s",
+            False,
+        )
+        record(
+            "covered_warrant_cold_reset_s",
+            reset_latency(RandomCoveredWarrantLoader(tick_path, cache_size=0), 50),
+            "s",
+            False,
+        )
+        # every sample cached, so warm resets never prepare a sample
+        warm_loader = RandomCoveredWarrantLoader(tick_path, cache_size=n_days * n_secs)
+        for sample_id in warm_loader.tasks:
+            warm_loader.get_sample(sample_id)
+        record("covered_warrant_warm_reset_s", reset_latency(warm_loader, 200), "s", False)
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Metrics worse than the baseline by more than ``tolerance`` (relative)"""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        value, reference = result["value"], baseline[name]["value"]
+        if result["higher_is_better"]:
+            regressed = value < reference * (1 - tolerance)
+        else:
+            regressed = value > reference * (1 + tolerance)
+        if regressed:
+            regressions.append(f"{name}: {value:.4g} {result['unit']} vs baseline {reference:.4g}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="overwrite the baseline with the results")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed relative regression")
+    parser.add_argument("--ticks-per-sample", type=int, default=2000, help="synthetic ticks per (date, sec_cd)")
+    parser.add_argument("--n-days", type=int, default=5)
+    parser.add_argument("--n-secs", type=int, default=10)
+    parser.add_argument("--n-steps", type=int, default=5000, help="env steps per throughput run")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        ticks_per_sample=args.ticks_per_sample,
+        n_days=args.n_days,
+        n_secs=args.n_secs,
+        n_steps=args.n_steps,
+        repeat=args.repeat,
+    )
+    report = {
+        "metadata": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "ticks_per_sample": args.ticks_per_sample,
+            "n_days": args.n_days,
+            "n_secs": args.n_secs,
+        },
+        "results": results,
+    }
+    for name, result in results.items():
+        print(f"{name:45s} {result['value']:12.4g} {result['unit']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, skipping comparison")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+
+def make_covered_warrant_ticks(
+    path: str,
+    n_days: int = 5,
+    n_secs: int = 10,
+    ticks_per_sample: int = 2000,
+    seed: int = 0,
+) -> str:
+    """Write a synthetic covered warrant tick csv with the columns
+    ``RandomCoveredWarrantLoader`` expects: one random walk of
+    ``ticks_per_sample`` trades per (date, sec_cd) during trading hours.
+    """
+    rng = np.random.default_rng(seed)
+    n_samples = n_days * n_secs
+    n_ticks = n_samples * ticks_per_sample
+
+    days = pd.Timestamp("2023-03-01") + pd.to_timedelta(
+        np.repeat(np.arange(n_days), n_secs * ticks_per_sample), unit="D"
+    )
+    # 9:00 to 14:45, sorted within every sample
+    seconds = np.sort(
+        rng.integers(9 * 3600, 14 * 3600 + 45 * 60, size=(n_samples, ticks_per_sample)), axis=1
+    ).ravel()
+    steps = rng.choice([-10, 0, 10], p=[0.25, 0.5, 0.25], size=(n_samples, ticks_per_sample))
+    price = (1500 + np.cumsum(steps, axis=1)).clip(min=10).ravel().astype(np.float64)
+    sec_cd = np.tile(np.repeat([f"CW{i:04d}" for i in range(n_secs)], ticks_per_sample), n_days)
+
+    ticks = pd.DataFrame(
+        {
+            "datetime": days + pd.to_timedelta(seconds, unit="s"),
+            "sec_cd": sec_cd,
+            "open": price,
+            "high": price,
+            "low": price,
+            "close": price,
+            "volume": rng.integers(1, 100, size=n_ticks) * 100,
+        }
+    )
+    ticks.to_csv(path, index=False)
+    return path
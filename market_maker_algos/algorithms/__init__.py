@@ -1 +1,2 @@
-from .avellaneda_stoikov import AvellanedaStoikov
\ No newline at end of file
+from .avellaneda_stoikov import AvellanedaStoikov
+from .glft import GLFT, glft_quote_tables
@@ -1,4 +1,6 @@
 import math
+from typing import Dict, Tuple
+import numpy as np
 
 from .base_algorithm import Policy
 
@@ -6,6 +8,19 @@ from .base_algorithm import Policy
 class AvellanedaStoikov(Policy):
     def __init__(self, order_quantity):
         self.order_quantity = order_quantity
+        # (risk_factor, k) -> spread term constant within an episode
+        self._spread_constants = {}
+
+    def _spread_constant(self, risk_factor: float, k: float) -> float:
+        key = (risk_factor, k)
+        constant = self._spread_constants.get(key)
+        if constant is None:
+            # in the dtype of the observation, NumPy < 2 would promote
+            # float32 times a Python float to float64
+            dtype = np.result_type(risk_factor, k).type
+            constant = dtype(2 / risk_factor) * dtype(math.log(1 + risk_factor / k))
+            self._spread_constants[key] = constant
+        return constant
 
     def get_action(self, observation):
         (
@@ -26,7 +41,7 @@ class AvellanedaStoikov(Policy):
         # reserve spread
         reserve_spread = (
             risk_factor * asset_sigma**2 * (total_time - dt * current_step)
-            + 2 / risk_factor * math.log(1 + risk_factor / k)
+            + self._spread_constant(risk_factor, k)
         )
         # print(reserve_spread)
 
@@ -41,3 +56,31 @@ class AvellanedaStoikov(Policy):
             ask_price,
         )
         return action, {"reserve_price": reserve_price}
+
+    def get_actions(self, obs_batch: np.ndarray) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        obs_batch = np.asarray(obs_batch, dtype=np.float64)
+        current_price = obs_batch[:, 0]
+        quantity = obs_batch[:, 1]
+        current_step = obs_batch[:, 2]
+        risk_factor = obs_batch[:, 3]
+        k = obs_batch[:, 4]
+        asset_sigma = obs_batch[:, 5]
+        total_time = obs_batch[:, 6]
+        dt = obs_batch[:, 7]
+
+        # envs of a batch usually share (risk_factor, k)
+        if (risk_factor == risk_factor[0]).all() and (k == k[0]).all():
+            spread_constant = self._spread_constant(risk_factor[0], k[0])
+        else:
+            spread_constant = 2 / risk_factor * np.log1p(risk_factor / k)
+
+        risk_term = risk_factor * asset_sigma**2 * (total_time - dt * current_step)
+        reserve_price = current_price - quantity * risk_term
+        half_spread = (risk_term + spread_constant) / 2
+
+        actions = np.empty((obs_batch.shape[0], 4), dtype=np.float64)
+        actions[:, 0] = self.order_quantity
+        actions[:, 1] = reserve_price - half_spread
+        actions[:, 2] = self.order_quantity
+        actions[:, 3] = reserve_price + half_spread
+        return actions, {"reserve_price": reserve_price}
@@ -1,6 +1,26 @@
 from abc import ABC, abstractmethod
+from typing import Dict, Tuple
+import numpy as np
 
 class Policy(ABC):
     @abstractmethod
     def get_action(self, *args, **kwargs):
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    def get_actions(self, obs_batch: np.ndarray) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Batched version of ``get_action``.
+
+        Args:
+            obs_batch (np.ndarray): (N, 8) observations, one row per env
+
+        Returns:
+            Tuple[np.ndarray, Dict[str, np.ndarray]]: (N, 4) actions and agent info arrays
+        """
+        # fallback looping over get_action, subclasses should vectorize it
+        results = [self.get_action(obs) for obs in obs_batch]
+        actions = np.asarray([action for action, _ in results], dtype=np.float64)
+        agent_info = {
+            key: np.asarray([info[key] for _, info in results])
+            for key in (results[0][1] if results else {})
+        }
+        return actions, agent_info
@@ -0,0 +1,182 @@
+import functools
+import math
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+from .base_algorithm import Policy
+
+
+def _snap_to_grid(value: float, ratio: Optional[float]) -> float:
+    """``value`` snapped to the nearest point of the geometric grid ``(1 + ratio) ** n``,
+    within a relative ``ratio / 2`` of it. None keeps it as is.
+    """
+    if ratio is None or not (value > 0 and math.isfinite(value)):
+        return value
+    step = math.log1p(ratio)
+    return math.exp(round(math.log(value) / step) * step)
+
+
+@functools.lru_cache(maxsize=1024)
+def glft_quote_tables(
+    risk_factor: float, k: float, A: float, sigma: float, max_inventory: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Asymptotic optimal bid and ask distances to the mid of the
+    Guéant-Lehalle-Fernandez-Tapia model, for unit orders and inventories
+    in ``[-max_inventory, max_inventory]``.
+
+    The value function is ``v_q`` proportional to the ground state of the
+    tridiagonal matrix with ``alpha q^2`` on the diagonal and ``-eta`` off it,
+    ``alpha = k risk_factor sigma^2 / 2`` and
+    ``eta = A (1 + risk_factor / k)^-(1 + k / risk_factor)``. It is even in q,
+    its ratios ``v_q / v_(q-1)`` come from the decaying recurrence of the
+    eigen equation, so extreme inventories do not underflow. Then
+    ``delta_bid(q) = ln(v_q / v_(q+1)) / k + ln(1 + risk_factor / k) / risk_factor``
+    and ``delta_ask(q)`` the same with ``v_(q-1)``.
+
+    Reference:
+    Dealing with the inventory risk: a solution to the market making problem,
+    Olivier Guéant, Charles-Albert Lehalle & Joaquin Fernandez-Tapia
+    paper url: https://arxiv.org/abs/1105.3115
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: read-only bid and ask distances indexed by
+        ``q + max_inventory``. There is no bid at ``max_inventory`` and no ask at
+        ``-max_inventory``, these entries repeat their neighbour.
+    """
+    if risk_factor <= 0 or k <= 0 or A <= 0:
+        raise ValueError("risk_factor, k and A must be positive")
+    if max_inventory < 1:
+        raise ValueError("max_inventory must be at least one order")
+    alpha = k * risk_factor * sigma**2 / 2
+    eta = A * (1 + risk_factor / k) ** -(1 + k / risk_factor)
+
+    q = np.arange(-max_inventory, max_inventory + 1)
+    matrix = np.diag(alpha * q.astype(np.float64) ** 2)
+    matrix -= eta * (np.eye(q.shape[0], k=1) + np.eye(q.shape[0], k=-1))
+    ground = np.linalg.eigvalsh(matrix)[0]
+
+    # log(v_q / v_(q-1)) for q = 1..max_inventory, from the boundary down
+    log_ratio = np.empty(max_inventory)
+    ratio = 0.0
+    for i in range(max_inventory, 0, -1):
+        ratio = eta / (alpha * i * i - ground - eta * ratio)
+        log_ratio[i - 1] = math.log(ratio)
+    log_v_positive = np.concatenate([[0.0], np.cumsum(log_ratio)])
+    log_v = np.concatenate([log_v_positive[:0:-1], log_v_positive])
+
+    base = math.log1p(risk_factor / k) / risk_factor
+    bid = np.empty(q.shape[0])
+    ask = np.empty(q.shape[0])
+    bid[:-1] = (log_v[:-1] - log_v[1:]) / k + base
+    ask[1:] = (log_v[1:] - log_v[:-1]) / k + base
+    bid[-1] = bid[-2]
+    ask[0] = ask[1]
+    bid.setflags(write=False)
+    ask.setflags(write=False)
+    return bid, ask
+
+
+class GLFT(Policy):
+    """Guéant-Lehalle-Fernandez-Tapia market making policy with bounded inventory.
+
+    Quotes are the asymptotic (long horizon) optimal distances to the mid of
+    ``glft_quote_tables``, so ``get_action`` is a lookup in tables cached per
+    (risk_factor, k, A, sigma, max_inventory). The observed sigma is first
+    snapped to a geometric grid of ratio ``1 + sigma_step``, so a sigma moving
+    with a ``sigma_estimator`` maps to a few cached tables instead of building
+    one per step. Inventory is counted in
+    ``order_quantity`` lots, the price, inventory, risk_factor, k and sigma
+    are read from the 8-field observation of the envs. No bid is quoted at
+    ``max_inventory`` and no ask at ``-max_inventory``.
+
+    Args:
+        order_quantity (int): quantity of each quote, the inventory lot
+        max_inventory (int): inventory bound, in shares
+        A (float, optional): order arrival intensity at the mid. Defaults to the
+            ``AvellanedaStoikovEnv`` one, ``1 / dt / exp(k / 4)``.
+        sigma_step (float, optional): relative step of the sigma grid, quotes use a
+            sigma within ``sigma_step / 2`` of the observed one. None uses the exact
+            sigma, e.g. for a constant one. Defaults to 0.01.
+    """
+
+    def __init__(
+        self,
+        order_quantity: int,
+        max_inventory: int,
+        A: Optional[float] = None,
+        sigma_step: Optional[float] = 0.01,
+    ):
+        self.order_quantity = order_quantity
+        self.max_inventory = max_inventory
+        self.A = A
+        self.sigma_step = sigma_step
+        self._max_lots = int(max_inventory // order_quantity)
+        if self._max_lots < 1:
+            raise ValueError("max_inventory must be at least order_quantity")
+
+    def _tables(self, risk_factor: float, k: float, sigma: float, dt: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Tables of lot price distances, divide by ``order_quantity`` for share prices"""
+        # float64 like get_actions, float32 observation fields would round A
+        A = self.A if self.A is not None else 1 / float(dt) / math.exp(float(k) / 4)
+        # a lot of order_quantity shares is the unit asset of the model
+        lot = self.order_quantity
+        sigma = _snap_to_grid(float(sigma), self.sigma_step)
+        return glft_quote_tables(float(risk_factor), float(k) / lot, float(A), sigma * lot, self._max_lots)
+
+    def get_action(self, observation):
+        (
+            current_price,
+            quantity,
+            current_step,
+            risk_factor,
+            k,
+            asset_sigma,
+            total_time,
+            dt,
+        ) = observation
+
+        bid_table, ask_table = self._tables(risk_factor, k, asset_sigma, dt)
+        lots = min(max(int(round(quantity / self.order_quantity)), -self._max_lots), self._max_lots)
+        index = lots + self._max_lots
+
+        bid_price = current_price - bid_table[index] / self.order_quantity
+        ask_price = current_price + ask_table[index] / self.order_quantity
+        action = (
+            self.order_quantity if lots < self._max_lots else 0,
+            bid_price,
+            self.order_quantity if lots > -self._max_lots else 0,
+            ask_price,
+        )
+        return action, {"reserve_price": (bid_price + ask_price) / 2}
+
+    def get_actions(self, obs_batch: np.ndarray) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        obs_batch = np.asarray(obs_batch, dtype=np.float64)
+        current_price = obs_batch[:, 0]
+        lots = np.clip(np.rint(obs_batch[:, 1] / self.order_quantity), -self._max_lots, self._max_lots)
+        index = lots.astype(np.int64) + self._max_lots
+
+        # one table per distinct (risk_factor, k, sigma, dt), envs of a batch usually share it
+        params = obs_batch[:, [3, 4, 5, 7]]
+        if (params == params[0]).all():
+            bid_table, ask_table = self._tables(*params[0])
+            bid_offset = bid_table[index]
+            ask_offset = ask_table[index]
+        else:
+            params, group = np.unique(params, axis=0, return_inverse=True)
+            group = group.ravel()
+            bid_offset = np.empty(obs_batch.shape[0])
+            ask_offset = np.empty(obs_batch.shape[0])
+            for i, row in enumerate(params):
+                bid_table, ask_table = self._tables(*row)
+                rows = group == i
+                bid_offset[rows] = bid_table[index[rows]]
+                ask_offset[rows] = ask_table[index[rows]]
+        bid_offset = bid_offset / self.order_quantity
+        ask_offset = ask_offset / self.order_quantity
+
+        actions = np.empty((obs_batch.shape[0], 4), dtype=np.float64)
+        actions[:, 0] = np.where(lots < self._max_lots, self.order_quantity, 0)
+        actions[:, 1] = current_price - bid_offset
+        actions[:, 2] = np.where(lots > -self._max_lots, self.order_quantity, 0)
+        actions[:, 3] = current_price + ask_offset
+        return actions, {"reserve_price": (actions[:, 1] + actions[:, 3]) / 2}
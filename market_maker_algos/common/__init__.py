@@ -1,3 +1,35 @@
 from .common_utils import *
 from .env_utils import *
-from .plots import *
\ No newline at end of file
+from .backtest import *
+from .sweep import *
+from .profiling import *
+from .volatility import *
+from .calibration import *
+from .metrics import *
+from .result_cache import *
+
+# plotting pulls in matplotlib, imported on first use only
+_LAZY_ATTRIBUTES = {
+    name: ".plots"
+    for name in [
+        "plot_result",
+        "plot_history",
+        "plot_episode_bands",
+        "episode_quantiles",
+        "decimate",
+        "minmax_indices",
+        "lttb_indices",
+        "bucket_fills",
+    ]
+}
+# star imports resolve the lazy names through __getattr__, importing matplotlib then
+__all__ = [name for name in globals() if not name.startswith("_")] + list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        import importlib
+
+        module = importlib.import_module(_LAZY_ATTRIBUTES[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
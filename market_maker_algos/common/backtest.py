@@ -0,0 +1,271 @@
+import importlib.util
+import math
+from typing import Dict, Optional, Union
+import numpy as np
+import pandas as pd
+
+from .result_cache import ResultCache
+
+# numba is optional and slow to import, it is only imported to compile a kernel
+_jit_kernels = {}
+
+
+def _avellaneda_stoikov_kernel(
+    price,
+    high,
+    low,
+    close,
+    order_quantity,
+    risk_factor,
+    sigma_sq,
+    time_left,
+    half_spread,
+    init_cash,
+    bid_fee,
+    ask_fee,
+    quantity_out,
+    cash_out,
+    bid_price_out,
+    ask_price_out,
+    matched_bid_out,
+    matched_ask_out,
+    nav_out,
+    reserve_price_out,
+):
+    """Run one Lehalle episode quoted by Avellaneda-Stoikov.
+    Row ``t`` of the outputs is the state after the step from tick t to t + 1.
+    Quotes are computed in float32 with the operations of
+    ``AvellanedaStoikov.get_action`` on the float32 observation.
+    """
+    quantity = 0
+    cash = init_cash
+    for t in range(price.shape[0] - 1):
+        # quotes from the observation at tick t
+        reserve_price = price[t] - np.float32(quantity) * risk_factor * sigma_sq[t] * time_left[t]
+        bid_price = float(reserve_price - half_spread[t])
+        ask_price = float(reserve_price + half_spread[t])
+
+        # matching on high and low of tick t + 1
+        matched_bid = order_quantity if bid_price >= low[t + 1] else 0
+        matched_ask = order_quantity if ask_price <= high[t + 1] else 0
+
+        quantity += matched_bid - matched_ask
+        bid_cashflow = matched_bid * bid_price * (1 + bid_fee)
+        ask_cashflow = matched_ask * ask_price * (1 - ask_fee)
+        cash += ask_cashflow - bid_cashflow
+
+        quantity_out[t] = quantity
+        cash_out[t] = cash
+        bid_price_out[t] = bid_price
+        ask_price_out[t] = ask_price
+        matched_bid_out[t] = matched_bid
+        matched_ask_out[t] = matched_ask
+        nav_out[t] = cash + quantity * close[t + 1]
+        reserve_price_out[t] = float(reserve_price)
+
+
+def _get_kernel(use_numba: Optional[bool]):
+    numba_installed = importlib.util.find_spec("numba") is not None
+    if use_numba is None:
+        use_numba = numba_installed
+    if not use_numba:
+        return _avellaneda_stoikov_kernel
+    if not numba_installed:
+        raise ImportError("numba is required for use_numba=True")
+    if "avellaneda_stoikov" not in _jit_kernels:
+        from numba import njit
+
+        _jit_kernels["avellaneda_stoikov"] = njit(cache=True)(_avellaneda_stoikov_kernel)
+    return _jit_kernels["avellaneda_stoikov"]
+
+
+def backtest_avellaneda_stoikov(
+    ohlc: Dict[str, np.ndarray],
+    order_quantity: int,
+    risk_factor: float,
+    k: float,
+    sigma: Union[float, np.ndarray],
+    total_time: float,
+    dt: float,
+    init_cash: float = 0,
+    bid_fee: float = 0.0003,
+    ask_fee: float = 0.0013,
+    use_numba: Optional[bool] = None,
+    cache: Optional[ResultCache] = None,
+) -> pd.DataFrame:
+    """Backtest a whole ``LehalleEnv`` episode quoted by ``AvellanedaStoikov``
+    in one loop over arrays, without stepping the gym environment.
+
+    Observations are rounded to float32 like the env does and quotes are
+    computed in float32 like the policy does, so the result matches
+    ``play(AvellanedaStoikov(order_quantity), LehalleEnv(...))`` exactly.
+
+    Args:
+        ohlc (Dict[str, np.ndarray]): open, high, low, close (and optionally datetime) arrays of the episode
+        order_quantity (int): quantity quoted on both sides
+        risk_factor, k (float): Avellaneda-Stoikov parameters
+        sigma (Union[float, np.ndarray]): sigma of the episode, or of every tick as
+            observed with a ``VolatilityEstimator``, then also returned in a ``sigma`` column.
+        total_time, dt (float): asset metadata of the episode
+        init_cash (float, optional): initial cash. Defaults to 0.
+        bid_fee (float, optional): bid fee. Defaults to 0.03%.
+        ask_fee (float, optional): ask fee. Defaults to 0.13%.
+        use_numba (bool, optional): JIT compile the loop, defaults to True when numba is installed.
+        cache (ResultCache, optional): serve repeated backtests of the same prices and parameters from disk.
+
+    Returns:
+        pd.DataFrame: same columns as ``play`` on ``LehalleEnv``
+    """
+    if cache is not None:
+        params = {
+            "order_quantity": order_quantity,
+            "risk_factor": risk_factor,
+            "k": k,
+            "sigma": sigma,
+            "total_time": total_time,
+            "dt": dt,
+            "init_cash": init_cash,
+            "bid_fee": bid_fee,
+            "ask_fee": ask_fee,
+        }
+        key = cache.make_key(fn="backtest_avellaneda_stoikov", ohlc=ohlc, **params)
+        return cache.fetch(
+            key, lambda: backtest_avellaneda_stoikov(ohlc, **params, use_numba=use_numba)
+        )
+
+    open_ = np.asarray(ohlc["open"], dtype=np.float64)
+    high = np.asarray(ohlc["high"], dtype=np.float64)
+    low = np.asarray(ohlc["low"], dtype=np.float64)
+    close = np.asarray(ohlc["close"], dtype=np.float64)
+    n_steps = close.shape[0] - 1
+
+    # observation fields, float32 like LehalleEnv._get_observation
+    price = ((close + low + high) / 3).astype(np.float32)
+    risk_factor, k, total_time, dt = (np.float32(value) for value in (risk_factor, k, total_time, dt))
+    sigma_path = np.ndim(sigma) > 0
+    if sigma_path:
+        # squared one by one, float32 scalar and array powers can differ in the last bit
+        sigma_sq = np.array([value**2 for value in np.asarray(sigma, dtype=np.float32)], dtype=np.float32)
+    else:
+        sigma_sq = np.full(close.shape[0], np.float32(sigma) ** 2, dtype=np.float32)
+    # per tick terms of AvellanedaStoikov.get_action, same float32 operations,
+    # every operand is float32 so the result does not depend on NumPy promotion
+    time_left = total_time - dt * np.arange(close.shape[0], dtype=np.float32)
+    spread_constant = np.float32(2 / risk_factor) * np.float32(math.log(1 + risk_factor / k))
+    half_spread = (risk_factor * sigma_sq * time_left + spread_constant) / np.float32(2)
+    order_quantity = int(order_quantity)
+
+    history = {
+        "quantity": np.empty(n_steps, dtype=np.int64),
+        "cash": np.empty(n_steps, dtype=np.float64),
+        "bid_price": np.empty(n_steps, dtype=np.float64),
+        "ask_price": np.empty(n_steps, dtype=np.float64),
+        "matched_bid_quantity": np.empty(n_steps, dtype=np.int64),
+        "matched_ask_quantity": np.empty(n_steps, dtype=np.int64),
+        "nav": np.empty(n_steps, dtype=np.float64),
+        "reserve_price": np.empty(n_steps, dtype=np.float64),
+    }
+    _get_kernel(use_numba)(
+        price,
+        high,
+        low,
+        close,
+        order_quantity,
+        risk_factor,
+        sigma_sq,
+        time_left,
+        half_spread,
+        float(init_cash),
+        bid_fee,
+        ask_fee,
+        history["quantity"],
+        history["cash"],
+        history["bid_price"],
+        history["ask_price"],
+        history["matched_bid_quantity"],
+        history["matched_ask_quantity"],
+        history["nav"],
+        history["reserve_price"],
+    )
+
+    nav = history["nav"]
+    result = {
+        "datetime": ohlc["datetime"][1:] if "datetime" in ohlc else np.arange(1, n_steps + 1),
+        "quantity": history["quantity"],
+        "cash": history["cash"],
+        "bid_quantity": np.full(n_steps, order_quantity),
+        "bid_price": history["bid_price"],
+        "ask_quantity": np.full(n_steps, order_quantity),
+        "ask_price": history["ask_price"],
+        "matched_bid_quantity": history["matched_bid_quantity"],
+        "matched_ask_quantity": history["matched_ask_quantity"],
+        "close": close[1:],
+        "step_reward": np.diff(nav, prepend=float(init_cash)),
+        "nav": nav,
+        "open": open_[1:],
+        "high": high[1:],
+        "low": low[1:],
+        "reserve_price": history["reserve_price"],
+    }
+    if sigma_path:
+        result["sigma"] = np.asarray(sigma, dtype=np.float64)[1:]
+    return pd.DataFrame(result, copy=False)
+
+
+def fast_play(
+    policy,
+    env,
+    use_numba: Optional[bool] = None,
+    seed: Optional[int] = None,
+    cache: Optional[ResultCache] = None,
+) -> pd.DataFrame:
+    """Drop-in replacement of ``play`` for ``LehalleEnv`` and ``AvellanedaStoikov``.
+    Resets ``env`` to sample an episode and backtests it with
+    ``backtest_avellaneda_stoikov``, see ``play`` for ``seed`` and ``cache``.
+    The sigma path of the env ``sigma_estimator`` is computed up front. Any
+    other env or policy raises a ``TypeError``, the loop only reproduces this pair.
+    """
+    # imported here, the envs import common
+    from ..algorithms import AvellanedaStoikov
+    from ..envs import LehalleEnv
+
+    if not isinstance(env, LehalleEnv):
+        raise TypeError(f"fast_play only backtests LehalleEnv, got {type(env).__name__}")
+    if not isinstance(policy, AvellanedaStoikov):
+        raise TypeError(f"fast_play only backtests AvellanedaStoikov, got {type(policy).__name__}")
+    if cache is not None and seed is not None:
+        key = cache.make_key(fn="fast_play", policy=policy, env=env, seed=seed)
+        return cache.fetch(key, lambda: fast_play(policy, env, use_numba=use_numba, seed=seed))
+    env.reset(seed=seed)
+    ohlc = {
+        "datetime": env._datetime,
+        "open": env._open,
+        "high": env._high,
+        "low": env._low,
+        "close": env._close,
+    }
+    sigma = env.sigma
+    estimator = env.sigma_estimator
+    if estimator is not None:
+        # sigma observed at every tick, as updated by MarketMakerEnv.step
+        sigma = np.empty(env._close.shape[0])
+        sigma[0] = estimator.reset(env._close[0], env.dt, env.asset_metadata["sigma"])
+        for tick in range(1, sigma.shape[0]):
+            sigma[tick] = estimator.update(
+                env._close[tick],
+                None if env._high is None else env._high[tick],
+                None if env._low is None else env._low[tick],
+            )
+    return backtest_avellaneda_stoikov(
+        ohlc,
+        order_quantity=policy.order_quantity,
+        risk_factor=env.risk_factor,
+        k=env.k,
+        sigma=sigma,
+        total_time=env.asset_metadata["total_time"],
+        dt=env.asset_metadata["dt"],
+        init_cash=env.init_cash,
+        bid_fee=env.bid_fee,
+        ask_fee=env.ask_fee,
+        use_numba=use_numba,
+    )
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+CALIBRATION_COLUMNS = ["A", "k", "r2", "n_bars", "n_points"]
+
+
+def _fit_intensity(
+    datetime: np.ndarray,
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    starts: np.ndarray,
+    stops: np.ndarray,
+    deltas: np.ndarray,
+    price_scale: float,
+    interval_ns: int,
+) -> Dict[str, np.ndarray]:
+    """Fit ``lambda(delta) = A exp(-k delta)`` for every sample of a block of ticks.
+
+    Ticks of sample i are rows ``starts[i]:stops[i]``, sorted by datetime.
+    Each sample is cut in bars of ``interval_ns`` nanoseconds aligned on the
+    epoch like ``RandomCoveredWarrantLoader``, the excursions ``high - open`` and ``open - low`` of a bar are the
+    distances from mid reached by trades on each side. The probability that
+    a bar side reaches ``delta`` is turned into an intensity with
+    ``1 - exp(-lambda dt)``, the env fill probability, and ``log lambda`` is
+    regressed on ``delta``.
+    """
+    n_samples = starts.shape[0]
+    n_deltas = deltas.shape[0]
+    bucket = datetime.astype("datetime64[ns]").astype(np.int64) // interval_ns
+    sample = np.repeat(np.arange(n_samples), stops - starts)
+
+    new_bar = np.ones(bucket.shape[0], dtype=bool)
+    new_bar[1:] = (bucket[1:] != bucket[:-1]) | (sample[1:] != sample[:-1])
+    bar_starts = np.flatnonzero(new_bar)
+    bar_open = open_[bar_starts]
+    bar_high = np.maximum.reduceat(high, bar_starts)
+    bar_low = np.minimum.reduceat(low, bar_starts)
+    bar_sample = sample[bar_starts]
+    # bars without ticks have no trade, they only count in the number of bars
+    n_bars = bucket[stops - 1] - bucket[starts] + 1
+
+    excursion = np.concatenate([bar_high - bar_open, bar_open - bar_low]) / price_scale
+    # excursions are often whole ticks, equal to a delta up to rounding
+    bins = np.searchsorted(deltas, excursion * (1 + 1e-9), side="right")
+    counts = np.bincount(
+        np.tile(bar_sample, 2) * (n_deltas + 1) + bins, minlength=n_samples * (n_deltas + 1)
+    ).reshape(n_samples, n_deltas + 1)
+    # reach[i, j]: bar sides of sample i reaching deltas[j]
+    reach = np.cumsum(counts[:, ::-1], axis=1)[:, ::-1][:, 1:]
+
+    prob = reach / (2 * n_bars[:, None])
+    valid = (prob > 0) & (prob < 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_intensity = np.where(valid, np.log(-np.log1p(-np.where(valid, prob, 0.5)) * n_bars[:, None]), 0.0)
+
+        # least squares of log_intensity on deltas, row by row over the valid points
+        weight = valid.astype(np.float64)
+        n_points = weight.sum(axis=1)
+        mean_x = (weight * deltas).sum(axis=1) / n_points
+        mean_y = (weight * log_intensity).sum(axis=1) / n_points
+        dx = np.where(valid, deltas - mean_x[:, None], 0.0)
+        dy = np.where(valid, log_intensity - mean_y[:, None], 0.0)
+        slope = (dx * dy).sum(axis=1) / (dx * dx).sum(axis=1)
+        residual = dy - slope[:, None] * dx
+        r2 = 1 - (residual * residual).sum(axis=1) / (dy * dy).sum(axis=1)
+        enough = n_points >= 2
+        return {
+            "A": np.where(enough, np.exp(mean_y - slope * mean_x), np.nan),
+            "k": np.where(enough, -slope, np.nan),
+            "r2": np.where(enough, r2, np.nan),
+            "n_bars": n_bars,
+            "n_points": n_points.astype(np.int64),
+        }
+
+
+def _cache_key(data_loader, deltas: np.ndarray, price_scale: float, bar_interval: str) -> str:
+    path = os.path.abspath(data_loader.path)
+    # a store is a directory, its metadata file changes on every write
+    stat_path = os.path.join(path, "metadata.json") if os.path.isdir(path) else path
+    stat = os.stat(stat_path)
+    key = {
+        "path": path,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "deltas": deltas.tolist(),
+        "price_scale": price_scale,
+        "bar_interval": bar_interval,
+    }
+    return hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def calibrate_intensity(
+    data_loader,
+    deltas: Optional[Sequence[float]] = None,
+    tick_size: float = 0.01,
+    n_deltas: int = 20,
+    price_scale: float = 1000,
+    n_workers: Optional[int] = None,
+    cache_dir: Optional[str] = None,
+) -> pd.DataFrame:
+    """Calibrate the Avellaneda-Stoikov intensity ``A exp(-k delta)`` of every
+    sample of a ``RandomCoveredWarrantLoader`` from its ticks.
+
+    Samples are fitted at once with vectorized bar building, counting and
+    regression, in bars of the loader ``bar_interval``. They are split in
+    contiguous blocks fanned out to a process pool. Results are cached in ``cache_dir`` under a key of the data file,
+    its modification time and the parameters. Pass the result to
+    ``RandomCoveredWarrantLoader.set_calibration`` so that envs pick up
+    ``A`` and ``k`` of the sampled episode at reset.
+
+    Reference:
+    https://quant.stackexchange.com/questions/36073/how-does-one-calibrate-lambda-in-a-avellaneda-stoikov-market-making-problem
+
+    Args:
+        data_loader (RandomCoveredWarrantLoader): loader holding the ticks
+        deltas (Sequence[float], optional): distances from mid of the fit, in env price units.
+        tick_size (float, optional): default deltas are multiples of the tick size. Defaults to 0.01.
+        n_deltas (int, optional): number of default deltas. Defaults to 20.
+        price_scale (float, optional): raw prices are divided by it, as in the loader. Defaults to 1000.
+        n_workers (int, optional): number of processes, 0 runs in the current process. Defaults to cpu count.
+        cache_dir (str, optional): directory of the cached results, None disables caching.
+
+    Returns:
+        pd.DataFrame: ``A``, ``k``, fit ``r2``, ``n_bars`` and ``n_points`` indexed by sample_id,
+        ``A`` and ``k`` are NaN when fewer than two deltas could be fitted.
+    """
+    if deltas is None:
+        deltas = tick_size * np.arange(1, n_deltas + 1)
+    deltas = np.asarray(deltas, dtype=np.float64)
+
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = os.path.join(
+            cache_dir, f"intensity_{_cache_key(data_loader, deltas, price_scale, data_loader.bar_interval)}.csv"
+        )
+        if os.path.exists(cache_path):
+            return pd.read_csv(cache_path, index_col="sample_id")
+
+    sample_ids = list(data_loader.sample_ids)
+    slices = np.array([data_loader.sample_rows(sample_id) for sample_id in sample_ids])
+    interval_ns = int(pd.Timedelta(data_loader.bar_interval).value)
+    # blocks of samples in row order, each one a contiguous row range
+    order = np.argsort(slices[:, 0], kind="stable")
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    blocks = [block for block in np.array_split(order, max(n_workers, 1) * 4) if len(block)]
+
+    columns = data_loader.tick_columns
+    tasks = []
+    for block in blocks:
+        first, last = slices[block[0], 0], slices[block[-1], 1]
+        tasks.append(
+            (
+                np.asarray(columns["datetime"][first:last], dtype="datetime64[ns]"),
+                np.asarray(columns["open"][first:last], dtype=np.float64),
+                np.asarray(columns["high"][first:last], dtype=np.float64),
+                np.asarray(columns["low"][first:last], dtype=np.float64),
+                slices[block, 0] - first,
+                slices[block, 1] - first,
+                deltas,
+                price_scale,
+                interval_ns,
+            )
+        )
+    if n_workers == 0:
+        fits = [_fit_intensity(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            fits = list(executor.map(_fit_intensity, *zip(*tasks)))
+
+    index = np.concatenate(blocks)
+    result = pd.DataFrame(
+        {col: np.concatenate([fit[col] for fit in fits]) for col in CALIBRATION_COLUMNS},
+        index=pd.Index(np.asarray(sample_ids, dtype=object)[index], name="sample_id"),
+    )
+    result = result.loc[sample_ids]
+
+    if cache_path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        result.to_csv(tmp_path)
+        os.replace(tmp_path, cache_path)
+    return result
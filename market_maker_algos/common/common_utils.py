@@ -1,10 +1,8 @@
-import yaml
 from types import SimpleNamespace
 from typing import List, Dict, Tuple, Union, Callable, Any
 import pandas as pd
 import numpy as np
 from math import sqrt
-from scipy.stats import norm
 
 def check_col(df: pd.DataFrame, cols: List[str]):
     assert isinstance(
@@ -16,6 +14,8 @@ def check_col(df: pd.DataFrame, cols: List[str]):
 
 def open_config(path, env_id, is_args=True) -> Union[SimpleNamespace, Dict]:
 
+    import yaml
+
     with open(path) as f:
         config = yaml.load(f, Loader=yaml.FullLoader)
     try:
@@ -41,7 +41,7 @@ def complement_action(action, action_space):
     high = action_space.high
     return high - (action - low)
 
-def brownian(x0, n, dt, delta, out=None):
+def brownian(x0, n, dt, delta, out=None, random_state=None):
     """
     Generate an instance of Brownian motion (i.e. the Wiener process):
 
@@ -78,6 +78,9 @@ def brownian(x0, n, dt, delta, out=None):
     out : numpy array or None
         If `out` is not None, it specifies the array in which to put the
         result.  If `out` is None, a new numpy array is created and returned.
+    random_state : numpy.random.Generator, int or None
+        Generator (or seed of one) used to draw the increments. If None, a fresh unseeded
+        ``numpy.random.default_rng()`` is used.
 
     Returns
     -------
@@ -90,7 +93,9 @@ def brownian(x0, n, dt, delta, out=None):
 
     # For each element of x0, generate a sample of n numbers from a
     # normal distribution.
-    r = norm.rvs(size=x0.shape + (n,), scale=delta*sqrt(dt))
+    if random_state is None or isinstance(random_state, (int, np.integer)):
+        random_state = np.random.default_rng(random_state)
+    r = random_state.standard_normal(x0.shape + (n,)) * (delta*sqrt(dt))
 
     # If `out` was not given, create an output array.
     if out is None:
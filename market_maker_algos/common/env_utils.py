@@ -72,9 +72,17 @@ def is_wrapped(env: Type[gym.Env], wrapper_class: Type[gym.Wrapper]) -> bool:
     """
     return unwrap_wrapper(env, wrapper_class) is not None
 
-def play(policy, env):
+def play(policy, env, seed=None, cache=None):
+    """Play one episode of ``env`` with ``policy`` and return its history.
+    With a ``ResultCache`` and a seed, the history is served from the cache
+    when the same policy, env, loader and seed were already played, the env
+    is then not stepped.
+    """
+    if cache is not None and seed is not None:
+        key = cache.make_key(fn="play", policy=policy, env=env, seed=seed)
+        return cache.fetch(key, lambda: play(policy, env, seed=seed))
     terminated, truncated = False, False
-    obs, env_info = env.reset()
+    obs, env_info = env.reset(seed=seed)
     print(env_info)
     reserve_prices = []
     while not terminated and not truncated:
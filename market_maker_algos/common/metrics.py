@@ -0,0 +1,161 @@
+from typing import Dict, Optional, Union
+import numpy as np
+import pandas as pd
+
+from .common_utils import check_col
+
+METRIC_COLUMNS = [
+    "n_steps",
+    "final_nav",
+    "pnl",
+    "sharpe",
+    "max_drawdown",
+    "n_bid_fills",
+    "n_ask_fills",
+    "bid_fill_ratio",
+    "ask_fill_ratio",
+    "final_quantity",
+    "mean_quantity",
+    "max_abs_quantity",
+    "time_at_limit",
+    "bid_fees",
+    "ask_fees",
+    "total_fees",
+]
+
+
+def _column(history, col: str, dtype=np.float64) -> np.ndarray:
+    return np.asarray(history[col], dtype=dtype)
+
+
+def episode_metrics(
+    history: Union[pd.DataFrame, Dict[str, np.ndarray]],
+    episode_col: str = "episode",
+    init_cash: float = 0,
+    bid_fee: float = 0.0003,
+    ask_fee: float = 0.0013,
+    inventory_limit: Optional[float] = None,
+    periods: float = 1.0,
+) -> pd.DataFrame:
+    """Performance metrics of every episode of a stacked history.
+
+    ``history`` holds one row per (episode, step), e.g.
+    ``BatchMarketMakerEnv.get_history_info`` or ``HistoryStore.read_episode``
+    outputs concatenated, rows of an episode in step order. A history
+    without ``episode_col`` is a single episode. Episodes are delimited once
+    and every metric is a segmented reduction (``ufunc.reduceat``) over the
+    whole columns, no per-episode loop.
+
+    - ``sharpe``: mean over standard deviation of the NAV increments, the first
+      one from ``init_cash``, scaled by ``sqrt(periods)``
+    - ``max_drawdown``: largest drop of the NAV from its running maximum
+    - ``*_fill_ratio``: matched over quoted quantity of the side
+    - ``time_at_limit``: share of steps with ``|quantity| >= inventory_limit``
+    - ``*_fees``: fees paid on the matched quantity at the quoted price
+
+    Args:
+        history (Union[pd.DataFrame, Dict[str, np.ndarray]]): stacked step records
+        episode_col (str, optional): episode key column. Defaults to "episode".
+        init_cash (float, optional): initial cash of the env. Defaults to 0.
+        bid_fee, ask_fee (float, optional): env fees, same defaults as ``MarketMakerEnv``.
+        inventory_limit (float, optional): inventory limit, None leaves ``time_at_limit`` NaN.
+        periods (float, optional): steps per period of the Sharpe ratio. Defaults to 1.
+
+    Returns:
+        pd.DataFrame: one row per episode indexed by ``episode_col``, columns ``METRIC_COLUMNS``
+    """
+    required = ["nav", "quantity", "bid_quantity", "bid_price", "ask_quantity", "ask_price",
+                "matched_bid_quantity", "matched_ask_quantity"]
+    if isinstance(history, pd.DataFrame):
+        check_col(history, required)
+    else:
+        missing = [col for col in required if col not in history]
+        assert not missing, f"Missing columns: {', '.join(missing)}"
+
+    nav = _column(history, "nav")
+    n_rows = nav.shape[0]
+    if episode_col in history:
+        episode = np.asarray(history[episode_col])
+    else:
+        episode = np.zeros(n_rows, dtype=np.int64)
+    if n_rows == 0:
+        return pd.DataFrame(columns=METRIC_COLUMNS, index=pd.Index([], name=episode_col))
+
+    # group the rows of each episode, keeping the step order
+    order = None
+    if n_rows > 1 and not (episode[1:] >= episode[:-1]).all():
+        order = np.argsort(episode, kind="stable")
+        episode = episode[order]
+        nav = nav[order]
+
+    def column(col):
+        values = _column(history, col)
+        return values if order is None else values[order]
+
+    new_episode = np.ones(n_rows, dtype=bool)
+    new_episode[1:] = episode[1:] != episode[:-1]
+    starts = np.flatnonzero(new_episode)
+    stops = np.append(starts[1:], n_rows)
+    n_steps = stops - starts
+    # episode number of every row
+    segment = np.cumsum(new_episode) - 1
+
+    def total(values):
+        return np.add.reduceat(values, starts)
+
+    # NAV increments, the first step of an episode starts from init_cash
+    previous = np.empty(n_rows)
+    previous[1:] = nav[:-1]
+    previous[starts] = init_cash
+    increment = nav - previous
+    mean_increment = total(increment) / n_steps
+    deviation = increment - mean_increment[segment]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std_increment = np.sqrt(total(deviation * deviation) / (n_steps - 1))
+        sharpe = np.where(std_increment > 0, mean_increment / std_increment * np.sqrt(periods), np.nan)
+
+    # running maximum within episodes: offset each episode above the previous
+    # ones so a single accumulate never carries a maximum across a boundary
+    offset = segment * (np.ptp(nav) + 1.0)
+    running_max = np.maximum(np.maximum.accumulate(nav + offset) - offset, init_cash)
+    max_drawdown = np.maximum.reduceat(running_max - nav, starts)
+
+    quantity = column("quantity")
+    bid_quantity = column("bid_quantity")
+    ask_quantity = column("ask_quantity")
+    matched_bid = column("matched_bid_quantity")
+    matched_ask = column("matched_ask_quantity")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bid_fill_ratio = total(matched_bid) / total(np.maximum(bid_quantity, 0))
+        ask_fill_ratio = total(matched_ask) / total(np.maximum(ask_quantity, 0))
+
+    if inventory_limit is None:
+        time_at_limit = np.full(starts.shape[0], np.nan)
+    else:
+        time_at_limit = total((np.abs(quantity) >= inventory_limit).astype(np.float64)) / n_steps
+
+    bid_fees = total(matched_bid * column("bid_price")) * bid_fee
+    ask_fees = total(matched_ask * column("ask_price")) * ask_fee
+
+    final_nav = nav[stops - 1]
+    return pd.DataFrame(
+        {
+            "n_steps": n_steps,
+            "final_nav": final_nav,
+            "pnl": final_nav - init_cash,
+            "sharpe": sharpe,
+            "max_drawdown": max_drawdown,
+            "n_bid_fills": total((matched_bid > 0).astype(np.int64)),
+            "n_ask_fills": total((matched_ask > 0).astype(np.int64)),
+            "bid_fill_ratio": bid_fill_ratio,
+            "ask_fill_ratio": ask_fill_ratio,
+            "final_quantity": quantity[stops - 1],
+            "mean_quantity": total(quantity) / n_steps,
+            "max_abs_quantity": np.maximum.reduceat(np.abs(quantity), starts),
+            "time_at_limit": time_at_limit,
+            "bid_fees": bid_fees,
+            "ask_fees": ask_fees,
+            "total_fees": bid_fees + ask_fees,
+        },
+        index=pd.Index(episode[starts], name=episode_col),
+    )
@@ -1,7 +1,12 @@
+from typing import Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
 def plot_result(history_info, plot_high_low=False):
-    history_info.sort_values(by='datetime', inplace=True)
+    history_info = history_info.sort_values(by='datetime')
     datetime = history_info['datetime']
 
     f = plt.figure(figsize=(8, 15))
@@ -54,4 +59,248 @@ def plot_result(history_info, plot_high_low=False):
     plt.grid(True)
     plt.legend()
 
-    plt.show()
\ No newline at end of file
+    plt.show()
+
+
+def _as_numeric(x: np.ndarray) -> np.ndarray:
+    if x.dtype.kind == "M":
+        return x.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def _from_numeric(x: np.ndarray, like: np.ndarray) -> np.ndarray:
+    if like.dtype.kind == "M":
+        return np.round(x).astype(np.int64).astype("datetime64[ns]")
+    return x
+
+
+def minmax_indices(y: np.ndarray, n_buckets: int) -> np.ndarray:
+    """Indices of the minimum and maximum of ``y`` in ``n_buckets`` equal
+    buckets, plus the first and last point, in increasing order.
+    Keeps every spike of the series with at most ``2 * n_buckets + 2`` points.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = y.shape[0]
+    if n <= 2 * n_buckets + 2:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    lowest = np.argmin(np.where(np.isnan(padded), np.inf, padded), axis=1) + offsets
+    highest = np.argmax(np.where(np.isnan(padded), -np.inf, padded), axis=1) + offsets
+    indices = np.concatenate([[0, n - 1], lowest, highest])
+    return np.unique(indices[indices < n])
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of ``n_out`` points of (x, y) selected with the
+    Largest-Triangle-Three-Buckets algorithm, which keeps the visual shape.
+    One vectorized pass per bucket.
+    """
+    x = _as_numeric(np.asarray(x))
+    y = np.asarray(y, dtype=np.float64)
+    n = x.shape[0]
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_start, next_stop = edges[i + 1], edges[i + 2] if i + 2 < edges.shape[0] else n
+        mean_x = x[next_start:next_stop].mean()
+        mean_y = y[next_start:next_stop].mean()
+        area = np.abs(
+            (x[anchor] - mean_x) * (y[start:stop] - y[anchor])
+            - (x[anchor] - x[start:stop]) * (mean_y - y[anchor])
+        )
+        anchor = start + int(np.argmax(area))
+        selected[i + 1] = anchor
+    return selected
+
+
+def decimate(x: np.ndarray, y: np.ndarray, n_points: int, method: str = "minmax") -> np.ndarray:
+    """Indices of at most about ``n_points`` points of (x, y), see
+    ``minmax_indices`` and ``lttb_indices``
+    """
+    if method == "minmax":
+        return minmax_indices(y, max(n_points // 2 - 1, 1))
+    if method == "lttb":
+        return lttb_indices(x, y, n_points)
+    raise ValueError(f"Unknown decimation method {method}, expected 'minmax' or 'lttb'")
+
+
+def bucket_fills(
+    x: np.ndarray, price: np.ndarray, quantity: np.ndarray, n_buckets: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Aggregate fills in ``n_buckets`` equal buckets of the series: one
+    marker per bucket with fills, at the quantity-weighted mean time and
+    price, with the total filled quantity.
+    """
+    quantity = np.asarray(quantity, dtype=np.float64)
+    filled = np.flatnonzero(quantity > 0)
+    n = quantity.shape[0]
+    if filled.shape[0] == 0:
+        return x[:0], np.empty(0), np.empty(0)
+    bucket = filled * n_buckets // max(n, 1)
+    weight = quantity[filled]
+    total = np.bincount(bucket, weights=weight, minlength=n_buckets)
+    mean_x = np.bincount(bucket, weights=weight * _as_numeric(np.asarray(x))[filled], minlength=n_buckets)
+    mean_price = np.bincount(bucket, weights=weight * np.asarray(price, dtype=np.float64)[filled], minlength=n_buckets)
+    has_fill = total > 0
+    total = total[has_fill]
+    return (
+        _from_numeric(mean_x[has_fill] / total, np.asarray(x)),
+        mean_price[has_fill] / total,
+        total,
+    )
+
+
+def _new_figure(n_rows: int, figsize, dpi: int):
+    # Agg canvas, renders without a display or pyplot state
+    figure = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(figure)
+    return figure, figure.subplots(n_rows, 1, squeeze=False)[:, 0]
+
+
+def plot_history(
+    history_info: pd.DataFrame,
+    path: Optional[str] = None,
+    n_points: int = 2000,
+    method: str = "minmax",
+    plot_high_low: bool = False,
+    figsize=(8, 15),
+    dpi: int = 100,
+) -> Figure:
+    """Headless version of ``plot_result`` for long histories.
+
+    Price, NAV and inventory series are decimated to about ``n_points``
+    points with ``method`` ("minmax" or "lttb"), quotes are drawn as lines and
+    fills as one marker per bucket sized by the filled quantity. The figure
+    is rendered with the Agg backend and written to ``path`` if given.
+    ``history_info`` is not modified.
+
+    Returns:
+        Figure: the matplotlib figure
+    """
+    order = np.argsort(history_info["datetime"].to_numpy(), kind="stable")
+    datetime = history_info["datetime"].to_numpy()[order]
+
+    def series(col):
+        values = history_info[col].to_numpy()[order]
+        index = decimate(datetime, values, n_points, method)
+        return datetime[index], values[index]
+
+    figure, (price_ax, nav_ax, inventory_ax) = _new_figure(3, figsize, dpi)
+    price_ax.plot(*series("close"), color="black", label="Mid-market price", linewidth=0.8)
+    if "reserve_price" in history_info.columns:
+        price_ax.plot(*series("reserve_price"), color="blue", linestyle="dashed", label="Reservation price", linewidth=0.8)
+    price_ax.plot(*series("ask_price"), color="red", alpha=0.4, label="Price asked", linewidth=0.6)
+    price_ax.plot(*series("bid_price"), color="green", alpha=0.4, label="Price bid", linewidth=0.6)
+    if plot_high_low and {"high", "low"}.issubset(history_info.columns):
+        price_ax.plot(*series("high"), color="black", linestyle="dotted", label="High", linewidth=0.6)
+        price_ax.plot(*series("low"), color="black", linestyle="dotted", label="Low", linewidth=0.6)
+
+    n_buckets = max(n_points // 10, 1)
+    for side, color in [("bid", "green"), ("ask", "red")]:
+        x, price, quantity = bucket_fills(
+            datetime,
+            history_info[f"{side}_price"].to_numpy()[order],
+            history_info[f"matched_{side}_quantity"].to_numpy()[order],
+            n_buckets,
+        )
+        if quantity.shape[0]:
+            sizes = 8 + 40 * quantity / quantity.max()
+            price_ax.scatter(x, price, s=sizes, color=color, marker="x", label=f"{side.capitalize()} matched")
+    price_ax.set_ylabel("Price", fontsize=16)
+
+    nav_ax.plot(*series("nav"), color="black", label="NAV")
+    nav_ax.set_ylabel("PnL", fontsize=16)
+    inventory_ax.plot(*series("quantity"), color="black", label="Stocks held", drawstyle="steps-post")
+    inventory_ax.set_ylabel("Inventory", fontsize=16)
+    for ax in (price_ax, nav_ax, inventory_ax):
+        ax.set_xlabel("Time", fontsize=16)
+        ax.grid(True)
+        ax.legend()
+
+    if path is not None:
+        figure.savefig(path)
+    return figure
+
+
+def episode_quantiles(
+    history_info: pd.DataFrame,
+    col: str,
+    quantiles: Sequence[float] = (0.05, 0.25, 0.5, 0.75, 0.95),
+    episode_col: str = "episode",
+) -> np.ndarray:
+    """Quantiles of ``col`` across episodes at every step, (n_steps, n_quantiles).
+    Steps are counted from the start of each episode in row order, episodes
+    shorter than the longest one only contribute to their own steps.
+    """
+    episode = history_info[episode_col].to_numpy()
+    order = np.argsort(episode, kind="stable")
+    _, first, inverse = np.unique(episode[order], return_index=True, return_inverse=True)
+    step = np.arange(order.shape[0]) - first[inverse]
+    values = np.full((step.max() + 1, first.shape[0]), np.nan)
+    values[step, inverse] = history_info[col].to_numpy(dtype=np.float64)[order]
+    return np.nanquantile(values, quantiles, axis=1).T
+
+
+def plot_episode_bands(
+    history_info: pd.DataFrame,
+    path: Optional[str] = None,
+    columns: Sequence[str] = ("nav", "quantity"),
+    quantiles: Sequence[float] = (0.05, 0.25, 0.5, 0.75, 0.95),
+    episode_col: str = "episode",
+    n_points: int = 2000,
+    figsize=(8, 10),
+    dpi: int = 100,
+) -> Figure:
+    """Quantile bands of ``columns`` across the episodes of a stacked history
+    (e.g. ``BatchMarketMakerEnv.get_history_info``), one panel per column.
+
+    Steps are aggregated in about ``n_points`` buckets, each band keeps the
+    bucket extreme of its outer quantile and the median the bucket mean. The
+    figure is rendered with the Agg backend and written to ``path`` if given.
+    ``history_info`` is not modified.
+
+    Returns:
+        Figure: the matplotlib figure
+    """
+    quantiles = np.sort(np.asarray(quantiles, dtype=np.float64))
+    figure, axes = _new_figure(len(columns), figsize, dpi)
+    for ax, col in zip(axes, columns):
+        bands = episode_quantiles(history_info, col, quantiles, episode_col)
+        n_steps = bands.shape[0]
+        starts = np.unique(np.linspace(0, n_steps, min(n_points, n_steps), endpoint=False).astype(np.int64))
+        step = starts.astype(np.float64)
+        lower = np.minimum.reduceat(bands, starts, axis=0)
+        upper = np.maximum.reduceat(bands, starts, axis=0)
+        counts = np.diff(np.append(starts, n_steps))
+        mean = np.add.reduceat(bands, starts, axis=0) / counts[:, None]
+
+        for i in range(len(quantiles) // 2):
+            low_q, high_q = quantiles[i], quantiles[-1 - i]
+            ax.fill_between(
+                step,
+                lower[:, i],
+                upper[:, -1 - i],
+                color="tab:blue",
+                alpha=0.15 + 0.15 * i,
+                linewidth=0,
+                label=f"{low_q:.0%}-{high_q:.0%}",
+            )
+        if len(quantiles) % 2:
+            ax.plot(step, mean[:, len(quantiles) // 2], color="black", label=f"{quantiles[len(quantiles) // 2]:.0%}")
+        ax.set_xlabel("Step", fontsize=16)
+        ax.set_ylabel(col, fontsize=16)
+        ax.grid(True)
+        ax.legend()
+
+    if path is not None:
+        figure.savefig(path)
+    return figure
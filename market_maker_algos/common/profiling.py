@@ -0,0 +1,65 @@
+from contextlib import contextmanager
+from time import perf_counter_ns
+from typing import Dict, Iterator, Optional
+import pandas as pd
+
+
+class PhaseTimer:
+    """Cumulative nanosecond timers and call counters per named phase.
+
+    Phases of a sequential pipeline are timed with laps: ``start`` marks the
+    beginning of the pipeline and each ``lap(phase)`` charges the time since
+    the previous mark to ``phase``, so one clock read is taken per phase.
+    """
+
+    __slots__ = ("total_ns", "calls", "_mark")
+
+    def __init__(self):
+        self.total_ns: Dict[str, int] = {}
+        self.calls: Dict[str, int] = {}
+        self._mark = 0
+
+    def start(self) -> None:
+        self._mark = perf_counter_ns()
+
+    def lap(self, phase: str) -> None:
+        now = perf_counter_ns()
+        self.total_ns[phase] = self.total_ns.get(phase, 0) + now - self._mark
+        self.calls[phase] = self.calls.get(phase, 0) + 1
+        self._mark = now
+
+    def clear(self) -> None:
+        self.total_ns.clear()
+        self.calls.clear()
+
+    def summary(self) -> pd.DataFrame:
+        """Calls, total and mean time per phase with its share of the total"""
+        summary = pd.DataFrame(
+            {
+                "calls": pd.Series(self.calls, dtype="int64"),
+                "total_ns": pd.Series(self.total_ns, dtype="int64"),
+            }
+        )
+        summary.index.name = "phase"
+        summary["mean_ns"] = summary["total_ns"] / summary["calls"]
+        summary["share"] = summary["total_ns"] / max(summary["total_ns"].sum(), 1)
+        return summary
+
+
+@contextmanager
+def profile_env(env, timer: Optional[PhaseTimer] = None) -> Iterator[PhaseTimer]:
+    """Profile the step phases and loader resets of a ``MarketMakerEnv``
+    inside the block, the previous profiler of the env is restored on exit.
+
+    Example:
+        with profile_env(env) as timer:
+            play(policy, env)
+        print(timer.summary())
+    """
+    env = env.unwrapped
+    previous = env.profiler
+    env.profiler = timer if timer is not None else PhaseTimer()
+    try:
+        yield env.profiler
+    finally:
+        env.profiler = previous
@@ -0,0 +1,188 @@
+import hashlib
+import inspect
+import json
+import os
+import uuid
+from typing import Any, Callable, Dict, Optional
+import numpy as np
+import pandas as pd
+
+from ..data_loader.columnar_store import METADATA_FILE, is_columnar_store
+
+_COLUMNS_KEY = "__columns__"
+
+
+def _hash_array(values: np.ndarray) -> str:
+    values = np.asarray(values)
+    if values.dtype == object:
+        values = values.astype(str)
+    digest = hashlib.sha256(np.ascontiguousarray(values).view(np.uint8))
+    digest.update(f"{values.dtype.str}{values.shape}".encode())
+    return digest.hexdigest()
+
+
+def describe(obj: Any) -> Any:
+    """JSON-able description of ``obj`` identifying the results it produces.
+
+    Objects are described by their class and the constructor parameters
+    stored as attributes of the same name, envs with the constructor values
+    of the parameters a calibration overrides at reset, data loaders also by
+    their pinned task and calibration. Arrays are hashed, paths of files and
+    columnar stores carry their size and modification time so the key
+    changes with the data, other directories (e.g. of a history sink) are
+    plain paths.
+    """
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        if isinstance(obj, str) and (os.path.isfile(obj) or is_columnar_store(obj)):
+            stat_path = obj if os.path.isfile(obj) else os.path.join(obj, METADATA_FILE)
+            stat = os.stat(stat_path)
+            return {"path": os.path.abspath(obj), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        return obj
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return {"array": _hash_array(obj)}
+    if isinstance(obj, (pd.Series, pd.DataFrame)):
+        return {"frame": {col: _hash_array(values) for col, values in pd.DataFrame(obj).items()}}
+    if isinstance(obj, (list, tuple)):
+        return [describe(value) for value in obj]
+    if isinstance(obj, dict):
+        return {str(key): describe(value) for key, value in sorted(obj.items(), key=lambda item: str(item[0]))}
+
+    cls = type(obj)
+    # envs replace A and k with the calibrated values at reset, describe the user ones
+    defaults = obj._user_params() if hasattr(obj, "_user_params") else {}
+    params = {}
+    for name in inspect.signature(cls.__init__).parameters:
+        if name in defaults:
+            params[name] = describe(defaults[name])
+        elif name != "self" and hasattr(obj, name):
+            params[name] = describe(getattr(obj, name))
+    if hasattr(obj, "task"):
+        params["task"] = describe(obj.task)
+    if getattr(obj, "calibration", None):
+        params["calibration"] = describe(obj.calibration)
+    return {"class": f"{cls.__module__}.{cls.__qualname__}", "params": params}
+
+
+class ResultCache:
+    """Content-addressed on-disk cache of episode histories.
+
+    Keys are hashes of a description of everything the result depends on
+    (see ``describe``). Each history is stored as an uncompressed npz file,
+    written to a temporary file and moved in place with ``os.replace``, so
+    concurrent writers, e.g. workers of a process pool, never expose partial
+    files. A hit refreshes the file modification time, the least recently
+    used files are evicted once the cache exceeds ``max_bytes``. Each
+    instance keeps a running total of the cache size, updated by its own
+    writes and rescanned when it passes the limit, so a ``put`` does not
+    stat every entry; writes of other processes are counted at that rescan.
+
+    Args:
+        directory (str): cache directory, shared by every process using the cache
+        max_bytes (int, optional): size limit of the cache. Defaults to 1 GiB.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1 << 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        # running total of the cache size, scanned on the first put
+        self._size = None
+
+    @staticmethod
+    def make_key(**parts) -> str:
+        payload = json.dumps(describe(parts), sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.npz")
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                columns = list(data[_COLUMNS_KEY])
+                frame = pd.DataFrame({col: data[col] for col in columns}, copy=False)
+            os.utime(path)
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            # missing, or evicted or replaced while reading
+            return None
+        return frame
+
+    def put(self, key: str, frame: pd.DataFrame) -> None:
+        arrays = {}
+        for col in frame.columns:
+            values = frame[col].to_numpy()
+            arrays[col] = values.astype(str) if values.dtype == object else values
+        arrays[_COLUMNS_KEY] = np.asarray(list(frame.columns), dtype=str)
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        if self._size is None:
+            self._size = self.size
+        try:
+            self._size -= os.stat(path).st_size
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_path, path)
+        self._size += os.stat(path).st_size
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def fetch(self, key: str, compute: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Cached result of ``key``, computed and stored on a miss"""
+        frame = self.get(key)
+        if frame is None:
+            frame = compute()
+            self.put(key, frame)
+        return frame
+
+    def _entries(self):
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".npz"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    yield entry.path, stat.st_size, stat.st_mtime_ns
+
+    @property
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits ``max_bytes``"""
+        entries = list(self._entries())
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    # already evicted by another process
+                    pass
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        self._size = total
+
+    def clear(self) -> None:
+        for path, _, _ in list(self._entries()):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._size = 0
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._entries())
@@ -0,0 +1,189 @@
+import itertools
+import math
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+
+from .backtest import backtest_avellaneda_stoikov
+from .common_utils import check_col, open_config
+from .metrics import episode_metrics
+from .result_cache import ResultCache
+
+SWEEP_PARAMS = {"risk_factor": 0.1, "k": 1.5, "order_quantity": 1}
+
+# price paths shared by every task of a worker, set once by the pool initializer
+_worker_paths = None
+
+
+def sample_paths(data_loader, n_episodes: int) -> List[Dict]:
+    """Sample ``n_episodes`` OHLC paths and their asset metadata from ``data_loader``"""
+    paths = []
+    for _ in range(n_episodes):
+        ohlcv_df = data_loader.reset()
+        check_col(ohlcv_df, ["open", "high", "low", "close"])
+        ohlc = {
+            col: ohlcv_df[col].to_numpy(dtype=np.float64)
+            for col in ["open", "high", "low", "close"]
+        }
+        if "datetime" in ohlcv_df.columns:
+            ohlc["datetime"] = ohlcv_df["datetime"].to_numpy()
+        paths.append({"ohlc": ohlc, "metadata": dict(data_loader.asset_metadata)})
+    return paths
+
+
+def _init_worker(paths: List[Dict]) -> None:
+    global _worker_paths
+    _worker_paths = paths
+
+
+def _run_task(params: Dict, episodes: List[int], backtest_kwargs: Dict) -> List[Dict]:
+    rows = []
+    for episode in episodes:
+        row = {**params, "episode": episode, "error": None}
+        try:
+            path = _worker_paths[episode]
+            metadata = path["metadata"]
+            history = backtest_avellaneda_stoikov(
+                path["ohlc"],
+                order_quantity=params["order_quantity"],
+                risk_factor=params["risk_factor"],
+                k=params["k"],
+                sigma=metadata["sigma"],
+                total_time=metadata["total_time"],
+                dt=metadata["dt"],
+                **backtest_kwargs,
+            )
+            metrics = episode_metrics(
+                history,
+                init_cash=backtest_kwargs["init_cash"],
+                bid_fee=backtest_kwargs["bid_fee"],
+                ask_fee=backtest_kwargs["ask_fee"],
+            )
+            row.update(metrics.to_dict("records")[0])
+        except Exception:
+            row["error"] = traceback.format_exc()
+        rows.append(row)
+    return rows
+
+
+def _run_pool(
+    tasks: List[Tuple[Dict, List[int]]], n_workers: int, paths: List[Dict], backtest_kwargs: Dict
+) -> Tuple[List[Dict], List[Tuple[Tuple[Dict, List[int]], str]]]:
+    """Run ``tasks`` on one process pool, return their rows and the tasks left
+    unfinished, with the error, when a worker process died and broke the pool.
+    """
+    rows, unfinished = [], []
+    with ProcessPoolExecutor(
+        max_workers=n_workers, initializer=_init_worker, initargs=(paths,)
+    ) as executor:
+        futures = {
+            executor.submit(_run_task, cell, chunk, backtest_kwargs): (cell, chunk)
+            for cell, chunk in tasks
+        }
+        for future in as_completed(futures):
+            try:
+                rows.extend(future.result())
+            except BrokenProcessPool:
+                unfinished.append((futures[future], traceback.format_exc()))
+            except Exception:
+                # the task could not be sent or its result not returned
+                cell, chunk = futures[future]
+                error = traceback.format_exc()
+                rows.extend({**cell, "episode": episode, "error": error} for episode in chunk)
+    return rows, unfinished
+
+
+def run_sweep(
+    data_loader,
+    param_grid: Union[Dict[str, List], str],
+    n_episodes: int = 10,
+    env_id: Optional[str] = None,
+    n_workers: Optional[int] = None,
+    init_cash: float = 0,
+    bid_fee: float = 0.0003,
+    ask_fee: float = 0.0013,
+    use_numba: Optional[bool] = None,
+    seed: Optional[int] = None,
+    cache: Optional[ResultCache] = None,
+) -> pd.DataFrame:
+    """Backtest ``AvellanedaStoikov`` on ``LehalleEnv`` for every cell of a
+    parameter grid over ``risk_factor``, ``k`` and ``order_quantity``.
+
+    The same ``n_episodes`` price paths are sampled once and reused by every
+    cell. Cells are split in episode chunks and fanned out to a process pool,
+    each worker receives the paths once at start-up. A failing episode is
+    reported in the ``error`` column instead of aborting the sweep. A worker
+    process dying breaks its pool: the unfinished tasks are rerun on new
+    pools, ``n_workers`` at a time and alone if their pool breaks again, so
+    only the task that kills its worker is reported as failed.
+
+    Args:
+        data_loader (BaseDataLoader): loader providing open, high, low and close
+        param_grid (Union[Dict[str, List], str]): values per parameter, or a yaml file read with ``open_config``
+        n_episodes (int, optional): number of price paths. Defaults to 10.
+        env_id (str, optional): section of the yaml file holding the grid.
+        n_workers (int, optional): number of processes, 0 runs in the current process. Defaults to cpu count.
+        init_cash, bid_fee, ask_fee (float, optional): env parameters, same defaults as ``LehalleEnv``.
+        use_numba (bool, optional): see ``backtest_avellaneda_stoikov``.
+        seed (int, optional): seed of the loader when sampling the price paths.
+        cache (ResultCache, optional): cache of the episode backtests, shared by the workers.
+
+    Returns:
+        pd.DataFrame: one row per (parameter cell, episode) with summary statistics
+    """
+    if isinstance(param_grid, str):
+        param_grid = open_config(param_grid, env_id, is_args=False)
+    unknown = set(param_grid).difference(SWEEP_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {', '.join(sorted(unknown))}")
+    grid = {
+        name: list(np.atleast_1d(param_grid.get(name, default)))
+        for name, default in SWEEP_PARAMS.items()
+    }
+    cells = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+
+    if seed is not None:
+        data_loader.seed(seed)
+    paths = sample_paths(data_loader, n_episodes)
+    backtest_kwargs = {
+        "init_cash": init_cash,
+        "bid_fee": bid_fee,
+        "ask_fee": ask_fee,
+        "use_numba": use_numba,
+        "cache": cache,
+    }
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    # enough tasks to keep every worker busy while each task stays large
+    n_chunks = max(1, min(n_episodes, math.ceil(4 * max(n_workers, 1) / len(cells))))
+    chunks = [list(chunk) for chunk in np.array_split(np.arange(n_episodes), n_chunks)]
+    tasks = [(cell, chunk) for cell in cells for chunk in chunks if len(chunk)]
+
+    rows = []
+    if n_workers == 0:
+        _init_worker(paths)
+        for cell, chunk in tasks:
+            rows.extend(_run_task(cell, chunk, backtest_kwargs))
+    else:
+        rows, unfinished = _run_pool(tasks, n_workers, paths, backtest_kwargs)
+        unfinished = [task for task, _ in unfinished]
+        for start in range(0, len(unfinished), n_workers):
+            batch_rows, suspects = _run_pool(
+                unfinished[start : start + n_workers], n_workers, paths, backtest_kwargs
+            )
+            rows.extend(batch_rows)
+            for task, _ in suspects:
+                # alone in its pool, a task breaking it killed the worker
+                task_rows, crashed = _run_pool([task], 1, paths, backtest_kwargs)
+                rows.extend(task_rows)
+                for (cell, chunk), error in crashed:
+                    rows.extend({**cell, "episode": episode, "error": error} for episode in chunk)
+
+    results = pd.DataFrame(rows)
+    results.sort_values(by=list(SWEEP_PARAMS) + ["episode"], inplace=True, ignore_index=True)
+    return results
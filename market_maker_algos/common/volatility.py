@@ -0,0 +1,126 @@
+import math
+from typing import Optional
+
+# 4 ln 2, normalizer of the Parkinson range estimator
+_PARKINSON_FACTOR = 4 * math.log(2)
+
+
+class VolatilityEstimator:
+    """Online estimator of the price volatility, updated in O(1) per tick.
+
+    Volatility is measured on absolute price changes and scaled by the tick
+    duration ``dt``, the units of ``sigma`` in the Avellaneda-Stoikov
+    observation. Until enough ticks are seen the prior ``init_sigma`` is
+    returned. Each estimator only uses ticks up to the current one.
+    """
+
+    # whether ``update`` needs the high and low of the tick
+    requires_high_low = False
+
+    def __init__(self):
+        self.dt = 1.0
+        self.init_sigma = 0.0
+        self.sigma = 0.0
+        self._last_price = None
+
+    def reset(self, init_price: float, dt: float, init_sigma: float = 0.0) -> float:
+        """Start a new episode at ``init_price``, return the prior sigma"""
+        self.dt = dt
+        self.init_sigma = float(init_sigma)
+        self.sigma = self.init_sigma
+        self._last_price = init_price
+        return self.sigma
+
+    def update(self, close: float, high: Optional[float] = None, low: Optional[float] = None) -> float:
+        """Update with the prices of a new tick and return the current sigma"""
+        raise NotImplementedError
+
+
+class EWMAVolatility(VolatilityEstimator):
+    """Exponentially weighted moving average of squared price changes,
+    starting from the prior variance.
+
+    Args:
+        alpha (float, optional): weight of the latest change. Defaults to 0.06 (RiskMetrics).
+    """
+
+    def __init__(self, alpha: float = 0.06):
+        super().__init__()
+        self.alpha = alpha
+        self._variance = 0.0
+
+    def reset(self, init_price: float, dt: float, init_sigma: float = 0.0) -> float:
+        self._variance = init_sigma**2 * dt
+        return super().reset(init_price, dt, init_sigma)
+
+    def update(self, close: float, high: Optional[float] = None, low: Optional[float] = None) -> float:
+        change = close - self._last_price
+        self._last_price = close
+        self._variance += self.alpha * (change * change - self._variance)
+        self.sigma = math.sqrt(self._variance / self.dt)
+        return self.sigma
+
+
+class WelfordVolatility(VolatilityEstimator):
+    """Sample standard deviation of the price changes since the start of the
+    episode, with Welford's numerically stable running update.
+
+    Args:
+        min_periods (int, optional): price changes needed before leaving the prior. Defaults to 2.
+    """
+
+    def __init__(self, min_periods: int = 2):
+        super().__init__()
+        self.min_periods = max(min_periods, 2)
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def reset(self, init_price: float, dt: float, init_sigma: float = 0.0) -> float:
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        return super().reset(init_price, dt, init_sigma)
+
+    def update(self, close: float, high: Optional[float] = None, low: Optional[float] = None) -> float:
+        change = close - self._last_price
+        self._last_price = close
+        self._count += 1
+        delta = change - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (change - self._mean)
+        if self._count >= self.min_periods:
+            self.sigma = math.sqrt(self._m2 / (self._count - 1) / self.dt)
+        return self.sigma
+
+
+class ParkinsonVolatility(VolatilityEstimator):
+    """Parkinson high-low range estimator, ``(high - low)^2 / (4 ln 2)`` per
+    tick, averaged since the start of the episode or exponentially weighted.
+    More efficient than close-to-close estimators on bars, needs high and low.
+
+    Args:
+        alpha (float, optional): weight of the latest tick, None averages every tick equally.
+    """
+
+    requires_high_low = True
+
+    def __init__(self, alpha: Optional[float] = None):
+        super().__init__()
+        self.alpha = alpha
+        self._count = 0
+        self._variance = 0.0
+
+    def reset(self, init_price: float, dt: float, init_sigma: float = 0.0) -> float:
+        self._count = 0
+        self._variance = init_sigma**2 * dt
+        return super().reset(init_price, dt, init_sigma)
+
+    def update(self, close: float, high: Optional[float] = None, low: Optional[float] = None) -> float:
+        self._last_price = close
+        value = (high - low) ** 2 / _PARKINSON_FACTOR
+        self._count += 1
+        weight = 1 / self._count if self.alpha is None else self.alpha
+        self._variance += weight * (value - self._variance)
+        self.sigma = math.sqrt(self._variance / self.dt)
+        return self.sigma
@@ -3,4 +3,5 @@ import numpy as np
 
 from .base import BaseDataLoader
 from .brownian import SingleBrownianMotion
-from .covered_warrant import RandomCoveredWarrantLoader
\ No newline at end of file
+from .covered_warrant import RandomCoveredWarrantLoader, convert_csv_to_store
+from .synthetic_lob import SyntheticLOBLoader
\ No newline at end of file
@@ -1,25 +1,77 @@
 from abc import abstractmethod, ABC
+from typing import Dict, List, Optional, Union
+import numpy as np
 import pandas as pd
 
+from .columnar_store import is_columnar_store, read_columns, write_columns
+
+INDEX_COLUMN = "__index__"
+
 
 class BaseDataLoader(ABC):
+    # task pinned by reset_task and train/eval mode, used by meta vector envs
+    task = None
+    training = True
+    _rng = None
+
     def __init__(self):
         self.ohlcv_df = None
 
-    def save(self, path):
-        # save csv
-        if isinstance(self.ohlcv_df, pd.DataFrame):
+    @property
+    def rng(self) -> np.random.Generator:
+        """Generator of every random draw of the loader, unseeded until ``seed`` is called"""
+        if self._rng is None:
+            self._rng = np.random.default_rng()
+        return self._rng
+
+    def seed(self, seed: Union[int, np.random.SeedSequence, None] = None) -> None:
+        """Reset the loader generator, envs pass a ``SeedSequence`` spawned from their own seed"""
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def tasks(self) -> List[str]:
+        """Tasks (e.g. sample ids) the loader can be pinned to with ``reset_task``"""
+        return []
+
+    def reset_task(self, task: Optional[str]) -> None:
+        """Sample every following episode from ``task``, None samples randomly again"""
+        if task is not None and task not in set(self.tasks):
+            raise ValueError(f"Unknown task {task}")
+        self.task = task
+
+    def train(self, mode: bool = True) -> None:
+        self.training = mode
+
+    def save(self, path, format: str = "csv"):
+        """Save ``ohlcv_df`` as a csv file or, with ``format="npy"``, as a
+        directory of per-column ``.npy`` files that ``load`` can memory-map.
+        """
+        if not isinstance(self.ohlcv_df, pd.DataFrame):
+            raise NotImplementedError("Only support saving pd.DataFrame")
+        if format == "csv":
             self.ohlcv_df.to_csv(path)
+        elif format == "npy":
+            columns = {col: self.ohlcv_df[col].to_numpy() for col in self.ohlcv_df.columns}
+            columns[INDEX_COLUMN] = self.ohlcv_df.index.to_numpy()
+            write_columns(path, columns)
         else:
-            raise NotImplementedError("Only support saving pd.DataFrame to csv file")
+            raise ValueError(f"Unknown format {format}, expected 'csv' or 'npy'")
 
-    def load(self, path):
-        # load csv, check exception
-        try:
+    def load(self, path, format: Optional[str] = None):
+        """Load ``ohlcv_df`` saved by ``save``. The format is inferred from
+        ``path`` when not given, npy columns are memory-mapped.
+        """
+        if format is None:
+            format = "npy" if is_columnar_store(path) else "csv"
+        if format == "csv":
             self.ohlcv_df = pd.read_csv(path, index_col=0)
             self.ohlcv_df.index = pd.to_datetime(self.ohlcv_df.index)
-        except Exception as e:
-            raise e
+        elif format == "npy":
+            columns, _ = read_columns(path)
+            index = columns.pop(INDEX_COLUMN)
+            self.ohlcv_df = pd.DataFrame(columns, index=index, copy=False)
+        else:
+            raise ValueError(f"Unknown format {format}, expected 'csv' or 'npy'")
 
     @property
     @abstractmethod
@@ -29,3 +81,26 @@ class BaseDataLoader(ABC):
     @abstractmethod
     def reset(self):
         raise NotImplementedError
+
+    def reset_batch(self, num_episodes: int) -> Dict[str, np.ndarray]:
+        """Sample ``num_episodes`` episodes at once for batched environments.
+
+        Price columns are returned time-major with shape (n_ticks, num_episodes),
+        ``datetime`` (if any) with shape (n_ticks,). The default implementation
+        calls ``reset`` repeatedly, subclasses should override it when paths can
+        be generated in bulk. All episodes of a batch must have the same length
+        and share the asset metadata of the last sampled episode.
+        """
+        frames = [self.reset() for _ in range(num_episodes)]
+        if len({frame.shape[0] for frame in frames}) != 1:
+            raise ValueError("All episodes of a batch must have the same length")
+
+        batch = {}
+        for col in ["open", "high", "low", "close"]:
+            if all(col in frame.columns for frame in frames):
+                batch[col] = np.stack(
+                    [frame[col].to_numpy(dtype=np.float64) for frame in frames], axis=1
+                )
+        if "datetime" in frames[-1].columns:
+            batch["datetime"] = frames[-1]["datetime"].to_numpy()
+        return batch
@@ -1,3 +1,4 @@
+from typing import Dict, Optional, Union
 import pandas as pd
 import numpy as np
 
@@ -6,12 +7,45 @@ from ..data_loader import BaseDataLoader
 
 
 class SingleBrownianMotion(BaseDataLoader):
-    def __init__(self, init_value: float, n_sample, sigma, total_time: int = 1):
+    """Brownian motion price path starting at ``init_value``.
+
+    With ``pool_size`` set, ``pool_size`` paths are generated at once with a
+    ``numpy.random.Generator`` into one (pool_size, n_sample) array, episodes
+    are served from it and the pool is refilled in bulk when exhausted.
+
+    Args:
+        init_value (float): initial price
+        n_sample (int): number of ticks per episode
+        sigma (float): volatility of the path
+        total_time (int, optional): episode horizon. Defaults to 1.
+        pool_size (int, optional): number of pre-generated paths, None generates one path per reset.
+        as_frame (bool, optional): return a DataFrame from reset, otherwise a dict of
+            ``datetime`` and ``close`` arrays. Defaults to True.
+        seed (int, optional): seed of the loader generator, see ``BaseDataLoader.seed``.
+    """
+
+    def __init__(
+        self,
+        init_value: float,
+        n_sample,
+        sigma,
+        total_time: int = 1,
+        pool_size: Optional[int] = None,
+        as_frame: bool = True,
+        seed: Optional[int] = None,
+    ):
         self.n_sample = n_sample
         self.sigma = sigma
         self.total_time = total_time
         self.init_value = init_value
         self.dt = total_time / n_sample
+        self.pool_size = pool_size
+        self.as_frame = as_frame
+
+        self._datetime = pd.to_datetime(np.arange(self.n_sample) + 1, unit="s").to_numpy()
+        self._pool = None
+        self._pool_index = 0
+        self.seed(seed)
 
     @property
     def asset_metadata(self):
@@ -24,21 +58,62 @@ class SingleBrownianMotion(BaseDataLoader):
             "dt": self.dt,
         }
 
-    def reset(self) -> pd.DataFrame:
-        brownian_path = np.empty(self.n_sample)
-        brownian_path[0] = self.init_value
-        brownian(
-            x0=self.init_value,
-            n=self.n_sample - 1,
-            dt=self.dt,
-            delta=self.sigma,
-            out=brownian_path[1:],
-        )
+    def seed(self, seed: Union[int, np.random.SeedSequence, None] = None) -> None:
+        super().seed(seed)
+        # paths drawn from the previous stream are discarded
+        self._pool_index = self.pool_size
+
+    def _refill_pool(self) -> None:
+        if self._pool is None:
+            self._pool = np.empty((self.pool_size, self.n_sample))
+        increments = self.rng.standard_normal((self.pool_size, self.n_sample - 1))
+        increments *= self.sigma * np.sqrt(self.dt)
+        self._pool[:, 0] = self.init_value
+        np.cumsum(increments, axis=1, out=self._pool[:, 1:])
+        self._pool[:, 1:] += self.init_value
+        self._pool_index = 0
+
+    def _take_paths(self, num_paths: int) -> np.ndarray:
+        """(num_paths, n_sample) paths, from the pool when pooling is enabled"""
+        if self.pool_size is None:
+            paths = np.empty((num_paths, self.n_sample))
+            paths[:, 0] = self.init_value
+            brownian(
+                x0=np.full(num_paths, self.init_value, dtype=np.float64),
+                n=self.n_sample - 1,
+                dt=self.dt,
+                delta=self.sigma,
+                out=paths[:, 1:],
+                random_state=self.rng,
+            )
+            return paths
+
+        chunks = []
+        while num_paths > 0:
+            if self._pool is None or self._pool_index == self.pool_size:
+                self._refill_pool()
+            stop = min(self._pool_index + num_paths, self.pool_size)
+            # copy, the pool is overwritten in place when refilled
+            chunks.append(self._pool[self._pool_index : stop].copy())
+            num_paths -= stop - self._pool_index
+            self._pool_index = stop
+        return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+
+    def reset(self) -> Union[pd.DataFrame, Dict[str, np.ndarray]]:
+        brownian_path = self._take_paths(1)[0]
+        if not self.as_frame:
+            return {"datetime": self._datetime, "close": brownian_path}
         ohlcv_df = pd.DataFrame(
             {
-                "datetime": np.arange(self.n_sample) + 1,
+                "datetime": self._datetime,
                 "close": brownian_path,
             }
         )
-        ohlcv_df["datetime"] = pd.to_datetime(ohlcv_df["datetime"], unit="s")
         return ohlcv_df
+
+    def reset_batch(self, num_episodes: int) -> Dict[str, np.ndarray]:
+        return {
+            "datetime": self._datetime,
+            # time-major so that each step reads one contiguous row
+            "close": np.ascontiguousarray(self._take_paths(num_episodes).T),
+        }
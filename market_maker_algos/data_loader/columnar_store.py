@@ -0,0 +1,45 @@
+import json
+import os
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+METADATA_FILE = "metadata.json"
+
+
+def write_columns(path: str, columns: Dict[str, np.ndarray], metadata: Optional[Dict] = None) -> None:
+    """Write each column to ``<path>/<column>.npy`` plus a ``metadata.json``
+    describing the store, so it can later be memory-mapped column by column.
+
+    Object columns (e.g. strings) are stored as fixed-width unicode arrays
+    because pickled arrays can not be memory-mapped.
+    """
+    os.makedirs(path, exist_ok=True)
+    for name, values in columns.items():
+        values = np.asarray(values)
+        if values.dtype == object:
+            values = values.astype(str)
+        np.save(os.path.join(path, f"{name}.npy"), values, allow_pickle=False)
+
+    metadata = dict(metadata or {})
+    metadata["columns"] = list(columns.keys())
+    with open(os.path.join(path, METADATA_FILE), "w") as f:
+        json.dump(metadata, f)
+
+
+def read_columns(path: str, mmap_mode: Optional[str] = "r") -> Tuple[Dict[str, np.ndarray], Dict]:
+    """Open a store written by ``write_columns``.
+    With the default ``mmap_mode="r"`` columns are read-only memory maps, so
+    processes opening the same store share the page cache instead of each
+    holding a private copy.
+    """
+    with open(os.path.join(path, METADATA_FILE)) as f:
+        metadata = json.load(f)
+    columns = {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+        for name in metadata["columns"]
+    }
+    return columns, metadata
+
+
+def is_columnar_store(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, METADATA_FILE))
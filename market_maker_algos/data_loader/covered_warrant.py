@@ -1,66 +1,379 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 import pandas as pd
 import numpy as np
-import quantstats as qs
 
 from ..data_loader import BaseDataLoader
+from .columnar_store import is_columnar_store, read_columns, write_columns
+
+TICK_COLUMNS = ["datetime", "open", "high", "low", "close", "volume"]
+BAR_COLUMNS = ["open", "high", "low", "close", "volume"]
+# bar intervals of the per sample pyramids, each a multiple of the previous one
+BAR_INTERVALS = ("1s", "5s", "15s", "1min", "5min")
+# raw tick prices are quoted in thousandths
+PRICE_SCALE = 1000
+
+
+def _aggregate_bars(bucket: np.ndarray, bars: Dict[str, np.ndarray]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Aggregate consecutive rows of the same ``bucket`` into one OHLCV bar"""
+    new_bar = np.ones(bucket.shape[0], dtype=bool)
+    new_bar[1:] = bucket[1:] != bucket[:-1]
+    starts = np.flatnonzero(new_bar)
+    lasts = np.append(starts[1:], bucket.shape[0]) - 1
+    return bucket[starts], {
+        "open": bars["open"][starts],
+        "high": np.maximum.reduceat(bars["high"], starts),
+        "low": np.minimum.reduceat(bars["low"], starts),
+        "close": bars["close"][lasts],
+        "volume": np.add.reduceat(bars["volume"], starts),
+    }
+
+
+def _densify(bucket: np.ndarray, interval_ns: int, bars: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Expand bars to every bucket between the first and the last one, like
+    ``resample().agg().ffill()``: an empty bucket repeats the prices of the
+    previous bar and has no volume.
+    """
+    position = bucket - bucket[0]
+    n_bars = int(position[-1]) + 1
+    row = np.zeros(n_bars, dtype=np.int64)
+    row[position] = np.arange(position.shape[0])
+    row = np.maximum.accumulate(row)
+    dense = {col: bars[col][row] for col in ["open", "high", "low", "close"]}
+    dense["volume"] = np.zeros(n_bars, dtype=bars["volume"].dtype)
+    dense["volume"][position] = bars["volume"]
+    dense["datetime"] = ((bucket[0] + np.arange(n_bars)) * interval_ns).astype("datetime64[ns]")
+    return dense
 
 
 class RandomCoveredWarrantLoader(BaseDataLoader):
-    def __init__(self, path):
+    """Sample a random (date, sec_cd) episode of covered warrant ticks,
+    resampled to ``bar_interval`` bars (1 minute by default).
+
+    Ticks are sorted by sample once at load time so every sample is a
+    contiguous row range. Each sample has a pyramid of bars, a level is built
+    the first time its interval is used, from the closest finer level already
+    built or from the ticks, so only the requested intervals are computed.
+    Switching back to a built ``bar_interval`` or sampling an episode again
+    then only slices the pyramid. Pyramids and prepared episodes are kept in
+    bounded LRU caches, so ``reset`` does not scan the whole dataset.
+
+    ``path`` can also be a columnar store written by ``save_store`` (see
+    ``convert_csv_to_store``). It is then memory-mapped, so worker processes
+    share pages and start without parsing the csv.
+
+    Args:
+        path (str): path to the tick csv file or columnar store directory
+        cache_size (int, optional): number of entries kept in each LRU cache, the bar pyramids by
+            sample id and the prepared episodes by (sample id, bar interval), 0 disables both. Defaults to 32.
+        bar_interval (str, optional): bar interval of the episodes, one of ``bar_intervals``. Defaults to "1min".
+        bar_intervals (Tuple[str, ...], optional): intervals of the pyramid, each a multiple of the previous one.
+    """
+
+    def __init__(
+        self,
+        path,
+        cache_size: int = 32,
+        bar_interval: str = "1min",
+        bar_intervals: Tuple[str, ...] = BAR_INTERVALS,
+    ):
         self.path = path
+        self.cache_size = cache_size
+        self.bar_intervals = tuple(bar_intervals)
+        self._interval_ns = {interval: int(pd.Timedelta(interval).value) for interval in self.bar_intervals}
+        sizes = list(self._interval_ns.values())
+        for finer, coarser in zip(sizes[:-1], sizes[1:]):
+            if coarser <= finer or coarser % finer:
+                raise ValueError(f"Bar intervals must be increasing multiples, got {self.bar_intervals}")
+        self.bar_interval = bar_interval
+
+        if is_columnar_store(path):
+            self._init_from_store(path)
+        else:
+            self._init_from_csv(path)
 
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[pd.DataFrame, Dict]]" = OrderedDict()
+        # sample id -> interval -> (buckets, bars without empty buckets, dense bars)
+        self._pyramids: "OrderedDict[str, Dict[str, Tuple]]" = OrderedDict()
+        self._asset_metadata = {"type": "covered_warrant"}
+        self._dates = None
+        # calibrated market parameters (e.g. A and k) per sample id, see set_calibration
+        self._calibration: Dict[str, Dict[str, float]] = {}
+
+    def _init_from_csv(self, path) -> None:
         data = pd.read_csv(path)
         data["datetime"] = pd.to_datetime(data["datetime"])
         data["date"] = data["datetime"].dt.date
         data["sample_id"] = data["date"].astype(str) + "_" + data["sec_cd"].astype(str)
+        self.sample_ids = data["sample_id"].unique()
+
+        # sort once so that every sample is a contiguous row range
+        data.sort_values(by=["sample_id", "datetime"], kind="stable", inplace=True)
+        data.reset_index(drop=True, inplace=True)
         self.data = data
+        self._columns = {col: data[col].to_numpy() for col in TICK_COLUMNS}
+        sample_col = data["sample_id"].to_numpy()
+        bounds = np.flatnonzero(sample_col[1:] != sample_col[:-1]) + 1
+        starts = np.concatenate([[0], bounds])
+        stops = np.concatenate([bounds, [len(sample_col)]])
+        self._sample_slices = {
+            sample_col[start]: (int(start), int(stop)) for start, stop in zip(starts, stops)
+        }
 
-        self.sample_ids = self.data["sample_id"].unique()
-        self._asset_metadata = {"type": "covered_warrant"}
+    def _init_from_store(self, path) -> None:
+        # memory-mapped, pages are only read when a sample is prepared
+        self.data = None
+        self._columns, metadata = read_columns(path)
+        self.sample_ids = np.asarray(metadata["sample_ids"], dtype=object)
+        self._sample_slices = {
+            sample_id: (start, stop)
+            for sample_id, start, stop in zip(
+                metadata["sample_ids"], metadata["sample_starts"], metadata["sample_stops"]
+            )
+        }
+
+    def save_store(self, path) -> None:
+        """Write the sorted ticks and the sample index as a columnar store.
+        Loaders created with ``path`` memory-map it instead of parsing the csv.
+        """
+        write_columns(
+            path,
+            self._columns,
+            metadata={
+                "type": "covered_warrant",
+                "sample_ids": [str(sample_id) for sample_id in self.sample_ids],
+                "sample_starts": [self._sample_slices[s][0] for s in self.sample_ids],
+                "sample_stops": [self._sample_slices[s][1] for s in self.sample_ids],
+            },
+        )
 
     @property
     def asset_metadata(self):
         return self._asset_metadata
 
-    def reset(self):
-        sample_id = np.random.choice(self.sample_ids, size=1).item()
-        sample_df = self.data[self.data.sample_id == sample_id]
-        resample_df = (
-            sample_df.resample("1min", on="datetime")
-            .agg(
-                {
-                    "open": "first",
-                    "high": "max",
-                    "low": "min",
-                    "close": "last",
-                    "volume": "sum",
-                }
-            )
-            .ffill()
-        )
-        resample_df.sort_values(by="datetime", inplace=True)
-        resample_df.reset_index(inplace=True)
-        resample_df["open"] = resample_df["open"] / 1000
-        resample_df["high"] = resample_df["high"] / 1000
-        resample_df["low"] = resample_df["low"] / 1000
-        resample_df["close"] = resample_df["close"] / 1000
-        self.ohlcv_df = resample_df
-
-        # update asset metadata
+    @property
+    def tick_columns(self) -> Dict[str, np.ndarray]:
+        """Raw tick columns ``TICK_COLUMNS``, sorted by sample. The arrays are
+        shared with the loader and must not be modified.
+        """
+        return self._columns
+
+    def sample_rows(self, sample_id: str) -> Tuple[int, int]:
+        """Row range ``[start, stop)`` of the ticks of the sample in ``tick_columns``"""
+        return self._sample_slices[sample_id]
+
+    @property
+    def bar_interval(self) -> str:
+        return self._bar_interval
+
+    @bar_interval.setter
+    def bar_interval(self, interval: str) -> None:
+        if interval not in self._interval_ns:
+            raise ValueError(f"Unknown bar interval {interval}, expected one of {self.bar_intervals}")
+        self._bar_interval = interval
+
+    def _tick_bars(self, sample_id: str) -> Tuple[np.ndarray, Dict[str, np.ndarray], np.dtype]:
+        """Ticks of the sample as the 1 ns level of the pyramid, prices divided by ``PRICE_SCALE``"""
+        start, stop = self._sample_slices[sample_id]
+        datetime = np.asarray(self._columns["datetime"][start:stop])
+        timestamp = datetime.astype("datetime64[ns]").astype(np.int64)
+        bars = {col: np.asarray(self._columns[col][start:stop]) for col in BAR_COLUMNS}
+        for col in ["open", "high", "low", "close"]:
+            bars[col] = bars[col].astype(np.float64) / PRICE_SCALE
+        return timestamp, bars, datetime.dtype
+
+    def _build_level(self, sample_id: str, pyramid: Dict[str, Tuple], interval: str) -> None:
+        """Add the bars of ``interval`` to the pyramid of the sample"""
+        finer = [
+            level
+            for level in self.bar_intervals[: self.bar_intervals.index(interval)]
+            if level in pyramid
+        ]
+        if finer:
+            # from the bars without empty buckets, an empty dense bar repeats the previous prices
+            bucket, bars, dense = pyramid[finer[-1]]
+            interval_ns, time_dtype = self._interval_ns[finer[-1]], dense["datetime"].dtype
+        else:
+            # bins aligned on the epoch like resample, ticks are the 1 ns level
+            (bucket, bars, time_dtype), interval_ns = self._tick_bars(sample_id), 1
+        bucket, bars = _aggregate_bars(bucket * interval_ns // self._interval_ns[interval], bars)
+        dense = _densify(bucket, self._interval_ns[interval], bars)
+        # keep the time unit of the ticks
+        dense["datetime"] = dense["datetime"].astype(time_dtype)
+        pyramid[interval] = (bucket, bars, dense)
+
+    def get_bars(self, sample_id: str, bar_interval: str) -> Dict[str, np.ndarray]:
+        """Dense bars of the sample at ``bar_interval``, column arrays served from
+        the LRU cache of pyramids. The arrays are shared with the cache and must not be modified.
+        """
+        pyramid = self._pyramids.get(sample_id)
+        if pyramid is not None:
+            self._pyramids.move_to_end(sample_id)
+        else:
+            pyramid = {}
+            if self.cache_size > 0:
+                self._pyramids[sample_id] = pyramid
+                if len(self._pyramids) > self.cache_size:
+                    self._pyramids.popitem(last=False)
+        if bar_interval not in pyramid:
+            self._build_level(sample_id, pyramid, bar_interval)
+        return pyramid[bar_interval][2]
+
+    def _prepare_sample(self, sample_id: str, bar_interval: str) -> Tuple[pd.DataFrame, Dict]:
+        bars = self.get_bars(sample_id, bar_interval)
+        resample_df = pd.DataFrame({col: bars[col] for col in ["datetime", *BAR_COLUMNS]})
+
+        # asset metadata
         date, sec_cd = sample_id.split("_")
         dt = 1 / resample_df.shape[0]
         total_time = resample_df.shape[0]
-        # TODO: update volatility model
-        sigma = qs.stats.volatility(resample_df["close"].pct_change())
-        self._asset_metadata.update(
-            {
-                "date": date,
-                "sec_cd": sec_cd,
-                "dt": dt,
-                "total_time": total_time,
-                # "sigma": sigma,
-                "sigma": 0.0002,
-            }
-        )
+        metadata = {
+            "sample_id": sample_id,
+            "date": date,
+            "sec_cd": sec_cd,
+            "bar_interval": bar_interval,
+            "dt": dt,
+            "total_time": total_time,
+            # prior only, envs can estimate sigma online with a VolatilityEstimator
+            "sigma": 0.0002,
+        }
+        return resample_df, metadata
+
+    def get_sample(self, sample_id: str, bar_interval: Optional[str] = None) -> Tuple[pd.DataFrame, Dict]:
+        """Return the prepared episode and its metadata at ``bar_interval``,
+        the loader one by default, served from the LRU cache.
+        The returned frame is shared with the cache and must not be modified.
+        """
+        if bar_interval is None:
+            bar_interval = self.bar_interval
+        elif bar_interval not in self._interval_ns:
+            raise ValueError(f"Unknown bar interval {bar_interval}, expected one of {self.bar_intervals}")
+        key = (sample_id, bar_interval)
+        entry = self._cache.get(key)
+        if entry is not None:
+            self._cache.move_to_end(key)
+            return entry
+
+        entry = self._prepare_sample(sample_id, bar_interval)
+        if self.cache_size > 0:
+            self._cache[key] = entry
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return entry
+
+    @property
+    def tasks(self):
+        return list(self.sample_ids)
+
+    def reset(self):
+        sample_id = self.task
+        if sample_id is None:
+            sample_id = self.rng.choice(self.sample_ids, size=1).item()
+        self.ohlcv_df, metadata = self.get_sample(sample_id)
+
+        # update asset metadata, replacing the per-asset fields of ``reset_multi``
+        self._asset_metadata = {
+            "type": "covered_warrant",
+            **metadata,
+            **self._calibration.get(sample_id, {}),
+        }
 
         return self.ohlcv_df
+
+    @property
+    def calibration(self) -> Dict[str, Dict[str, float]]:
+        """Calibrated parameters per sample id, see ``set_calibration``"""
+        return self._calibration
+
+    def set_calibration(self, params: Optional[pd.DataFrame]) -> None:
+        """Attach per sample market parameters, e.g. ``A`` and ``k`` from
+        ``calibrate_intensity``, to the asset metadata of the sampled episodes.
+        Envs replace their own parameters with them at reset, samples with
+        NaN parameters keep the env defaults. None removes the calibration.
+        """
+        self._calibration = {}
+        if params is None:
+            return
+        for sample_id, row in params.iterrows():
+            values = {
+                key: float(value)
+                for key, value in row.items()
+                if key in ("A", "k") and np.isfinite(value)
+            }
+            if values:
+                self._calibration[str(sample_id)] = values
+
+    @property
+    def dates(self) -> Dict[str, List[str]]:
+        """Sample ids of every date, in ``sample_ids`` order"""
+        if self._dates is None:
+            self._dates = {}
+            for sample_id in self.sample_ids:
+                date, _ = sample_id.split("_")
+                self._dates.setdefault(date, []).append(sample_id)
+        return self._dates
+
+    def reset_multi(self, num_assets: int) -> Dict[str, np.ndarray]:
+        """Sample ``num_assets`` warrants traded on the same date, aligned on
+        the union of their ``bar_interval`` bars.
+
+        Price columns are returned time-major with shape (n_ticks, num_assets)
+        like ``reset_batch``. A bar time without a bar for an asset repeats its
+        last close on every price column, a flat bar: only a bid at or above,
+        or an ask at or below, that close fills on it. The date
+        is drawn among the dates with at least ``num_assets`` warrants. A
+        pinned task is always the first asset, the others are drawn from its
+        date. ``asset_metadata`` holds ``sec_cd`` and ``sigma`` per asset and
+        the ``dt`` and ``total_time`` of the grid.
+        """
+        if self.task is not None:
+            date = self.task.split("_")[0]
+        else:
+            candidates = [date for date, ids in self.dates.items() if len(ids) >= num_assets]
+            if not candidates:
+                raise ValueError(f"No date with {num_assets} covered warrants")
+            date = candidates[self.rng.integers(len(candidates))]
+        if len(self.dates[date]) < num_assets:
+            raise ValueError(f"Only {len(self.dates[date])} covered warrants on {date}")
+        pinned = [] if self.task is None else [self.task]
+        others = [sample_id for sample_id in self.dates[date] if sample_id not in pinned]
+        drawn = self.rng.choice(len(others), num_assets - len(pinned), replace=False)
+        sample_ids = pinned + [others[i] for i in drawn]
+
+        samples = [self.get_sample(sample_id) for sample_id in sample_ids]
+        datetimes = [frame["datetime"].to_numpy() for frame, _ in samples]
+        grid = np.unique(np.concatenate(datetimes))
+        batch = {
+            col: np.empty((grid.shape[0], num_assets), dtype=np.float64)
+            for col in ["open", "high", "low", "close"]
+        }
+        for asset, ((frame, _), datetime) in enumerate(zip(samples, datetimes)):
+            # last bar at or before each time of the grid
+            row = np.searchsorted(datetime, grid, side="right") - 1
+            has_bar = row >= 0
+            row = np.maximum(row, 0)
+            has_bar &= datetime[row] == grid
+            close = frame["close"].to_numpy()
+            # before the first bar the price is its open
+            idle_price = np.where(np.arange(grid.shape[0]) < np.argmax(has_bar), frame["open"].iat[0], close[row])
+            for col in ["open", "high", "low", "close"]:
+                batch[col][:, asset] = np.where(has_bar, frame[col].to_numpy()[row], idle_price)
+        batch["datetime"] = grid
+
+        self.ohlcv_df = None
+        self._asset_metadata = {
+            "type": "covered_warrant",
+            "date": date,
+            "sec_cd": [metadata["sec_cd"] for _, metadata in samples],
+            "sample_id": sample_ids,
+            "bar_interval": self.bar_interval,
+            "dt": 1 / grid.shape[0],
+            "total_time": grid.shape[0],
+            "sigma": np.array([metadata["sigma"] for _, metadata in samples]),
+        }
+        return batch
+
+
+def convert_csv_to_store(csv_path, store_path) -> None:
+    """One-time conversion of a covered warrant tick csv into a columnar store"""
+    RandomCoveredWarrantLoader(csv_path, cache_size=0).save_store(store_path)
@@ -0,0 +1,145 @@
+from typing import Dict, Optional
+import pandas as pd
+import numpy as np
+
+from ..data_loader import BaseDataLoader
+
+# event encoding shared with LOBReplayEnv
+BID, ASK = 0, 1
+# CLEAR empties a level, with a size of 0
+ADD, CANCEL, TRADE, CLEAR = 0, 1, 2, 3
+
+
+class SyntheticLOBLoader(BaseDataLoader):
+    """Synthetic limit order book events for ``LOBReplayEnv``.
+
+    The mid price moves by one tick with probability ``move_prob`` per step,
+    the best bid and ask sit one tick below and above it. A step moving the
+    mid opens with a ``CLEAR`` of the level it moved through (the old best
+    ask on an up move, the old best bid on a down move), so the book never
+    crosses. Each step then has a Poisson number of events: limit orders
+    added or cancelled a geometric number of levels behind the touch, and
+    market orders trading at the touch. The book is seeded with
+    ``book_levels`` levels on each side.
+
+    ``reset`` returns a dict of per-tick ``datetime`` and ``close`` (mid price)
+    arrays, event arrays ``side``, ``kind``, ``tick`` (integer price level)
+    and ``size``, and ``step_offsets``: events ``[step_offsets[t - 1], step_offsets[t])``
+    happen between tick t - 1 and t, events before ``step_offsets[0]`` build
+    the initial book.
+
+    Args:
+        init_price (float): initial mid price
+        n_sample (int): number of ticks per episode
+        tick_size (float, optional): price increment. Defaults to 0.01.
+        events_per_step (float, optional): mean number of events per step. Defaults to 100.
+        move_prob (float, optional): probability of a one tick mid move per step. Defaults to 0.1.
+        event_probs (tuple, optional): probabilities of add, cancel and trade events. Defaults to (0.5, 0.35, 0.15).
+        max_size (int, optional): maximum size of an event. Defaults to 10.
+        book_levels (int, optional): levels per side of the initial book. Defaults to 10.
+        total_time (int, optional): episode horizon. Defaults to 1.
+        seed (int, optional): seed of the loader generator, see ``BaseDataLoader.seed``.
+    """
+
+    def __init__(
+        self,
+        init_price: float,
+        n_sample: int,
+        tick_size: float = 0.01,
+        events_per_step: float = 100,
+        move_prob: float = 0.1,
+        event_probs=(0.5, 0.35, 0.15),
+        max_size: int = 10,
+        book_levels: int = 10,
+        total_time: int = 1,
+        seed: Optional[int] = None,
+    ):
+        self.init_price = init_price
+        self.n_sample = n_sample
+        self.tick_size = tick_size
+        self.events_per_step = events_per_step
+        self.move_prob = move_prob
+        self.event_probs = np.asarray(event_probs, dtype=np.float64)
+        self.max_size = max_size
+        self.book_levels = book_levels
+        self.total_time = total_time
+        self.dt = total_time / n_sample
+
+        self._datetime = pd.to_datetime(np.arange(self.n_sample) + 1, unit="s").to_numpy()
+        self.seed(seed)
+
+    @property
+    def asset_metadata(self):
+        return {
+            "type": "synthetic_lob",
+            "n_sample": self.n_sample,
+            # volatility of the one tick mid moves
+            "sigma": self.tick_size * np.sqrt(self.move_prob / self.dt),
+            "total_time": self.total_time,
+            "tick_size": self.tick_size,
+            "dt": self.dt,
+        }
+
+    def reset(self) -> Dict[str, np.ndarray]:
+        rng = self.rng
+        n_steps = self.n_sample - 1
+
+        moves = rng.choice(
+            np.array([-1, 0, 1]),
+            size=n_steps,
+            p=[self.move_prob / 2, 1 - self.move_prob, self.move_prob / 2],
+        )
+        mid = np.empty(self.n_sample, dtype=np.int64)
+        mid[0] = round(self.init_price / self.tick_size)
+        np.cumsum(moves, out=mid[1:])
+        mid[1:] += mid[0]
+
+        # initial book, book_levels levels on each side of the first mid
+        distance = np.tile(np.arange(self.book_levels), 2)
+        init_side = np.repeat(np.array([BID, ASK]), self.book_levels)
+        init_events = {
+            "side": init_side,
+            "kind": np.full(init_side.shape, ADD),
+            "tick": np.where(init_side == BID, mid[0] - 1 - distance, mid[0] + 1 + distance),
+            "size": rng.integers(1, self.max_size + 1, init_side.shape) * self.book_levels,
+        }
+
+        counts = rng.poisson(self.events_per_step, n_steps)
+        step = np.repeat(np.arange(1, self.n_sample), counts)
+        n_events = step.shape[0]
+        side = rng.integers(0, 2, n_events)
+        kind = rng.choice(3, size=n_events, p=self.event_probs / self.event_probs.sum())
+        # market orders trade at the touch, limit orders rest behind it
+        distance = np.where(kind == TRADE, 0, rng.geometric(0.3, n_events) - 1)
+        events = {
+            "side": side,
+            "kind": kind,
+            "tick": np.where(side == BID, mid[step] - 1 - distance, mid[step] + 1 + distance),
+            "size": rng.integers(1, self.max_size + 1, n_events),
+        }
+
+        # the old touch level behind a moved mid is cleared before the step events
+        moved = np.flatnonzero(moves)
+        first_event = np.cumsum(counts) - counts
+        clear_events = {
+            "side": np.where(moves[moved] > 0, ASK, BID),
+            "kind": np.full(moved.shape, CLEAR),
+            "tick": mid[moved + 1],
+            "size": np.zeros(moved.shape, dtype=np.int64),
+        }
+        for col in events:
+            events[col] = np.insert(events[col], first_event[moved], clear_events[col])
+
+        step_offsets = np.empty(self.n_sample, dtype=np.int64)
+        step_offsets[0] = init_side.shape[0]
+        np.cumsum(counts + (moves != 0), out=step_offsets[1:])
+        step_offsets[1:] += step_offsets[0]
+
+        episode = {
+            "datetime": self._datetime,
+            "close": mid * self.tick_size,
+            "step_offsets": step_offsets,
+        }
+        for col, dtype in [("side", np.int8), ("kind", np.int8), ("tick", np.int64), ("size", np.int64)]:
+            episode[col] = np.concatenate([init_events[col], events[col]]).astype(dtype)
+        return episode
@@ -1,3 +1,7 @@
 from .avellaneda_stoikov_env import *
 from .lehalle_env import *
+from .batch_avellaneda_stoikov_env import *
+from .lob_replay_env import *
+from .multi_asset_lehalle_env import *
+from .history import *
 from gymnasium import register
\ No newline at end of file
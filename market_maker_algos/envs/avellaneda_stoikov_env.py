@@ -1,10 +1,12 @@
-from typing import Tuple, Type, Dict
+from typing import Tuple, Type, Dict, Optional
 import numpy as np
 from gymnasium import spaces
 import math
 
 from ..data_loader import BaseDataLoader
 from .market_maker_env import MarketMakerEnv
+from ..common.volatility import VolatilityEstimator
+from .history import NpzHistorySink
 
 
 class AvellanedaStoikovEnv(MarketMakerEnv):
@@ -24,6 +26,10 @@ class AvellanedaStoikovEnv(MarketMakerEnv):
         random_seed (int, optional): random seed. Defaults to None.
         bid_fee (float, optional): bid fee. Defaults to 0.03%.
         ask_fee (float, optional): ask fee. Defaults to 0.13%.
+        history_sink (NpzHistorySink, optional): stream the step records to disk. Defaults to None.
+        sigma_estimator (VolatilityEstimator, optional): online sigma of the observation, None uses the loader sigma.
+        reuse_observation (bool, optional): return one float32 buffer updated in place. Defaults to False.
+        record_info (bool, optional): build the step info and record the history. Defaults to True.
     """
 
     def __init__(
@@ -34,12 +40,20 @@ class AvellanedaStoikovEnv(MarketMakerEnv):
         risk_factor: float = 0.1,
         bid_fee: float = 0.0003,
         ask_fee: float = 0.0013,
+        history_sink: Optional[NpzHistorySink] = None,
+        sigma_estimator: Optional[VolatilityEstimator] = None,
+        reuse_observation: bool = False,
+        record_info: bool = True,
     ):
         super().__init__(
             data_loader=data_loader,
             init_cash=init_cash,
             bid_fee=bid_fee,
             ask_fee=ask_fee,
+            history_sink=history_sink,
+            sigma_estimator=sigma_estimator,
+            reuse_observation=reuse_observation,
+            record_info=record_info,
         )
 
         self.observation_space = spaces.Box(
@@ -75,13 +89,27 @@ class AvellanedaStoikovEnv(MarketMakerEnv):
                 self._current_tick,
                 self.market_metadata["risk_factor"],
                 self.market_metadata["k"],
-                self.asset_metadata["sigma"],
+                self.sigma,
                 self.asset_metadata["total_time"],
                 self.asset_metadata["dt"],
             ]
         ).astype(np.float32)
         return obs
 
+    def _fill_constant_observation(self, obs: np.ndarray) -> None:
+        obs[3] = self.risk_factor
+        obs[4] = self.k
+        obs[5] = self.sigma
+        obs[6] = self.asset_metadata["total_time"]
+        obs[7] = self.asset_metadata["dt"]
+
+    def _fill_observation(self, obs: np.ndarray) -> None:
+        obs[0] = self._current_price
+        obs[1] = self.quantity
+        obs[2] = self._current_tick
+        if self.sigma_estimator is not None:
+            obs[5] = self.sigma
+
     def _validate_action(self, action: np.ndarray) -> Tuple[int, float, int, float]:
         """Validate action and return valid action for current environment"""
         bid_quantity, bid_price, ask_quantity, ask_price = action
@@ -113,16 +141,12 @@ class AvellanedaStoikovEnv(MarketMakerEnv):
         prob_ask = 1 - math.exp(-lambda_ask * self.dt)
         prob_bid = 1 - math.exp(-lambda_bid * self.dt)
 
-        if np.random.random() < prob_ask:
+        if self.np_random.random() < prob_ask:
             matched_ask = ask_quantity
-        if np.random.random() < prob_bid:
+        if self.np_random.random() < prob_bid:
             matched_bid = bid_quantity
 
         return matched_bid, matched_ask
 
     def _calculate_reward(self) -> float:
-        try:
-            last_nav = self.history_info["nav"][-1]
-        except:
-            last_nav = self.init_cash
-        return self.nav - last_nav
+        return self.nav - self._last_nav
@@ -0,0 +1,118 @@
+from typing import Tuple, Type
+import numpy as np
+from gymnasium import spaces
+import math
+
+from ..data_loader import BaseDataLoader
+from .batch_market_maker_env import BatchMarketMakerEnv
+
+
+class BatchAvellanedaStoikovEnv(BatchMarketMakerEnv):
+    """Batched version of ``AvellanedaStoikovEnv``.
+    Simulates ``num_episodes`` independent price paths at once, observations
+    are stacked as (num_episodes, 8) and actions as (num_episodes, 4).
+    Matching mechanism is based on exponential distribution
+
+    Args:
+        data_loader (Type[BaseDataLoader]): data loader class
+        num_episodes (int): number of episodes simulated at once
+        init_cash (float, optional): initial cash. Defaults to 0.
+        k (float, optional): order book liquidity. Defaults to 1.5.
+        risk_factor (float, optional): risk aversion. Defaults to 0.1.
+        bid_fee (float, optional): bid fee. Defaults to 0.03%.
+        ask_fee (float, optional): ask fee. Defaults to 0.13%.
+    """
+
+    def __init__(
+        self,
+        data_loader: Type[BaseDataLoader],
+        num_episodes: int,
+        init_cash: float = 0,
+        k: float = 1.5,
+        risk_factor: float = 0.1,
+        bid_fee: float = 0.0003,
+        ask_fee: float = 0.0013,
+    ):
+        super().__init__(
+            data_loader=data_loader,
+            num_episodes=num_episodes,
+            init_cash=init_cash,
+            bid_fee=bid_fee,
+            ask_fee=ask_fee,
+        )
+
+        self.observation_space = spaces.Box(
+            low=0,
+            high=np.inf,
+            shape=(num_episodes, 8),
+            dtype=np.float32,
+        )
+        self.action_space = spaces.Box(
+            low=0,
+            high=np.inf,
+            shape=(num_episodes, 4),
+            dtype=np.float32,
+        )
+        self.k = k
+        self.risk_factor = risk_factor
+        self.dt = self.asset_metadata["dt"]
+        self.A = 1 / self.dt / math.exp(self.k * 1 / 4)
+
+    @property
+    def market_metadata(self):
+        return {
+            "A": self.A,
+            "k": self.k,
+            "risk_factor": self.risk_factor,
+        }
+
+    def _get_observation(self) -> np.ndarray:
+        obs = np.empty((self.num_episodes, 8), dtype=np.float32)
+        obs[:, 0] = self._current_price
+        obs[:, 1] = self.quantity
+        obs[:, 2] = self._current_tick
+        obs[:, 3] = self.market_metadata["risk_factor"]
+        obs[:, 4] = self.market_metadata["k"]
+        obs[:, 5] = self.asset_metadata["sigma"]
+        obs[:, 6] = self.asset_metadata["total_time"]
+        obs[:, 7] = self.asset_metadata["dt"]
+        return obs
+
+    def _validate_action(self, action: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """Validate action and return valid action for current environment"""
+        action = np.asarray(action, dtype=np.float64).reshape(self.num_episodes, 4)
+
+        bid_quantity = action[:, 0].astype(np.int64)
+        ask_quantity = action[:, 2].astype(np.int64)
+
+        bid_price = action[:, 1]
+        ask_price = action[:, 3]
+
+        return bid_quantity, bid_price, ask_quantity, ask_price
+
+    def _matching_order(
+        self,
+        bid_quantity: np.ndarray,
+        bid_price: np.ndarray,
+        ask_quantity: np.ndarray,
+        ask_price: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        delta_ask = ask_price - self._current_price
+        delta_bid = self._current_price - bid_price
+
+        # market intensities
+        lambda_ask = self.A * np.exp(-self.k * delta_ask)
+        lambda_bid = self.A * np.exp(-self.k * delta_bid)
+
+        # Order consumption (can be both per time step)
+        prob_ask = -np.expm1(-lambda_ask * self.dt)
+        prob_bid = -np.expm1(-lambda_bid * self.dt)
+
+        draws = self.np_random.random((2, self.num_episodes))
+        matched_ask = np.where(draws[0] < prob_ask, ask_quantity, 0)
+        matched_bid = np.where(draws[1] < prob_bid, bid_quantity, 0)
+
+        return matched_bid, matched_ask
+
+    def _calculate_reward(self) -> np.ndarray:
+        return self.nav - self._last_nav
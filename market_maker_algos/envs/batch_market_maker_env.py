@@ -0,0 +1,202 @@
+from abc import abstractmethod
+import numpy as np
+import gymnasium as gym
+from typing import Tuple, Type, Dict, Any
+import pandas as pd
+
+from ..data_loader import BaseDataLoader
+
+
+class BatchMarketMakerEnv(gym.Env):
+    """Market maker environment stepping ``num_episodes`` episodes in lockstep.
+
+    Prices, inventories, cash and NAV are kept as arrays with one entry per
+    episode, so matching, inventory updates and rewards of every episode are
+    resolved with vectorized operations in a single ``step`` call.
+
+    Args:
+        data_loader (Type[BaseDataLoader]): data loader class
+        num_episodes (int): number of episodes simulated at once
+        init_cash (float, optional): initial cash. Defaults to 2e4.
+        bid_fee (float, optional): bid fee. Defaults to 0.03%.
+        ask_fee (float, optional): ask fee. Defaults to 0.13%.
+    """
+
+    metadata = {"render.modes": ["human"]}
+    # name of the column identifying the batch entry in ``get_history_info``
+    batch_key = "episode"
+
+    def __init__(
+        self,
+        data_loader: Type[BaseDataLoader],
+        num_episodes: int,
+        init_cash: float = 2e4,
+        bid_fee: float = 0.0003,
+        ask_fee: float = 0.0013,
+    ):
+        self.num_episodes = num_episodes
+        self.init_cash = init_cash
+        self.bid_fee = bid_fee
+        self.ask_fee = ask_fee
+        self.data_loader = data_loader
+        self.asset_metadata = data_loader.asset_metadata
+
+        # update these variables in reset method
+        self.prices = None
+        self.quantity = None
+        self.cash = None
+        self._current_tick = None
+
+    @property
+    def _current_price(self) -> np.ndarray:
+        return self.prices["close"][self._current_tick]
+
+    @property
+    def nav(self) -> np.ndarray:
+        return self.cash + self.quantity * self._current_price
+
+    def update_info(self, info: Dict[str, np.ndarray]) -> None:
+        row = self._current_tick - 1
+        for key, value in info.items():
+            if key not in self.history_info:
+                value = np.asarray(value)
+                self.history_info[key] = np.zeros(
+                    (self._end_episode_tick, *value.shape), dtype=value.dtype
+                )
+            self.history_info[key][row] = value
+
+    def is_done(self) -> Tuple[np.ndarray, np.ndarray]:
+        # all episodes of a batch share the same horizon
+        terminated = np.full(
+            self.num_episodes, self._current_tick == self._end_episode_tick
+        )
+        truncated = np.zeros(self.num_episodes, dtype=bool)
+        return terminated, truncated
+
+    def get_history_info(self) -> pd.DataFrame:
+        """Return the history of every episode stacked in long format,
+        one row per (episode, step) keyed by the ``batch_key`` column.
+        """
+        n_steps = self._current_tick
+        history = {self.batch_key: np.repeat(np.arange(self.num_episodes), n_steps)}
+        for key, value in self.history_info.items():
+            value = value[:n_steps]
+            if value.ndim == 1:
+                history[key] = np.tile(value, self.num_episodes)
+            else:
+                history[key] = value.T.ravel()
+        return pd.DataFrame(history)
+
+    def update_inventory(
+        self,
+        bid_quantity: np.ndarray,
+        bid_price: np.ndarray,
+        ask_quantity: np.ndarray,
+        ask_price: np.ndarray,
+    ) -> None:
+        self.quantity += bid_quantity - ask_quantity
+        bid_cashflow = bid_quantity * bid_price * (1 + self.bid_fee)
+        ask_cashflow = ask_quantity * ask_price * (1 - self.ask_fee)
+        self.cash += ask_cashflow - bid_cashflow
+
+    def reset(self, seed=None, options=None) -> Tuple[np.ndarray, Dict]:
+        super().reset(seed=seed)
+        if seed is not None:
+            # independent stream for the loader, derived from the env seed
+            self.data_loader.seed(np.random.SeedSequence(seed).spawn(1)[0])
+
+        # reset data loader
+        self.prices = self._sample_prices()
+        assert self.prices["close"].shape[1] == self.num_episodes
+        self._end_episode_tick = self.prices["close"].shape[0] - 1
+        self.asset_metadata = self.data_loader.asset_metadata
+        self.dt = self.asset_metadata["dt"]
+
+        self.history_info = {}
+        if "datetime" in self.prices:
+            self.history_info["datetime"] = self.prices["datetime"][1:]
+        self.quantity = np.zeros(self.num_episodes, dtype=np.int64)
+        self.cash = np.full(self.num_episodes, self.init_cash, dtype=np.float64)
+        self._last_nav = self.cash.copy()
+        self._current_tick = 0
+        info = self.asset_metadata
+
+        return self._get_observation(), info
+
+    def step(self, action) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict]:
+        self._current_tick += 1
+
+        # validate action and modify if needed
+        (
+            bid_quantity,
+            bid_price,
+            ask_quantity,
+            ask_price,
+        ) = self._validate_action(action)
+
+        # matching order
+        matched_bid, matched_ask = self._matching_order(
+            bid_quantity=bid_quantity,
+            bid_price=bid_price,
+            ask_quantity=ask_quantity,
+            ask_price=ask_price,
+        )
+        # update inventory
+        self.update_inventory(
+            bid_quantity=matched_bid,
+            bid_price=bid_price,
+            ask_quantity=matched_ask,
+            ask_price=ask_price,
+        )
+
+        step_reward = self._calculate_reward()
+        nav = self.nav
+        self._last_nav = nav
+
+        # update info last
+        current_info = {
+            "quantity": self.quantity.copy(),
+            "cash": self.cash.copy(),
+            "bid_quantity": bid_quantity,
+            "bid_price": bid_price,
+            "ask_quantity": ask_quantity,
+            "ask_price": ask_price,
+            "matched_bid_quantity": matched_bid,
+            "matched_ask_quantity": matched_ask,
+            "close": self._current_price,
+            "step_reward": step_reward,
+            "nav": nav,
+            **self._get_extra_info(),
+        }
+        self.update_info(info=current_info)
+
+        return self._get_observation(), step_reward, *self.is_done(), current_info
+
+    def _sample_prices(self) -> Dict[str, np.ndarray]:
+        """Time-major price arrays of the batch, see ``BaseDataLoader.reset_batch``"""
+        return self.data_loader.reset_batch(self.num_episodes)
+
+    def _get_extra_info(self) -> Dict[str, Any]:
+        """Additional per-step fields recorded with the step info. Override in subclass"""
+        return {}
+
+    @abstractmethod
+    def _get_observation(self, *args, **kwargs) -> np.ndarray:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _calculate_reward(self, *args, **kwargs) -> np.ndarray:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _validate_action(self, *args, **kwargs) -> Tuple[np.ndarray, ...]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _matching_order(self, *args, **kwargs) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized matching order mechanism. Need to be implemented in subclass
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: matched bid and ask quantities per episode
+        """
+        raise NotImplementedError
@@ -0,0 +1,259 @@
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional
+import numpy as np
+import pandas as pd
+
+EPISODE_METADATA_FILE = "metadata.json"
+
+
+class EpisodeHistory:
+    """Episode history backed by preallocated typed NumPy columns.
+
+    Columns are created on first use with the dtype of the first recorded
+    value and sized to ``capacity`` rows, so recording a step is a plain
+    array write instead of growing Python lists. A later value of another
+    type promotes its column, e.g. an int column to float, and strings are
+    stored in object columns, so no value is truncated. Capacity is doubled
+    if an episode runs longer than expected.
+
+    Args:
+        capacity (int): expected number of rows, usually the number of steps of the episode
+    """
+
+    __slots__ = ("capacity", "columns", "size", "_types")
+
+    def __init__(self, capacity: int):
+        self.capacity = max(int(capacity), 1)
+        self.columns: Dict[str, np.ndarray] = {}
+        self.size = 0
+        # value types each column already holds without promotion
+        self._types: Dict[str, set] = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.columns
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        return self.columns[key][: self.size]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.columns)
+
+    def keys(self):
+        return self.columns.keys()
+
+    @staticmethod
+    def _value_dtype(value: Any) -> np.dtype:
+        dtype = np.asarray(value).dtype
+        # strings vary in length, a fixed width column would truncate them
+        return np.dtype(object) if dtype.kind in "US" else dtype
+
+    def _new_column(self, dtype: np.dtype) -> np.ndarray:
+        if dtype.kind == "f":
+            return np.full(self.capacity, np.nan, dtype=dtype)
+        if dtype.kind == "M":
+            return np.full(self.capacity, np.datetime64("NaT"), dtype=dtype)
+        return np.zeros(self.capacity, dtype=dtype)
+
+    def _grow(self) -> None:
+        self.capacity *= 2
+        for key, column in self.columns.items():
+            grown = self._new_column(column.dtype)
+            grown[: self.size] = column[: self.size]
+            self.columns[key] = grown
+
+    def _promote(self, key: str, value: Any) -> np.ndarray:
+        """Column ``key``, replaced by a wider copy if it cannot hold ``value``"""
+        column = self.columns[key]
+        try:
+            dtype = np.result_type(column.dtype, self._value_dtype(value))
+        except TypeError:
+            dtype = np.dtype(object)
+        if dtype != column.dtype:
+            promoted = self._new_column(dtype)
+            promoted[: self.size] = column[: self.size]
+            column = self.columns[key] = promoted
+        self._types[key].add(type(value))
+        return column
+
+    def _write(self, row: int, info: Dict[str, Any]) -> None:
+        columns, types = self.columns, self._types
+        for key, value in info.items():
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = self._new_column(self._value_dtype(value))
+                types[key] = {type(value)}
+            elif type(value) not in types[key]:
+                column = self._promote(key, value)
+            column[row] = value
+
+    def append(self, info: Dict[str, Any]) -> None:
+        """Record ``info`` as a new row"""
+        if self.size == self.capacity:
+            self._grow()
+        self._write(self.size, info)
+        self.size += 1
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return the recorded rows as a DataFrame"""
+        return pd.DataFrame(
+            {key: column[: self.size] for key, column in self.columns.items()},
+            copy=False,
+        )
+
+
+def _episode_dir(directory: str, episode: int) -> str:
+    return os.path.join(directory, f"episode_{episode:06d}")
+
+
+class NpzHistorySink:
+    """Stream step records of ``MarketMakerEnv`` to disk in fixed-size chunks.
+
+    Rows are buffered in an ``EpisodeHistory`` of ``chunk_size`` rows, a full
+    buffer is written to ``<directory>/episode_<id>/chunk_<n>.npz`` before the
+    next row, so memory stays bounded whatever the episode length. Each
+    episode directory also holds a ``metadata.json`` with the asset metadata
+    and row count. Episode ids continue after the largest one already in
+    ``directory``, and each episode directory is created exclusively, so
+    sinks sharing a directory never write to the same episode. Read the
+    results back with ``HistoryStore``.
+
+    Args:
+        directory (str): output directory
+        chunk_size (int, optional): rows per chunk file. Defaults to 10000.
+    """
+
+    def __init__(self, directory: str, chunk_size: int = 10000):
+        self.directory = directory
+        self.chunk_size = int(chunk_size)
+        os.makedirs(directory, exist_ok=True)
+        self.episode = None
+        self._next_episode = max(HistoryStore(directory).episodes, default=-1) + 1
+        self._buffer = None
+        self._metadata = None
+        self._n_chunks = 0
+        self._n_rows = 0
+
+    def start_episode(self, metadata: Optional[Dict[str, Any]] = None) -> int:
+        """Close the current episode and open a new one, return its id"""
+        self.end_episode()
+        episode = self._next_episode
+        while True:
+            # mkdir is atomic, an id taken by another sink raises and is skipped
+            try:
+                os.mkdir(_episode_dir(self.directory, episode))
+                break
+            except FileExistsError:
+                episode += 1
+        self.episode = episode
+        self._next_episode = episode + 1
+        self._buffer = EpisodeHistory(capacity=self.chunk_size)
+        self._metadata = dict(metadata or {})
+        self._n_chunks = 0
+        self._n_rows = 0
+        return self.episode
+
+    def append(self, info: Dict[str, Any]) -> None:
+        if len(self._buffer) == self.chunk_size:
+            self.flush()
+        self._buffer.append(info)
+
+    def flush(self) -> None:
+        """Write the buffered rows of the current episode as a new chunk"""
+        buffer = self._buffer
+        if buffer is None or len(buffer) == 0:
+            return
+        arrays = {}
+        for key in buffer:
+            values = buffer[key]
+            # object arrays would need pickling
+            arrays[key] = values.astype(str) if values.dtype == object else values
+        path = os.path.join(
+            _episode_dir(self.directory, self.episode), f"chunk_{self._n_chunks:06d}.npz"
+        )
+        np.savez(path, **arrays)
+        self._n_chunks += 1
+        self._n_rows += len(buffer)
+        self._buffer = EpisodeHistory(capacity=self.chunk_size)
+
+    def end_episode(self) -> None:
+        if self.episode is None:
+            return
+        self.flush()
+        metadata = {
+            "episode": self.episode,
+            "n_rows": self._n_rows,
+            "n_chunks": self._n_chunks,
+            "asset_metadata": self._metadata,
+        }
+        path = os.path.join(_episode_dir(self.directory, self.episode), EPISODE_METADATA_FILE)
+        with open(path, "w") as f:
+            json.dump(metadata, f, default=str)
+        self.episode = None
+        self._buffer = None
+
+    def close(self) -> None:
+        self.end_episode()
+
+
+class HistoryStore:
+    """Lazy reader of the episodes written by ``NpzHistorySink``.
+    Nothing is loaded until an episode, or one of its chunks, is read.
+
+    Args:
+        directory (str): directory of the sink
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @property
+    def episodes(self) -> List[int]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            int(name[len("episode_"):])
+            for name in os.listdir(self.directory)
+            if name.startswith("episode_")
+        )
+
+    def __len__(self) -> int:
+        return len(self.episodes)
+
+    def metadata(self, episode: int) -> Dict[str, Any]:
+        """Metadata of a finished episode"""
+        path = os.path.join(_episode_dir(self.directory, episode), EPISODE_METADATA_FILE)
+        with open(path) as f:
+            return json.load(f)
+
+    def _chunk_paths(self, episode: int) -> List[str]:
+        episode_dir = _episode_dir(self.directory, episode)
+        return [
+            os.path.join(episode_dir, name)
+            for name in sorted(os.listdir(episode_dir))
+            if name.startswith("chunk_") and name.endswith(".npz")
+        ]
+
+    def iter_chunks(self, episode: int, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """Yield the chunks of ``episode`` one at a time"""
+        for path in self._chunk_paths(episode):
+            with np.load(path, allow_pickle=False) as chunk:
+                keys = chunk.files if columns is None else columns
+                frame = pd.DataFrame({key: chunk[key] for key in keys}, copy=False)
+            frame.insert(0, "episode", episode)
+            yield frame
+
+    def read_episode(self, episode: int, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """All rows of ``episode``, optionally restricted to ``columns``"""
+        chunks = list(self.iter_chunks(episode, columns))
+        if not chunks:
+            # no row written yet, same leading column as the chunks
+            return pd.DataFrame(columns=["episode", *(columns or [])])
+        return pd.concat(chunks, ignore_index=True)
+
+    def iter_episodes(self, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        for episode in self.episodes:
+            yield self.read_episode(episode, columns)
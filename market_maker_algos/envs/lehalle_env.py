@@ -1,11 +1,12 @@
-from typing import Tuple, Type, Dict
+from typing import Tuple, Type, Dict, Optional
 import numpy as np
 from gymnasium import spaces
 import math
 
 from ..data_loader import BaseDataLoader
 from .market_maker_env import MarketMakerEnv
-from ..common import check_col
+from ..common.volatility import VolatilityEstimator
+from .history import NpzHistorySink
 
 class LehalleEnv(MarketMakerEnv):
     """Environment for Lehalle expiriment.
@@ -18,8 +19,14 @@ class LehalleEnv(MarketMakerEnv):
         random_seed (int, optional): random seed. Defaults to None.
         bid_fee (float, optional): bid fee. Defaults to 0.03%.
         ask_fee (float, optional): ask fee. Defaults to 0.13%.
+        history_sink (NpzHistorySink, optional): stream the step records to disk. Defaults to None.
+        sigma_estimator (VolatilityEstimator, optional): online sigma of the observation, None uses the loader sigma.
+        reuse_observation (bool, optional): return one float32 buffer updated in place. Defaults to False.
+        record_info (bool, optional): build the step info and record the history. Defaults to True.
     """
 
+    required_columns = ["open", "high", "low", "close"]
+
     def __init__(
         self,
         data_loader: Type[BaseDataLoader],
@@ -28,12 +35,20 @@ class LehalleEnv(MarketMakerEnv):
         risk_factor: float = 0.1,
         bid_fee: float = 0.0003,
         ask_fee: float = 0.0013,
+        history_sink: Optional[NpzHistorySink] = None,
+        sigma_estimator: Optional[VolatilityEstimator] = None,
+        reuse_observation: bool = False,
+        record_info: bool = True,
     ):
         super().__init__(
             data_loader=data_loader,
             init_cash=init_cash,
             bid_fee=bid_fee,
             ask_fee=ask_fee,
+            history_sink=history_sink,
+            sigma_estimator=sigma_estimator,
+            reuse_observation=reuse_observation,
+            record_info=record_info,
         )
 
         self.observation_space = spaces.Box(
@@ -48,12 +63,6 @@ class LehalleEnv(MarketMakerEnv):
             shape=(4,),
             dtype=np.float32,
         )
-        # reset to get sample ohlcdv_df
-        self.data_loader.reset()
-        self.asset_metadata = self.data_loader.asset_metadata
-        self.dt = self.asset_metadata["dt"]
-        check_col(self.data_loader.ohlcv_df, "open high low close".split())
-        
         self.k = k
         self.risk_factor = risk_factor
         # self.A = 1 / self.dt / math.exp(self.k * 1 / 4)
@@ -67,11 +76,8 @@ class LehalleEnv(MarketMakerEnv):
         }
 
     def _get_observation(self) -> np.ndarray:
-        typical_price = (
-            self.ohlcv_df.iloc[self._current_tick].close
-            + self.ohlcv_df.iloc[self._current_tick].low
-            + self.ohlcv_df.iloc[self._current_tick].high
-        ) / 3
+        tick = self._current_tick
+        typical_price = (self._close[tick] + self._low[tick] + self._high[tick]) / 3
         obs = np.asarray(
             [
                 typical_price,
@@ -79,13 +85,28 @@ class LehalleEnv(MarketMakerEnv):
                 self._current_tick,
                 self.market_metadata["risk_factor"],
                 self.market_metadata["k"],
-                self.asset_metadata["sigma"],
+                self.sigma,
                 self.asset_metadata["total_time"],
                 self.asset_metadata["dt"],
             ]
         ).astype(np.float32)
         return obs
 
+    def _fill_constant_observation(self, obs: np.ndarray) -> None:
+        obs[3] = self.risk_factor
+        obs[4] = self.k
+        obs[5] = self.sigma
+        obs[6] = self.asset_metadata["total_time"]
+        obs[7] = self.asset_metadata["dt"]
+
+    def _fill_observation(self, obs: np.ndarray) -> None:
+        tick = self._current_tick
+        obs[0] = (self._close[tick] + self._low[tick] + self._high[tick]) / 3
+        obs[1] = self.quantity
+        obs[2] = self._current_tick
+        if self.sigma_estimator is not None:
+            obs[5] = self.sigma
+
     def _validate_action(self, action: np.ndarray) -> Tuple[int, float, int, float]:
         """Validate action and return valid action for current environment"""
         bid_quantity, bid_price, ask_quantity, ask_price = action
@@ -105,8 +126,8 @@ class LehalleEnv(MarketMakerEnv):
         ask_quantity: int,
         ask_price: float,
     ) -> Tuple[int, int]:
-        high = self.ohlcv_df.iloc[self._current_tick].high
-        low = self.ohlcv_df.iloc[self._current_tick].low
+        high = self._high[self._current_tick]
+        low = self._low[self._current_tick]
         
         matched_ask, matched_bid = 0, 0
         if ask_price <= high:
@@ -117,18 +138,11 @@ class LehalleEnv(MarketMakerEnv):
         return matched_bid, matched_ask
 
     def _calculate_reward(self) -> float:
-        try:
-            last_nav = self.history_info["nav"][-1]
-        except:
-            last_nav = self.init_cash
-        return self.nav - last_nav
-    
-    def step(self, action) -> Tuple[np.ndarray, float, bool, bool, Dict]:
-        out = super().step(action)
-        added_info = {
-            'open': self.ohlcv_df.iloc[self._current_tick].open,
-            'high': self.ohlcv_df.iloc[self._current_tick].high,
-            'low': self.ohlcv_df.iloc[self._current_tick].low,
+        return self.nav - self._last_nav
+
+    def _get_extra_info(self) -> Dict[str, float]:
+        return {
+            'open': self._open[self._current_tick],
+            'high': self._high[self._current_tick],
+            'low': self._low[self._current_tick],
         }
-        self.update_info(info=added_info)
-        return out
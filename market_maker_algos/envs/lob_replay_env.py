@@ -0,0 +1,277 @@
+from typing import Dict, Optional, Tuple, Type, Union
+import math
+import numpy as np
+import pandas as pd
+from gymnasium import spaces
+
+from ..data_loader import BaseDataLoader
+from ..data_loader.synthetic_lob import ADD, ASK, BID, CLEAR, TRADE
+from ..common.volatility import VolatilityEstimator
+from .history import NpzHistorySink
+from .market_maker_env import MarketMakerEnv
+
+EVENT_COLUMNS = ["side", "kind", "tick", "size"]
+
+
+class LOBReplayEnv(MarketMakerEnv):
+    """Environment replaying limit order book events with queue priority.
+
+    The book is kept as a (2, n_levels) array of resting size per side and
+    integer price level, updated in bulk with the events of each step. Our
+    bid and ask rest at a level behind the size already queued there:
+
+    - market orders trading at our level consume the queue ahead of us
+      first, the excess fills our order,
+    - cancellations at our level are assumed to come from behind us unless
+      the level shrinks below our queue position,
+    - a market order trading through our level, or the mid moving through
+      it (a ``CLEAR`` of our level or one in front of it), fills our whole order,
+    - an order keeps its queue position across steps while its price is
+      unchanged and its quantity is not increased,
+    - a quote crossing the opposite best level is filled at once.
+
+    Fills of a step are computed with cumulative sums over the events at
+    our two levels, so a step costs a few vectorized passes over its events.
+    Our orders do not impact the replayed book. Events come from a loader
+    such as ``SyntheticLOBLoader``, see its docstring for the format.
+
+    Args:
+        data_loader (Type[BaseDataLoader]): data loader class
+        init_cash (float, optional): initial cash. Defaults to 0.
+        bid_fee (float, optional): bid fee. Defaults to 0.03%.
+        ask_fee (float, optional): ask fee. Defaults to 0.13%.
+        history_sink (NpzHistorySink, optional): stream the step records to disk. Defaults to None.
+        sigma_estimator (VolatilityEstimator, optional): online sigma of the observation, None uses the loader sigma.
+        reuse_observation (bool, optional): return one float32 buffer updated in place. Defaults to False.
+        record_info (bool, optional): build the step info and record the history. Defaults to True.
+    """
+
+    required_columns = ["close", "step_offsets", *EVENT_COLUMNS]
+
+    def __init__(
+        self,
+        data_loader: Type[BaseDataLoader],
+        init_cash: float = 0,
+        k: float = 1.5,
+        risk_factor: float = 0.1,
+        bid_fee: float = 0.0003,
+        ask_fee: float = 0.0013,
+        history_sink: Optional[NpzHistorySink] = None,
+        sigma_estimator: Optional[VolatilityEstimator] = None,
+        reuse_observation: bool = False,
+        record_info: bool = True,
+    ):
+        super().__init__(
+            data_loader=data_loader,
+            init_cash=init_cash,
+            bid_fee=bid_fee,
+            ask_fee=ask_fee,
+            history_sink=history_sink,
+            sigma_estimator=sigma_estimator,
+            reuse_observation=reuse_observation,
+            record_info=record_info,
+        )
+
+        self.observation_space = spaces.Box(
+            low=0,
+            high=np.inf,
+            shape=(8,),
+            dtype=np.float32,
+        )
+        self.action_space = spaces.Box(
+            low=0,
+            high=np.inf,
+            shape=(4,),
+            dtype=np.float32,
+        )
+        self.k = k
+        self.risk_factor = risk_factor
+
+        # update these variables in reset method
+        self._events = None
+        self._step_offsets = None
+        self._has_clear = None
+        self._book = None
+        self._base_tick = 0
+        # resting orders per side, indexed by BID and ASK
+        self._order_tick = [None, None]
+        self._order_quantity = [0, 0]
+        self._queue_ahead = [0, 0]
+
+    @property
+    def market_metadata(self):
+        return {
+            "k": self.k,
+            "risk_factor": self.risk_factor,
+        }
+
+    def _cache_price_columns(self, episode: Union[pd.DataFrame, Dict[str, np.ndarray]]) -> None:
+        super()._cache_price_columns(episode)
+        self._events = {col: np.ascontiguousarray(episode[col]) for col in EVENT_COLUMNS}
+        self._step_offsets = np.asarray(episode["step_offsets"], dtype=np.int64)
+        # steps holding a CLEAR, the others skip the clear handling
+        self._has_clear = np.zeros(self._step_offsets.shape[0], dtype=bool)
+        clear_index = np.flatnonzero(self._events["kind"] == CLEAR)
+        self._has_clear[np.searchsorted(self._step_offsets, clear_index, side="right")] = True
+
+        tick = self._events["tick"]
+        self._base_tick = int(tick.min())
+        self._book = np.zeros((2, int(tick.max()) - self._base_tick + 1), dtype=np.int64)
+        self._apply_events(0, int(self._step_offsets[0]), bool(self._has_clear[0]))
+        self._order_tick = [None, None]
+        self._order_quantity = [0, 0]
+        self._queue_ahead = [0, 0]
+
+    def _apply_events(self, start: int, stop: int, has_clear: bool = False) -> None:
+        events = self._events
+        kind = events["kind"][start:stop]
+        side = events["side"][start:stop]
+        level = events["tick"][start:stop] - self._base_tick
+        if has_clear:
+            # clears open the step, before any other event
+            clear = kind == CLEAR
+            self._book[side[clear], level[clear]] = 0
+        size = events["size"][start:stop]
+        delta = np.where(kind == ADD, size, -size)
+        np.add.at(self._book, (side, level), delta)
+        np.maximum(self._book, 0, out=self._book)
+
+    def _depth(self, side: int, tick: int) -> int:
+        level = tick - self._base_tick
+        if 0 <= level < self._book.shape[1]:
+            return int(self._book[side, level])
+        return 0
+
+    def _best_tick(self, side: int) -> Optional[int]:
+        levels = np.flatnonzero(self._book[side])
+        if levels.shape[0] == 0:
+            return None
+        return self._base_tick + int(levels[-1] if side == BID else levels[0])
+
+    def _get_observation(self) -> np.ndarray:
+        obs = np.asarray(
+            [
+                self._current_price,
+                self.quantity,
+                self._current_tick,
+                self.market_metadata["risk_factor"],
+                self.market_metadata["k"],
+                self.sigma,
+                self.asset_metadata["total_time"],
+                self.asset_metadata["dt"],
+            ]
+        ).astype(np.float32)
+        return obs
+
+    def _fill_constant_observation(self, obs: np.ndarray) -> None:
+        obs[3] = self.risk_factor
+        obs[4] = self.k
+        obs[5] = self.sigma
+        obs[6] = self.asset_metadata["total_time"]
+        obs[7] = self.asset_metadata["dt"]
+
+    def _fill_observation(self, obs: np.ndarray) -> None:
+        obs[0] = self._current_price
+        obs[1] = self.quantity
+        obs[2] = self._current_tick
+        if self.sigma_estimator is not None:
+            obs[5] = self.sigma
+
+    def _validate_action(self, action: np.ndarray) -> Tuple[int, float, int, float]:
+        """Validate action and return valid action for current environment"""
+        bid_quantity, bid_price, ask_quantity, ask_price = action
+
+        bid_quantity = int(bid_quantity)
+        ask_quantity = int(ask_quantity)
+
+        bid_price = float(bid_price)
+        ask_price = float(ask_price)
+
+        return bid_quantity, bid_price, ask_quantity, ask_price
+
+    def _match_side(
+        self,
+        side: int,
+        tick: int,
+        quantity: int,
+        events: Dict[str, np.ndarray],
+        has_clear: bool = False,
+    ) -> int:
+        """Place our order of ``side`` at ``tick`` and return its filled quantity over ``events``"""
+        if quantity <= 0:
+            self._order_tick[side], self._order_quantity[side] = None, 0
+            return 0
+        opposite_best = self._best_tick(1 - side)
+        if opposite_best is not None and (tick >= opposite_best if side == BID else tick <= opposite_best):
+            self._order_tick[side], self._order_quantity[side] = None, 0
+            return quantity
+
+        if tick != self._order_tick[side] or quantity > self._order_quantity[side]:
+            # new or enlarged order, joins the back of the queue
+            self._queue_ahead[side] = self._depth(side, tick)
+        self._order_tick[side], self._order_quantity[side] = tick, quantity
+
+        on_side = events["side"] == side
+        trade_ticks = events["tick"][on_side & (events["kind"] == TRADE)]
+        through = trade_ticks < tick if side == BID else trade_ticks > tick
+        if has_clear and not through.any():
+            clear_ticks = events["tick"][on_side & (events["kind"] == CLEAR)]
+            through = clear_ticks <= tick if side == BID else clear_ticks >= tick
+        if through.any():
+            self._order_tick[side], self._order_quantity[side] = None, 0
+            return quantity
+
+        at_level = on_side & (events["tick"] == tick)
+        if not at_level.any():
+            return 0
+        kind = events["kind"][at_level]
+        size = events["size"][at_level]
+        cum_traded = np.cumsum(np.where(kind == TRADE, size, 0))
+        depth = np.maximum(self._depth(side, tick) + np.cumsum(np.where(kind == ADD, size, -size)), 0)
+        # queue ahead after each event: min(ahead - traded, depth) unrolled
+        ahead = np.minimum(self._queue_ahead[side], np.minimum.accumulate(depth + cum_traded)) - cum_traded
+
+        reached = np.flatnonzero(ahead <= 0)
+        if reached.shape[0] == 0:
+            self._queue_ahead[side] = int(ahead[-1])
+            return 0
+        first = reached[0]
+        # excess of the trade reaching us plus every later trade at our level
+        filled = min(quantity, int(cum_traded[-1] - cum_traded[first] - ahead[first]))
+        self._queue_ahead[side] = 0
+        self._order_quantity[side] = quantity - filled
+        if self._order_quantity[side] == 0:
+            self._order_tick[side] = None
+        return filled
+
+    def _matching_order(
+        self,
+        bid_quantity: int,
+        bid_price: float,
+        ask_quantity: int,
+        ask_price: float,
+    ) -> Tuple[int, int]:
+        tick_size = self.asset_metadata["tick_size"]
+        start = int(self._step_offsets[self._current_tick - 1])
+        stop = int(self._step_offsets[self._current_tick])
+        events = {col: values[start:stop] for col, values in self._events.items()}
+
+        # quotes rounded to the passive side of the tick grid
+        bid_tick = math.floor(bid_price / tick_size + 1e-9)
+        ask_tick = math.ceil(ask_price / tick_size - 1e-9)
+        has_clear = bool(self._has_clear[self._current_tick])
+        matched_bid = self._match_side(BID, bid_tick, bid_quantity, events, has_clear)
+        matched_ask = self._match_side(ASK, ask_tick, ask_quantity, events, has_clear)
+
+        self._apply_events(start, stop, has_clear)
+        return matched_bid, matched_ask
+
+    def _calculate_reward(self) -> float:
+        return self.nav - self._last_nav
+
+    def _get_extra_info(self) -> Dict[str, int]:
+        # no resting order, nothing queued ahead of it
+        return {
+            "bid_queue_ahead": self._queue_ahead[BID] if self._order_tick[BID] is not None else 0,
+            "ask_queue_ahead": self._queue_ahead[ASK] if self._order_tick[ASK] is not None else 0,
+        }
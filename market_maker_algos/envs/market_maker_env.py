@@ -1,14 +1,20 @@
 from abc import abstractmethod
 import numpy as np
 import gymnasium as gym
-from typing import Tuple, Type, Dict, Any
+from typing import Tuple, Type, Dict, Any, Optional, Union
 import pandas as pd
 
 from ..data_loader import BaseDataLoader
+from ..common import check_col
+from ..common.profiling import PhaseTimer
+from ..common.volatility import VolatilityEstimator
+from .history import EpisodeHistory, HistoryStore, NpzHistorySink
 
 
 class MarketMakerEnv(gym.Env):
     metadata = {"render.modes": ["human"]}
+    # price columns the data loader must provide, checked at every reset
+    required_columns = ["close"]
 
     def __init__(
         self,
@@ -16,37 +22,61 @@ class MarketMakerEnv(gym.Env):
         init_cash: float = 2e4,
         bid_fee: float = 0.0003,
         ask_fee: float = 0.0013,
+        history_sink: Optional[NpzHistorySink] = None,
+        sigma_estimator: Optional[VolatilityEstimator] = None,
+        reuse_observation: bool = False,
+        record_info: bool = True,
     ):
+        if history_sink is not None and not record_info:
+            raise ValueError("A history sink needs the step info, set record_info=True")
         self.init_cash = init_cash
         self.bid_fee = bid_fee
         self.ask_fee = ask_fee
         self.data_loader = data_loader
         self.asset_metadata = data_loader.asset_metadata
+        # streams step records to disk instead of keeping the episode in memory
+        self.history_sink = history_sink
+        self._history_episode = None
+        # online volatility fed to the observation instead of the loader sigma
+        self.sigma_estimator = sigma_estimator
+        self.sigma = self.asset_metadata.get("sigma")
+        # write observations in place into one float32 buffer, returned by every
+        # step and reset, instead of allocating a new array per tick
+        self.reuse_observation = reuse_observation
+        self._observation_buffer = None
+        # build the per-step info dict and record the history, off for tight RL loops
+        self.record_info = record_info
 
         # update these variables in reset method
         self.ohlcv_df = None
+        self._open = None
+        self._high = None
+        self._low = None
+        self._close = None
+        self._datetime = None
         self.quantity = None
         self.cash = None
         self._current_tick = None
+        # PhaseTimer collecting step phase timings, None disables profiling
+        self.profiler = None
+        # A and k of the constructor or the user, and the calibrated values
+        # a reset wrote over them for the current episode
+        self._default_params = {}
+        self._calibrated_params = {}
 
     @property
     def _current_price(self) -> float:
-        return self.ohlcv_df.iloc[self._current_tick].close
+        return self._close[self._current_tick]
 
     @property
     def nav(self) -> float:
         return self.cash + self.quantity * self._current_price
 
     def update_info(self, info: dict) -> None:
-        if not self.history_info:
-            self.history_info = {key: [] for key in info.keys()}
-
-        for key, value in info.items():
-            if key in self.history_info:
-                self.history_info[key].append(value)
-            else:
-                self.history_info[key] = [value]
-                
+        if self.history_sink is not None:
+            self.history_sink.append(info)
+        else:
+            self.history_info.append(info)
 
     def is_done(self) -> Tuple[bool, bool]:
         truncated = False
@@ -54,8 +84,51 @@ class MarketMakerEnv(gym.Env):
         # gymnaisum interface
         return terminated, truncated
 
-    def get_history_info(self):
-        return pd.DataFrame(self.history_info)
+    def get_history_info(self) -> pd.DataFrame:
+        if self.history_sink is not None:
+            # read the current episode back from disk
+            if self.history_sink.episode == self._history_episode:
+                self.history_sink.flush()
+            history = HistoryStore(self.history_sink.directory).read_episode(self._history_episode)
+            return history.drop(columns="episode")
+        return self.history_info.to_frame()
+
+    def _user_params(self) -> Dict[str, Any]:
+        """A and k set by the constructor or assigned by the user, without the
+        calibration of the current episode
+        """
+        params = {}
+        for param in ("A", "k"):
+            if not hasattr(self, param):
+                continue
+            value = getattr(self, param)
+            # identity, a value the user assigns is a new object even if equal
+            if param in self._calibrated_params and value is self._calibrated_params[param]:
+                value = self._default_params[param]
+            params[param] = value
+        return params
+
+    def enable_profiling(self) -> PhaseTimer:
+        """Start timing the step phases and loader resets, see ``profile_env``"""
+        if self.profiler is None:
+            self.profiler = PhaseTimer()
+        return self.profiler
+
+    def disable_profiling(self) -> Optional[PhaseTimer]:
+        profiler, self.profiler = self.profiler, None
+        return profiler
+
+    def _cache_price_columns(self, episode: Union[pd.DataFrame, Dict[str, np.ndarray]]) -> None:
+        """Extract price columns of the episode into contiguous arrays once,
+        so per-tick reads do not materialize a DataFrame row.
+        Columns missing from the episode are left as None.
+        """
+        for col in ["open", "high", "low", "close"]:
+            value = None
+            if col in episode:
+                value = np.ascontiguousarray(np.asarray(episode[col], dtype=np.float64))
+            setattr(self, f"_{col}", value)
+        self._datetime = np.asarray(episode["datetime"]) if "datetime" in episode else None
 
     def update_inventory(
         self, bid_quantity: int, bid_price: float, ask_quantity: int, ask_price: float
@@ -67,24 +140,61 @@ class MarketMakerEnv(gym.Env):
 
     def reset(self, seed=None, options=None) -> Tuple[np.ndarray, Dict]:
         super().reset(seed=seed)
+        if seed is not None:
+            # independent stream for the loader, derived from the env seed
+            self.data_loader.seed(np.random.SeedSequence(seed).spawn(1)[0])
         
         # reset data loader
-        self.ohlcv_df = self.data_loader.reset()
-        assert isinstance(self.ohlcv_df, pd.DataFrame)
-        self._end_episode_tick = self.ohlcv_df.shape[0] - 1
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start()
+        episode = self.data_loader.reset()
+        if profiler is not None:
+            profiler.lap("loader_reset")
+        if isinstance(episode, pd.DataFrame):
+            self.ohlcv_df = episode
+            check_col(self.ohlcv_df, self.required_columns)
+        else:
+            # loaders may skip the DataFrame and return a dict of column arrays
+            self.ohlcv_df = None
+            missing = set(self.required_columns).difference(episode)
+            assert not missing, f"{' , '.join(missing)} are missing in the episode"
+        self._cache_price_columns(episode)
+        self._end_episode_tick = self._close.shape[0] - 1
         self.asset_metadata = self.data_loader.asset_metadata
         self.dt = self.asset_metadata["dt"]
+        # calibrated parameters of the sample override the env defaults for
+        # this episode only, an uncalibrated sample never inherits the previous one
+        self._default_params = self._user_params()
+        self._calibrated_params = {}
+        for param, value in self._default_params.items():
+            if param in self.asset_metadata:
+                value = self._calibrated_params[param] = self.asset_metadata[param]
+            setattr(self, param, value)
+        self.sigma = self.asset_metadata["sigma"]
+        if self.sigma_estimator is not None:
+            if self.sigma_estimator.requires_high_low and (self._high is None or self._low is None):
+                raise ValueError(f"{type(self.sigma_estimator).__name__} needs high and low prices")
+            self.sigma = self.sigma_estimator.reset(self._close[0], self.dt, self.sigma)
         
-        self.history_info = {}
+        if self.history_sink is not None:
+            self.history_info = None
+            self._history_episode = self.history_sink.start_episode(self.asset_metadata)
+        else:
+            self.history_info = EpisodeHistory(capacity=self._end_episode_tick)
         self.quantity = 0
         self.cash = self.init_cash
+        self._last_nav = self.init_cash
         self._current_tick = 0
         info = self.asset_metadata
 
-        return self._get_observation(), info
+        return self._observation(reset=True), info
 
     def step(self, action) -> Tuple[np.ndarray, float, bool, bool, Dict]:
         self._current_tick += 1
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start()
 
         # validate action and modify if needed
         (
@@ -93,6 +203,8 @@ class MarketMakerEnv(gym.Env):
             ask_quantity,
             ask_price,
         ) = self._validate_action(action)
+        if profiler is not None:
+            profiler.lap("validate")
 
         # matching order
         matched_bid, matched_ask = self._matching_order(
@@ -101,6 +213,8 @@ class MarketMakerEnv(gym.Env):
             ask_quantity=ask_quantity,
             ask_price=ask_price,
         )
+        if profiler is not None:
+            profiler.lap("match")
         # update inventory
         self.update_inventory(
             bid_quantity=matched_bid,
@@ -108,27 +222,89 @@ class MarketMakerEnv(gym.Env):
             ask_quantity=matched_ask,
             ask_price=ask_price,
         )
+        if profiler is not None:
+            profiler.lap("inventory")
 
         step_reward = self._calculate_reward()
+        nav = self.nav
+        self._last_nav = nav
+        if profiler is not None:
+            profiler.lap("reward")
+        if self.sigma_estimator is not None:
+            tick = self._current_tick
+            self.sigma = self.sigma_estimator.update(
+                self._close[tick],
+                None if self._high is None else self._high[tick],
+                None if self._low is None else self._low[tick],
+            )
+            if profiler is not None:
+                profiler.lap("sigma")
 
         # update info last
-        current_info = {
-            "datetime": self.ohlcv_df.iloc[self._current_tick].datetime,
-            "quantity": self.quantity,
-            "cash": self.cash,
-            "bid_quantity": bid_quantity,
-            "bid_price": bid_price,
-            "ask_quantity": ask_quantity,
-            "ask_price": ask_price,
-            "matched_bid_quantity": matched_bid,
-            "matched_ask_quantity": matched_ask,
-            "close": self._current_price,
-            "step_reward": step_reward,
-            "nav": self.nav,
-        }
-        self.update_info(info=current_info)
-
-        return self._get_observation(), step_reward, *self.is_done(), current_info
+        if self.record_info:
+            current_info = {
+                "datetime": self._datetime[self._current_tick],
+                "quantity": self.quantity,
+                "cash": self.cash,
+                "bid_quantity": bid_quantity,
+                "bid_price": bid_price,
+                "ask_quantity": ask_quantity,
+                "ask_price": ask_price,
+                "matched_bid_quantity": matched_bid,
+                "matched_ask_quantity": matched_ask,
+                "close": self._current_price,
+                "step_reward": step_reward,
+                "nav": nav,
+                **self._get_extra_info(),
+            }
+            if self.sigma_estimator is not None:
+                current_info["sigma"] = self.sigma
+            self.update_info(info=current_info)
+        else:
+            current_info = {}
+        if profiler is not None:
+            profiler.lap("info")
+
+        obs = self._observation()
+        if profiler is not None:
+            profiler.lap("observation")
+        terminated, truncated = self.is_done()
+        if (terminated or truncated) and self.history_sink is not None:
+            self.history_sink.end_episode()
+        return obs, step_reward, terminated, truncated, current_info
+
+    def close(self) -> None:
+        if self.history_sink is not None:
+            self.history_sink.close()
+        super().close()
+
+    def _observation(self, reset: bool = False) -> np.ndarray:
+        if not self.reuse_observation:
+            return self._get_observation()
+        obs = self._observation_buffer
+        if obs is None:
+            obs = np.zeros(self.observation_space.shape, dtype=self.observation_space.dtype)
+            self._observation_buffer = obs
+        if reset:
+            self._fill_constant_observation(obs)
+        self._fill_observation(obs)
+        return obs
+
+    def _fill_constant_observation(self, obs: np.ndarray) -> None:
+        """Write the observation fields constant over the episode into ``obs``,
+        called at reset. Override in subclass to support ``reuse_observation``
+        """
+        raise NotImplementedError
+
+    def _fill_observation(self, obs: np.ndarray) -> None:
+        """Write the per-tick observation fields into ``obs``. Override in subclass
+        to support ``reuse_observation``
+        """
+        raise NotImplementedError
+
+    def _get_extra_info(self) -> Dict[str, Any]:
+        """Additional per-step fields recorded with the step info. Override in subclass"""
+        return {}
 
     @abstractmethod
     def _get_observation(self, *args, **kwargs) -> np.ndarray:
@@ -0,0 +1,129 @@
+from typing import Dict, Tuple, Type
+import numpy as np
+from gymnasium import spaces
+
+from ..data_loader import BaseDataLoader
+from .batch_market_maker_env import BatchMarketMakerEnv
+
+
+class MultiAssetLehalleEnv(BatchMarketMakerEnv):
+    """Quote ``num_assets`` covered warrants of the same date at once.
+
+    Each asset has its own inventory and cash, observations are stacked as
+    (num_assets, 8) and actions as (num_assets, 4), matching is the
+    ``LehalleEnv`` high and low mechanism vectorized across assets. Rewards
+    are per asset, the aggregate portfolio NAV is recorded in the step info.
+    The data loader must implement ``reset_multi``, as
+    ``RandomCoveredWarrantLoader`` does.
+
+    Args:
+        data_loader (Type[BaseDataLoader]): data loader class
+        num_assets (int): number of warrants quoted at once
+        init_cash (float, optional): initial cash per asset. Defaults to 0.
+        k (float, optional): order book liquidity. Defaults to 1.5.
+        risk_factor (float, optional): risk aversion. Defaults to 0.1.
+        bid_fee (float, optional): bid fee. Defaults to 0.03%.
+        ask_fee (float, optional): ask fee. Defaults to 0.13%.
+    """
+
+    batch_key = "asset"
+
+    def __init__(
+        self,
+        data_loader: Type[BaseDataLoader],
+        num_assets: int,
+        init_cash: float = 0,
+        k: float = 1.5,
+        risk_factor: float = 0.1,
+        bid_fee: float = 0.0003,
+        ask_fee: float = 0.0013,
+    ):
+        super().__init__(
+            data_loader=data_loader,
+            num_episodes=num_assets,
+            init_cash=init_cash,
+            bid_fee=bid_fee,
+            ask_fee=ask_fee,
+        )
+        self.num_assets = num_assets
+
+        self.observation_space = spaces.Box(
+            low=0,
+            high=np.inf,
+            shape=(num_assets, 8),
+            dtype=np.float32,
+        )
+        self.action_space = spaces.Box(
+            low=0,
+            high=500,
+            shape=(num_assets, 4),
+            dtype=np.float32,
+        )
+        self.k = k
+        self.risk_factor = risk_factor
+
+    @property
+    def market_metadata(self):
+        return {
+            "k": self.k,
+            "risk_factor": self.risk_factor,
+        }
+
+    @property
+    def portfolio_nav(self) -> float:
+        return float(self.nav.sum())
+
+    def _sample_prices(self) -> Dict[str, np.ndarray]:
+        return self.data_loader.reset_multi(self.num_assets)
+
+    def _get_observation(self) -> np.ndarray:
+        tick = self._current_tick
+        obs = np.empty((self.num_assets, 8), dtype=np.float32)
+        obs[:, 0] = (self.prices["close"][tick] + self.prices["low"][tick] + self.prices["high"][tick]) / 3
+        obs[:, 1] = self.quantity
+        obs[:, 2] = tick
+        obs[:, 3] = self.market_metadata["risk_factor"]
+        obs[:, 4] = self.market_metadata["k"]
+        obs[:, 5] = self.asset_metadata["sigma"]
+        obs[:, 6] = self.asset_metadata["total_time"]
+        obs[:, 7] = self.asset_metadata["dt"]
+        return obs
+
+    def _validate_action(self, action: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """Validate action and return valid action for current environment"""
+        action = np.asarray(action, dtype=np.float64).reshape(self.num_assets, 4)
+
+        bid_quantity = action[:, 0].astype(np.int64)
+        ask_quantity = action[:, 2].astype(np.int64)
+
+        bid_price = action[:, 1]
+        ask_price = action[:, 3]
+
+        return bid_quantity, bid_price, ask_quantity, ask_price
+
+    def _matching_order(
+        self,
+        bid_quantity: np.ndarray,
+        bid_price: np.ndarray,
+        ask_quantity: np.ndarray,
+        ask_price: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        high = self.prices["high"][self._current_tick]
+        low = self.prices["low"][self._current_tick]
+
+        matched_ask = np.where(ask_price <= high, ask_quantity, 0)
+        matched_bid = np.where(bid_price >= low, bid_quantity, 0)
+
+        return matched_bid, matched_ask
+
+    def _calculate_reward(self) -> np.ndarray:
+        return self.nav - self._last_nav
+
+    def _get_extra_info(self) -> Dict[str, np.ndarray]:
+        tick = self._current_tick
+        return {
+            "open": self.prices["open"][tick],
+            "high": self.prices["high"][tick],
+            "low": self.prices["low"][tick],
+            "portfolio_nav": self.portfolio_nav,
+        }
@@ -1,6 +1,10 @@
-from gymnasium.vector import SyncVectorEnv
-from typing import List
+import multiprocessing as mp
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 import numpy as np
+import gymnasium as gym
+from gymnasium.vector import SyncVectorEnv
+from gymnasium.vector.utils import CloudpickleWrapper, batch_space
 
 
 class MetaVectorStockEnv(SyncVectorEnv):
@@ -9,21 +13,28 @@ class MetaVectorStockEnv(SyncVectorEnv):
 
     def __init__(self, env_fns, **kwargs):
         super().__init__(env_fns, **kwargs)
+        self._task_rng = np.random.default_rng()
+
+    def reset(self, *, seed=None, options=None):
+        if isinstance(seed, int):
+            # task sampling stream, independent of the sub-env seeds
+            self._task_rng = np.random.default_rng(seed)
+        return super().reset(seed=seed, options=options)
 
     def reset_task(self, task: str):
         for env in self.envs:
-            env.reset_task(task)
+            env.unwrapped.data_loader.reset_task(task)
 
     def sample_task(self, num_tasks) -> List[str]:
-        tasks = self.envs[0].data_loader.tickers
+        tasks = self.envs[0].unwrapped.data_loader.tasks
         assert num_tasks <= len(
             tasks
         ), f"num_tasks {num_tasks} > len(tasks) {len(tasks)}"
-        return np.random.choice(tasks, size=num_tasks, replace=False)
+        return self._task_rng.choice(tasks, size=num_tasks, replace=False)
 
     def train(self, mode=True):
         for env in self.envs:
-            env.data_loader.train(mode)
+            env.unwrapped.data_loader.train(mode)
 
 
 class MetaVectorEnv(SyncVectorEnv):
@@ -32,13 +43,303 @@ class MetaVectorEnv(SyncVectorEnv):
 
     def __init__(self, env_fns, **kwargs):
         super().__init__(env_fns, **kwargs)
+        self._task_rng = np.random.default_rng()
+
+    def reset(self, *, seed=None, options=None):
+        if isinstance(seed, int):
+            # task sampling stream, independent of the sub-env seeds
+            self._task_rng = np.random.default_rng(seed)
+        return super().reset(seed=seed, options=options)
 
     def reset_task(self, task: str):
         for env in self.envs:
-            env.reset_task(task)
+            env.unwrapped.data_loader.reset_task(task)
 
     def sample_task(self, num_tasks) -> List[str]:
-        return self.envs[0].sample_task(num_tasks)
+        tasks = self.envs[0].unwrapped.data_loader.tasks
+        assert num_tasks <= len(
+            tasks
+        ), f"num_tasks {num_tasks} > len(tasks) {len(tasks)}"
+        return self._task_rng.choice(tasks, size=num_tasks, replace=False)
 
     def train(self, mode=True):
         pass
+
+
+def _shared_array(ctx, shape: Tuple[int, ...], dtype) -> Tuple[Any, np.ndarray]:
+    dtype = np.dtype(dtype)
+    buffer = ctx.RawArray(np.ctypeslib.as_ctypes_type(dtype), int(np.prod(shape)))
+    return buffer, np.frombuffer(buffer, dtype=dtype).reshape(shape)
+
+
+def _as_views(buffers: Dict[str, Tuple[Any, Tuple[int, ...], np.dtype]]) -> Dict[str, np.ndarray]:
+    return {
+        name: np.frombuffer(buffer, dtype=dtype).reshape(shape)
+        for name, (buffer, shape, dtype) in buffers.items()
+    }
+
+
+def _shared_memory_worker(
+    env_fns: CloudpickleWrapper,
+    indices: List[int],
+    pipe,
+    parent_pipe,
+    buffers: Dict[str, Tuple[Any, Tuple[int, ...], np.dtype]],
+) -> None:
+    parent_pipe.close()
+    envs = [env_fn() for env_fn in env_fns.fn]
+    shared = _as_views(buffers)
+    obs, final_obs = shared["observations"], shared["final_observations"]
+    actions, rewards = shared["actions"], shared["rewards"]
+    terminated, truncated = shared["terminated"], shared["truncated"]
+    try:
+        while True:
+            command, data = pipe.recv()
+            if command == "reset":
+                infos = []
+                for env, i, seed in zip(envs, indices, data["seeds"]):
+                    obs[i], info = env.reset(seed=seed, options=data["options"])
+                    infos.append(info)
+                pipe.send((True, infos))
+            elif command == "step":
+                for env, i in zip(envs, indices):
+                    obs[i], rewards[i], terminated[i], truncated[i], _ = env.step(actions[i])
+                    if terminated[i] or truncated[i]:
+                        # autoreset, the last observation is kept aside
+                        final_obs[i] = obs[i]
+                        obs[i], _ = env.reset()
+                pipe.send((True, None))
+            elif command == "call_loader":
+                name, args, kwargs = data
+                results = []
+                for env in envs:
+                    attr = getattr(env.unwrapped.data_loader, name)
+                    results.append(attr(*args, **kwargs) if callable(attr) else attr)
+                pipe.send((True, results))
+            elif command == "call":
+                name, args, kwargs = data
+                results = []
+                for env in envs:
+                    attr = getattr(env, name)
+                    results.append(attr(*args, **kwargs) if callable(attr) else attr)
+                pipe.send((True, results))
+            elif command == "close":
+                pipe.send((True, None))
+                break
+            else:
+                raise RuntimeError(f"Unknown command {command}")
+    except (KeyboardInterrupt, EOFError):
+        pass
+    except Exception:
+        pipe.send((False, traceback.format_exc()))
+    finally:
+        for env in envs:
+            env.close()
+
+
+class SharedMemoryVectorEnv:
+    """Vector env stepping its sub-envs in worker processes.
+
+    Observations, actions, rewards and done flags are exchanged through
+    shared memory buffers written in place by the workers, only short
+    commands go through the pipes. Each worker hosts ``envs_per_worker``
+    sub-envs to amortize the IPC round trip when a step is cheap.
+
+    Sub-envs are reset automatically at the end of an episode, the last
+    observation of the finished episode is returned in
+    ``infos["final_observation"]`` with its mask in ``infos["_final_observation"]``.
+    Per-step info dicts of the sub-envs are not transferred.
+
+    A worker raising an exception sends it to the parent and exits, the
+    exception is raised again as a ``RuntimeError`` and the worker is marked
+    closed; any later command raises until the env is closed.
+
+    Args:
+        env_fns (Sequence[Callable[[], gym.Env]]): functions creating the sub-envs
+        envs_per_worker (int, optional): number of sub-envs per process. Defaults to 1.
+        context (str, optional): multiprocessing start method. Defaults to the platform default.
+        copy (bool, optional): return copies of the shared buffers. Defaults to True.
+    """
+
+    metadata = {"render_modes": ["human", "rgb_array"], "render_fps": 4}
+
+    def __init__(
+        self,
+        env_fns: Sequence[Callable[[], gym.Env]],
+        envs_per_worker: int = 1,
+        context: Optional[str] = None,
+        copy: bool = True,
+    ):
+        self.num_envs = len(env_fns)
+        self.copy = copy
+        dummy_env = env_fns[0]()
+        self.single_observation_space = dummy_env.observation_space
+        self.single_action_space = dummy_env.action_space
+        dummy_env.close()
+        self.observation_space = batch_space(self.single_observation_space, self.num_envs)
+        self.action_space = batch_space(self.single_action_space, self.num_envs)
+
+        ctx = mp.get_context(context)
+        obs_shape = (self.num_envs, *self.single_observation_space.shape)
+        action_shape = (self.num_envs, *self.single_action_space.shape)
+        specs = {
+            "observations": (obs_shape, self.single_observation_space.dtype),
+            "final_observations": (obs_shape, self.single_observation_space.dtype),
+            "actions": (action_shape, np.float64),
+            "rewards": ((self.num_envs,), np.float64),
+            "terminated": ((self.num_envs,), np.bool_),
+            "truncated": ((self.num_envs,), np.bool_),
+        }
+        buffers, self._shared = {}, {}
+        for name, (shape, dtype) in specs.items():
+            buffer, self._shared[name] = _shared_array(ctx, shape, dtype)
+            buffers[name] = (buffer, shape, np.dtype(dtype))
+
+        self._pipes, self._processes = [], []
+        for start in range(0, self.num_envs, envs_per_worker):
+            indices = list(range(start, min(start + envs_per_worker, self.num_envs)))
+            parent_pipe, child_pipe = ctx.Pipe()
+            process = ctx.Process(
+                target=_shared_memory_worker,
+                args=(
+                    CloudpickleWrapper([env_fns[i] for i in indices]),
+                    indices,
+                    child_pipe,
+                    parent_pipe,
+                    buffers,
+                ),
+                daemon=True,
+            )
+            process.start()
+            child_pipe.close()
+            self._pipes.append(parent_pipe)
+            self._processes.append((process, indices))
+        self._task_rng = np.random.default_rng()
+        # workers which failed and exited, by index in self._pipes
+        self._closed_workers = set()
+        self.closed = False
+
+    def _send(self, command: str, data: Any = None, pipes: Optional[List] = None) -> None:
+        if self.closed:
+            raise RuntimeError("The vector env is closed")
+        if self._closed_workers:
+            raise RuntimeError(
+                f"Sub-env workers {sorted(self._closed_workers)} failed, close the vector env"
+            )
+        for pipe in pipes or self._pipes:
+            pipe.send((command, data))
+
+    def _receive(self, pipes: Optional[List] = None) -> List[Any]:
+        results, errors = [], []
+        for pipe in pipes or self._pipes:
+            try:
+                success, result = pipe.recv()
+            except EOFError:
+                success, result = False, "Sub-env worker exited without answering"
+            if success:
+                results.append(result)
+            else:
+                # the worker has exited after sending the error
+                worker = self._pipes.index(pipe)
+                self._closed_workers.add(worker)
+                pipe.close()
+                self._processes[worker][0].join()
+                errors.append(result)
+        if errors:
+            raise RuntimeError("Sub-env worker failed:\n" + "\n".join(errors))
+        return results
+
+    def _output(self, name: str) -> np.ndarray:
+        return self._shared[name].copy() if self.copy else self._shared[name]
+
+    def reset(
+        self, seed: Optional[Union[int, List[int]]] = None, options: Optional[Dict] = None
+    ) -> Tuple[np.ndarray, Dict[str, Any]]:
+        if seed is None:
+            seeds = [None] * self.num_envs
+        elif isinstance(seed, int):
+            # one independent stream per sub-env, the last one samples tasks
+            *children, task_seed = np.random.SeedSequence(seed).spawn(self.num_envs + 1)
+            seeds = [int(child.generate_state(1)[0]) for child in children]
+            self._task_rng = np.random.default_rng(task_seed)
+        else:
+            seeds = list(seed)
+        for pipe, (_, indices) in zip(self._pipes, self._processes):
+            pipe.send(("reset", {"seeds": [seeds[i] for i in indices], "options": options}))
+        infos = [info for worker_infos in self._receive() for info in worker_infos]
+        return self._output("observations"), {"env_infos": infos}
+
+    def step_async(self, actions: np.ndarray) -> None:
+        self._shared["actions"][:] = np.asarray(actions).reshape(self._shared["actions"].shape)
+        self._send("step")
+
+    def step_wait(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        self._receive()
+        infos = {}
+        done = self._shared["terminated"] | self._shared["truncated"]
+        if done.any():
+            infos["final_observation"] = self._shared["final_observations"].copy()
+            infos["_final_observation"] = done
+        return (
+            self._output("observations"),
+            self._output("rewards"),
+            self._output("terminated"),
+            self._output("truncated"),
+            infos,
+        )
+
+    def step(self, actions: np.ndarray):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def call(self, name: str, *args, **kwargs) -> List[Any]:
+        """Call method (or get attribute) ``name`` on every sub-env"""
+        self._send("call", (name, args, kwargs))
+        return [result for results in self._receive() for result in results]
+
+    def _call_loader(self, name: str, *args, pipes: Optional[List] = None) -> List[Any]:
+        self._send("call_loader", (name, args, {}), pipes=pipes)
+        return [result for results in self._receive(pipes=pipes) for result in results]
+
+    def reset_task(self, task: str):
+        self._call_loader("reset_task", task)
+
+    def sample_task(self, num_tasks) -> List[str]:
+        tasks = self._call_loader("tasks", pipes=self._pipes[:1])[0]
+        assert num_tasks <= len(
+            tasks
+        ), f"num_tasks {num_tasks} > len(tasks) {len(tasks)}"
+        return self._task_rng.choice(tasks, size=num_tasks, replace=False)
+
+    def train(self, mode=True):
+        self._call_loader("train", mode)
+
+    def close(self, timeout: float = 5) -> None:
+        """Stop the workers, terminating those not exiting within ``timeout`` seconds"""
+        if self.closed:
+            return
+        self.closed = True
+        live_pipes = [
+            pipe for worker, pipe in enumerate(self._pipes) if worker not in self._closed_workers
+        ]
+        for pipe in live_pipes:
+            try:
+                pipe.send(("close", None))
+            except (BrokenPipeError, EOFError, OSError):
+                pass
+        for pipe in live_pipes:
+            try:
+                if pipe.poll(timeout):
+                    pipe.recv()
+            except (BrokenPipeError, EOFError, OSError):
+                pass
+            pipe.close()
+        for process, _ in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+    def __del__(self):
+        if not getattr(self, "closed", True):
+            self.close()
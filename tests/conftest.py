@@ -0,0 +1,26 @@
+import contextlib
+import io
+
+import pytest
+
+from benchmarks.synthetic import make_covered_warrant_ticks
+from market_maker_algos.common import play
+from market_maker_algos.data_loader import RandomCoveredWarrantLoader
+
+
+def quiet_play(policy, env, seed, cache=None):
+    """``play`` without its progress output"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return play(policy, env, seed=seed, cache=cache)
+
+
+@pytest.fixture(scope="session")
+def tick_path(tmp_path_factory):
+    """Synthetic covered warrant ticks, 2 dates of 3 warrants"""
+    path = tmp_path_factory.mktemp("ticks") / "ticks.csv"
+    return make_covered_warrant_ticks(str(path), n_days=2, n_secs=3, ticks_per_sample=500)
+
+
+@pytest.fixture
+def cw_loader(tick_path):
+    return RandomCoveredWarrantLoader(tick_path)
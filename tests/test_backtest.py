@@ -0,0 +1,53 @@
+import importlib.util
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_maker_algos.algorithms import GLFT, AvellanedaStoikov
+from market_maker_algos.common import EWMAVolatility, ParkinsonVolatility, fast_play
+from market_maker_algos.data_loader import SingleBrownianMotion
+from market_maker_algos.envs import AvellanedaStoikovEnv, LehalleEnv
+
+from .conftest import quiet_play
+
+KERNELS = [False] + ([True] if importlib.util.find_spec("numba") else [])
+
+
+@pytest.mark.parametrize("use_numba", KERNELS)
+@pytest.mark.parametrize("seed", range(4))
+def test_fast_play_matches_gym_loop(cw_loader, use_numba, seed):
+    # k and order size chosen so that both sides fill on most steps
+    env = LehalleEnv(cw_loader, k=300, risk_factor=0.1, init_cash=100)
+    policy = AvellanedaStoikov(10)
+    expected = quiet_play(policy, env, seed)
+    result = fast_play(policy, env, use_numba=use_numba, seed=seed)
+
+    assert expected["matched_bid_quantity"].sum() > 0
+    assert expected["matched_ask_quantity"].sum() > 0
+    assert set(result.columns) == set(expected.columns)
+    pd.testing.assert_frame_equal(result[expected.columns], expected, check_dtype=False, rtol=0, atol=0)
+
+
+@pytest.mark.parametrize("use_numba", KERNELS)
+@pytest.mark.parametrize("estimator", [EWMAVolatility, ParkinsonVolatility])
+def test_fast_play_follows_sigma_estimator(cw_loader, use_numba, estimator):
+    env = LehalleEnv(cw_loader, k=300, risk_factor=0.1, sigma_estimator=estimator())
+    policy = AvellanedaStoikov(10)
+    expected = quiet_play(policy, env, 1)
+    result = fast_play(policy, env, use_numba=use_numba, seed=1)
+
+    assert expected["sigma"].nunique() > 1
+    pd.testing.assert_frame_equal(result[expected.columns], expected, check_dtype=False, rtol=0, atol=0)
+
+
+def test_spread_constant_keeps_float32():
+    constant = AvellanedaStoikov(1)._spread_constant(np.float32(0.1), np.float32(300))
+    assert isinstance(constant, np.float32)
+
+
+def test_fast_play_rejects_other_envs_and_policies(cw_loader):
+    with pytest.raises(TypeError, match="LehalleEnv"):
+        fast_play(AvellanedaStoikov(1), AvellanedaStoikovEnv(SingleBrownianMotion(100, 500, 2)))
+    with pytest.raises(TypeError, match="AvellanedaStoikov"):
+        fast_play(GLFT(1, 10), LehalleEnv(cw_loader))
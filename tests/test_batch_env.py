@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from market_maker_algos.algorithms import AvellanedaStoikov
+from market_maker_algos.data_loader import SingleBrownianMotion
+from market_maker_algos.envs import AvellanedaStoikovEnv, BatchAvellanedaStoikovEnv
+
+
+def _run_batch(env, policy, seed):
+    obs, _ = env.reset(seed=seed)
+    terminated = np.zeros(env.num_episodes, dtype=bool)
+    while not terminated.all():
+        actions, _ = policy.get_actions(obs)
+        obs, rewards, terminated, truncated, _ = env.step(actions)
+    return env.get_history_info()
+
+
+def test_batched_step_and_reset_shapes():
+    env = BatchAvellanedaStoikovEnv(SingleBrownianMotion(100, 50, 2, pool_size=8), num_episodes=4)
+    obs, info = env.reset(seed=0)
+    assert obs.shape == (4, 8) and obs.dtype == np.float32
+    assert info["n_sample"] == 50
+
+    actions, _ = AvellanedaStoikov(1).get_actions(obs)
+    obs, rewards, terminated, truncated, step_info = env.step(actions)
+    assert obs.shape == (4, 8)
+    assert rewards.shape == terminated.shape == truncated.shape == (4,)
+    assert step_info["nav"].shape == (4,)
+    # every episode follows its own path
+    assert len(np.unique(obs[:, 0])) == 4
+
+    history = _run_batch(env, AvellanedaStoikov(1), seed=0)
+    assert len(history) == 4 * 49
+    assert history.groupby("episode").size().tolist() == [49] * 4
+
+
+def test_seeded_batch_is_reproducible():
+    env = BatchAvellanedaStoikovEnv(SingleBrownianMotion(100, 50, 2), num_episodes=3)
+    first = _run_batch(env, AvellanedaStoikov(1), seed=5)
+    pd.testing.assert_frame_equal(_run_batch(env, AvellanedaStoikov(1), seed=5), first)
+
+
+def test_single_episode_batch_matches_scalar_env():
+    policy = AvellanedaStoikov(1)
+    scalar = AvellanedaStoikovEnv(SingleBrownianMotion(100, 200, 2))
+    batch = BatchAvellanedaStoikovEnv(SingleBrownianMotion(100, 200, 2), num_episodes=1)
+    obs, _ = scalar.reset(seed=3)
+    batch_obs, _ = batch.reset(seed=3)
+    np.testing.assert_array_equal(batch_obs[0], obs)
+
+    done = False
+    while not done:
+        # the scalar env steps the batch quotes, get_action rounds them to float32
+        actions, _ = policy.get_actions(batch_obs)
+        obs, reward, terminated, truncated, _ = scalar.step(tuple(actions[0]))
+        batch_obs, rewards, *_ = batch.step(actions)
+        np.testing.assert_array_equal(batch_obs[0], obs)
+        assert rewards[0] == reward
+        done = terminated or truncated
+
+    expected = scalar.get_history_info()
+    result = batch.get_history_info().drop(columns="episode")
+    assert expected["matched_bid_quantity"].sum() > 0
+    pd.testing.assert_frame_equal(result[expected.columns], expected, check_dtype=False)
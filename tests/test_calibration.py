@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_maker_algos.common import calibrate_intensity
+from market_maker_algos.data_loader import RandomCoveredWarrantLoader
+from market_maker_algos.envs import AvellanedaStoikovEnv, LehalleEnv
+
+
+@pytest.mark.parametrize("bar_interval", ["15s", "1min", "5min"])
+def test_calibration_uses_loader_bar_interval(tick_path, bar_interval):
+    loader = RandomCoveredWarrantLoader(tick_path, bar_interval=bar_interval)
+    result = calibrate_intensity(loader, n_workers=0)
+    n_bars = [loader.get_sample(sample_id)[0].shape[0] for sample_id in loader.sample_ids]
+    assert result["n_bars"].tolist() == n_bars
+
+
+@pytest.mark.parametrize("env_cls", [LehalleEnv, AvellanedaStoikovEnv])
+def test_reset_restores_defaults_of_uncalibrated_samples(cw_loader, env_cls):
+    calibrated, uncalibrated, partial = cw_loader.sample_ids[:3]
+    cw_loader.set_calibration(
+        pd.DataFrame(
+            {"A": [7.0, np.nan, 3.0], "k": [42.0, np.nan, np.nan]},
+            index=[calibrated, uncalibrated, partial],
+        )
+    )
+    # the env reads dt of the asset metadata at construction
+    cw_loader.reset()
+    env = env_cls(cw_loader, k=1.5)
+    defaults = {param: getattr(env, param) for param in ("A", "k") if hasattr(env, param)}
+
+    cw_loader.reset_task(calibrated)
+    env.reset(seed=0)
+    assert env.k == 42.0
+    if "A" in defaults:
+        assert env.A == 7.0
+
+    # NaN parameters keep the constructor values, not the previous sample ones
+    for task, expected in [(uncalibrated, {}), (partial, {"A": 3.0})]:
+        cw_loader.reset_task(task)
+        env.reset()
+        for param, default in defaults.items():
+            assert getattr(env, param) == expected.get(param, default)
+
+
+def test_reset_keeps_parameters_set_by_the_user(cw_loader):
+    calibrated, uncalibrated = cw_loader.sample_ids[:2]
+    env = LehalleEnv(cw_loader, k=1.5)
+    env.reset(seed=1)
+    env.k = 3.0
+    obs, _ = env.reset(seed=1)
+    assert env.k == 3.0 and obs[4] == 3.0
+
+    # the calibration applies to its episode only, the user value comes back after it
+    cw_loader.set_calibration(pd.DataFrame({"k": [42.0]}, index=[calibrated]))
+    cw_loader.reset_task(calibrated)
+    env.reset()
+    assert env.k == 42.0
+    cw_loader.reset_task(uncalibrated)
+    env.reset()
+    assert env.k == 3.0
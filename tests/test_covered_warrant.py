@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from market_maker_algos.data_loader import RandomCoveredWarrantLoader
+from market_maker_algos.data_loader.covered_warrant import BAR_INTERVALS, PRICE_SCALE, TICK_COLUMNS
+
+
+def _resample(loader, sample_id, bar_interval):
+    """Bars of the sample resampled from its ticks with pandas"""
+    start, stop = loader.sample_rows(sample_id)
+    ticks = pd.DataFrame({col: loader.tick_columns[col][start:stop] for col in TICK_COLUMNS})
+    bars = (
+        ticks.resample(bar_interval, on="datetime")
+        .agg({"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"})
+        .ffill()
+        .reset_index()
+    )
+    for col in ["open", "high", "low", "close"]:
+        bars[col] = bars[col] / PRICE_SCALE
+    return bars
+
+
+@pytest.mark.parametrize("cache_size", [0, 32])
+@pytest.mark.parametrize("bar_interval", BAR_INTERVALS)
+def test_pyramid_matches_resample(tick_path, bar_interval, cache_size):
+    loader = RandomCoveredWarrantLoader(tick_path, cache_size=cache_size)
+    for sample_id in loader.sample_ids[:3]:
+        # with a finer level built, the coarser ones are aggregated from it
+        loader.get_sample(sample_id, bar_interval=BAR_INTERVALS[0])
+        frame, metadata = loader.get_sample(sample_id, bar_interval=bar_interval)
+        pd.testing.assert_frame_equal(frame, _resample(loader, sample_id, bar_interval), check_dtype=False)
+        assert metadata["bar_interval"] == bar_interval
+        assert metadata["total_time"] == frame.shape[0]
+
+
+def test_pyramid_builds_only_requested_levels(tick_path):
+    loader = RandomCoveredWarrantLoader(tick_path)
+    sample_id = loader.sample_ids[0]
+    loader.get_sample(sample_id, bar_interval="5min")
+    assert list(loader._pyramids[sample_id]) == ["5min"]
+
+    # a finer level is built from the ticks, the coarse one is kept
+    frame, _ = loader.get_sample(sample_id, bar_interval="15s")
+    assert list(loader._pyramids[sample_id]) == ["5min", "15s"]
+    pd.testing.assert_frame_equal(frame, _resample(loader, sample_id, "15s"), check_dtype=False)
+
+
+def test_bar_interval_switch(tick_path):
+    loader = RandomCoveredWarrantLoader(tick_path, bar_interval="5min")
+    loader.reset_task(loader.sample_ids[0])
+    assert loader.reset().shape[0] == _resample(loader, loader.sample_ids[0], "5min").shape[0]
+    loader.bar_interval = "15s"
+    pd.testing.assert_frame_equal(
+        loader.reset(), _resample(loader, loader.sample_ids[0], "15s"), check_dtype=False
+    )
+    with pytest.raises(ValueError):
+        loader.bar_interval = "2min"
+    with pytest.raises(ValueError):
+        loader.get_sample(loader.sample_ids[0], bar_interval="2min")
+
+
+def test_reset_multi_keeps_the_pinned_task(cw_loader):
+    for sample_id in cw_loader.sample_ids:
+        cw_loader.reset_task(sample_id)
+        for _ in range(3):
+            cw_loader.reset_multi(2)
+            sample_ids = cw_loader.asset_metadata["sample_id"]
+            assert sample_ids[0] == sample_id and len(set(sample_ids)) == 2
+            assert sample_ids[1] in cw_loader.dates[sample_id.split("_")[0]]
@@ -0,0 +1,63 @@
+import math
+
+import numpy as np
+import pytest
+
+from market_maker_algos.algorithms import GLFT, glft_quote_tables
+
+
+@pytest.mark.parametrize(
+    "risk_factor, k, A, sigma",
+    [(0.01, 1.5, 140, 0.3), (0.001, 2, 50, 0.5), (0.02, 3, 200, 0.2), (0.05, 1.0, 100, 0.1)],
+)
+def test_tables_match_closed_form_approximation(risk_factor, k, A, sigma):
+    # Gueant 2013 closed form, accurate for inventories well inside the bound
+    max_inventory = 60
+    bid, ask = glft_quote_tables(risk_factor, k, A, sigma, max_inventory)
+    q = np.arange(-max_inventory, max_inventory + 1)
+    base = math.log1p(risk_factor / k) / risk_factor
+    slope = math.sqrt(
+        sigma**2 * risk_factor / (2 * k * A) * (1 + risk_factor / k) ** (1 + k / risk_factor)
+    )
+    interior = np.abs(q) <= 10
+    np.testing.assert_allclose(bid[interior], (base + (2 * q + 1) / 2 * slope)[interior], rtol=0, atol=1e-4)
+    np.testing.assert_allclose(ask[interior], (base - (2 * q - 1) / 2 * slope)[interior], rtol=0, atol=1e-4)
+
+
+def _observations(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack(
+        [
+            100 + rng.standard_normal(n),
+            rng.integers(-15, 16, n) * 2,
+            rng.integers(0, 100, n),
+            np.full(n, 0.1),
+            rng.choice([1.5, 3.0], n),
+            rng.choice([0.02, 0.0201, 0.05], n),
+            np.ones(n),
+            np.full(n, 1e-2),
+        ]
+    ).astype(np.float32)
+
+
+def test_batched_actions_match_single_actions():
+    policy = GLFT(order_quantity=2, max_inventory=20)
+    obs = _observations(64)
+    actions, info = policy.get_actions(obs)
+    for row, action, reserve_price in zip(obs, actions, info["reserve_price"]):
+        expected, expected_info = policy.get_action(row)
+        np.testing.assert_array_equal(action, expected)
+        assert reserve_price == expected_info["reserve_price"]
+    # no bid at the upper bound, no ask at the lower one
+    lots = np.clip(np.rint(obs[:, 1] / 2), -10, 10)
+    assert (actions[lots == 10, 0] == 0).all() and (actions[lots == -10, 2] == 0).all()
+
+
+def test_sigma_grid_shares_tables():
+    policy = GLFT(order_quantity=1, max_inventory=10)
+    tables = policy._tables(0.1, 1.5, 0.02, 1e-2)
+    # within half a step of the same grid point
+    assert policy._tables(0.1, 1.5, 0.02 * 1.001, 1e-2) is tables
+    exact = GLFT(order_quantity=1, max_inventory=10, sigma_step=None)
+    np.testing.assert_allclose(tables[0], exact._tables(0.1, 1.5, 0.02, 1e-2)[0], rtol=0.005)
+    assert exact._tables(0.1, 1.5, 0.02 * 1.001, 1e-2) is not exact._tables(0.1, 1.5, 0.02, 1e-2)
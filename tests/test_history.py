@@ -0,0 +1,62 @@
+import os
+
+import numpy as np
+
+from market_maker_algos.envs import HistoryStore, LehalleEnv, NpzHistorySink
+from market_maker_algos.envs.history import EpisodeHistory
+
+
+def _write_episode(sink, n_rows):
+    episode = sink.start_episode({"sec_cd": "CW"})
+    for step in range(n_rows):
+        sink.append({"step": step, "nav": float(step)})
+    sink.end_episode()
+    return episode
+
+
+def test_sink_continues_after_largest_episode(tmp_path):
+    # ids 0 and 5 present, the next episode must not reuse 2 = len(episodes)
+    os.makedirs(tmp_path / "episode_000000")
+    os.makedirs(tmp_path / "episode_000005")
+    sink = NpzHistorySink(str(tmp_path))
+    assert _write_episode(sink, 3) == 6
+
+
+def test_sinks_sharing_a_directory_do_not_collide(tmp_path):
+    first = NpzHistorySink(str(tmp_path), chunk_size=2)
+    second = NpzHistorySink(str(tmp_path), chunk_size=2)
+    episodes = [_write_episode(first, 3), _write_episode(second, 5), _write_episode(first, 4)]
+
+    assert len(set(episodes)) == 3
+    store = HistoryStore(str(tmp_path))
+    assert store.episodes == sorted(episodes)
+    for episode, n_rows in zip(episodes, [3, 5, 4]):
+        assert store.metadata(episode)["n_rows"] == n_rows
+        assert len(store.read_episode(episode)) == n_rows
+
+
+def test_history_of_an_episode_without_steps(cw_loader, tmp_path):
+    env = LehalleEnv(cw_loader, history_sink=NpzHistorySink(str(tmp_path)))
+    env.reset(seed=0)
+    history = env.get_history_info()
+    assert len(history) == 0 and "episode" not in history
+
+    store = HistoryStore(str(tmp_path))
+    assert list(store.read_episode(0, columns=["nav"]).columns) == ["episode", "nav"]
+
+
+def test_columns_promote_to_later_values():
+    history = EpisodeHistory(capacity=2)
+    rows = [
+        {"quantity": 1, "side": "bid", "flag": True},
+        {"quantity": 2.5, "side": "ask_far", "flag": 3},
+        {"quantity": 4, "side": "b", "flag": False},
+    ]
+    for row in rows:
+        history.append(row)
+
+    frame = history.to_frame()
+    assert frame["quantity"].tolist() == [1.0, 2.5, 4.0]
+    assert frame["side"].tolist() == ["bid", "ask_far", "b"]
+    assert frame["flag"].tolist() == [1, 3, 0]
+    assert history["quantity"].dtype == np.float64
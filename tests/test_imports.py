@@ -0,0 +1,19 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHECK = """
+import sys
+import market_maker_algos.common
+assert "matplotlib" not in sys.modules
+namespace = {}
+exec("from market_maker_algos.common import *", namespace)
+assert callable(namespace["plot_result"]) and callable(namespace["play"])
+"""
+
+
+def test_star_import_resolves_lazy_plots():
+    # a fresh interpreter, other tests may already have imported matplotlib
+    subprocess.run([sys.executable, "-c", CHECK], check=True, cwd=ROOT)
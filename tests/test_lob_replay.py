@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_maker_algos.data_loader import BaseDataLoader
+from market_maker_algos.data_loader.synthetic_lob import (
+    ADD,
+    ASK,
+    BID,
+    CANCEL,
+    CLEAR,
+    TRADE,
+    SyntheticLOBLoader,
+)
+from market_maker_algos.envs.lob_replay_env import LOBReplayEnv
+
+MID = 10000
+TICK_SIZE = 0.01
+
+
+class ScriptedLOBLoader(BaseDataLoader):
+    """Constant mid with 10 lots on each touch, then the given events per step"""
+
+    def __init__(self, steps):
+        super().__init__()
+        self.steps = steps
+
+    @property
+    def asset_metadata(self):
+        n_sample = len(self.steps) + 1
+        return {"sigma": 0.01, "total_time": 1, "dt": 1 / n_sample, "tick_size": TICK_SIZE}
+
+    def reset(self):
+        events = [(BID, ADD, MID - 1, 10), (ASK, ADD, MID + 1, 10)]
+        offsets = [len(events)]
+        for step_events in self.steps:
+            events.extend(step_events)
+            offsets.append(len(events))
+        side, kind, tick, size = (np.array(col, dtype=np.int64) for col in zip(*events))
+        n_sample = len(self.steps) + 1
+        return {
+            "datetime": pd.to_datetime(np.arange(n_sample), unit="s").to_numpy(),
+            "close": np.full(n_sample, MID * TICK_SIZE),
+            "step_offsets": np.array(offsets),
+            "side": side,
+            "kind": kind,
+            "tick": tick,
+            "size": size,
+        }
+
+
+def _replay_bid(steps, quantity=5):
+    """Rest a bid of ``quantity`` at the best bid through ``steps``, return the history"""
+    env = LOBReplayEnv(ScriptedLOBLoader(steps))
+    env.reset(seed=0)
+    action = np.array([quantity, (MID - 1) * TICK_SIZE, 0, (MID + 1) * TICK_SIZE])
+    for _ in steps:
+        env.step(action)
+    return env.get_history_info()
+
+
+def test_trades_deplete_queue_before_filling():
+    history = _replay_bid(
+        [
+            [(BID, TRADE, MID - 1, 4)],
+            [(BID, TRADE, MID - 1, 6)],
+            [(BID, TRADE, MID - 1, 3)],
+        ]
+    )
+    # 10 lots ahead: 4 then 6 traded exhaust the queue, only the next trade fills
+    assert history["bid_queue_ahead"].tolist() == [6, 0, 0]
+    assert history["matched_bid_quantity"].tolist() == [0, 0, 3]
+
+
+def test_cancels_ahead_and_adds_behind():
+    history = _replay_bid(
+        [
+            [(BID, ADD, MID - 1, 20)],
+            [(BID, CANCEL, MID - 1, 27)],
+            [(BID, TRADE, MID - 1, 5)],
+        ]
+    )
+    # adds queue behind us, cancels only reach us once the level shrinks below our position
+    assert history["bid_queue_ahead"].tolist() == [10, 3, 0]
+    assert history["matched_bid_quantity"].tolist() == [0, 0, 2]
+
+
+def test_trade_and_clear_through_level_fill_order():
+    history = _replay_bid([[(BID, TRADE, MID - 2, 1)]])
+    assert history["matched_bid_quantity"].tolist() == [5]
+    history = _replay_bid([[(BID, CLEAR, MID - 1, 0)]])
+    assert history["matched_bid_quantity"].tolist() == [5]
+
+
+def test_queue_ahead_is_zero_without_resting_order():
+    history = _replay_bid([[(BID, TRADE, MID - 1, 4)]] * 2, quantity=0)
+    assert history["bid_queue_ahead"].tolist() == [0, 0]
+    # filled in full, nothing rests afterwards
+    history = _replay_bid([[(BID, TRADE, MID - 1, 20)], []])
+    assert history["matched_bid_quantity"].tolist() == [5, 0]
+    assert history["bid_queue_ahead"].tolist() == [0, 0]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_synthetic_book_never_crosses(seed):
+    episode = SyntheticLOBLoader(100, 500, events_per_step=20, move_prob=0.3, seed=seed).reset()
+    book = {BID: {}, ASK: {}}
+    start = 0
+    for stop in episode["step_offsets"]:
+        for i in range(start, stop):
+            side, kind, tick = episode["side"][i], episode["kind"][i], episode["tick"][i]
+            depth = book[side].get(tick, 0)
+            if kind == CLEAR:
+                depth = 0
+            elif kind == ADD:
+                depth += episode["size"][i]
+            else:
+                depth = max(depth - episode["size"][i], 0)
+            book[side][tick] = depth
+        start = stop
+        bids = [tick for tick, depth in book[BID].items() if depth > 0]
+        asks = [tick for tick, depth in book[ASK].items() if depth > 0]
+        if bids and asks:
+            assert max(bids) < min(asks)
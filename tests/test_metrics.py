@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_maker_algos.common import METRIC_COLUMNS, episode_metrics
+
+INIT_CASH = 100.0
+BID_FEE, ASK_FEE = 0.0003, 0.0013
+
+
+def _history(lengths, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for episode, n in enumerate(lengths):
+        bid_quantity = rng.integers(0, 4, n)
+        ask_quantity = rng.integers(0, 4, n)
+        frames.append(
+            pd.DataFrame(
+                {
+                    "episode": episode * 10,
+                    "nav": INIT_CASH + np.cumsum(rng.standard_normal(n)),
+                    "quantity": rng.integers(-6, 7, n),
+                    "bid_quantity": bid_quantity,
+                    "bid_price": 100 + rng.standard_normal(n),
+                    "ask_quantity": ask_quantity,
+                    "ask_price": 101 + rng.standard_normal(n),
+                    "matched_bid_quantity": bid_quantity * rng.integers(0, 2, n),
+                    "matched_ask_quantity": ask_quantity * rng.integers(0, 2, n),
+                }
+            )
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+def _reference(episode, inventory_limit, periods):
+    """Metrics of one episode with plain per-episode pandas code"""
+    nav = episode["nav"]
+    increment = nav.diff().fillna(nav.iloc[0] - INIT_CASH)
+    std = increment.std()
+    running_max = np.maximum(nav.cummax(), INIT_CASH)
+    bid_fees = (episode["matched_bid_quantity"] * episode["bid_price"]).sum() * BID_FEE
+    ask_fees = (episode["matched_ask_quantity"] * episode["ask_price"]).sum() * ASK_FEE
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "n_steps": len(episode),
+            "final_nav": nav.iloc[-1],
+            "pnl": nav.iloc[-1] - INIT_CASH,
+            "sharpe": increment.mean() / std * np.sqrt(periods) if std > 0 else np.nan,
+            "max_drawdown": (running_max - nav).max(),
+            "n_bid_fills": (episode["matched_bid_quantity"] > 0).sum(),
+            "n_ask_fills": (episode["matched_ask_quantity"] > 0).sum(),
+            "bid_fill_ratio": np.float64(episode["matched_bid_quantity"].sum()) / episode["bid_quantity"].sum(),
+            "ask_fill_ratio": np.float64(episode["matched_ask_quantity"].sum()) / episode["ask_quantity"].sum(),
+            "final_quantity": episode["quantity"].iloc[-1],
+            "mean_quantity": episode["quantity"].mean(),
+            "max_abs_quantity": episode["quantity"].abs().max(),
+            "time_at_limit": (episode["quantity"].abs() >= inventory_limit).mean(),
+            "bid_fees": bid_fees,
+            "ask_fees": ask_fees,
+            "total_fees": bid_fees + ask_fees,
+        }
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_segmented_metrics_match_per_episode_loop(shuffle):
+    history = _history([50, 1, 17, 200, 2])
+    if shuffle:
+        # interleave the episodes, rows of an episode stay in step order
+        times = pd.Series(np.random.default_rng(1).random(len(history)))
+        times = times.groupby(history["episode"].to_numpy()).transform(np.sort)
+        history = history.iloc[np.argsort(times.to_numpy())]
+        assert not history["episode"].is_monotonic_increasing
+    result = episode_metrics(
+        history, init_cash=INIT_CASH, bid_fee=BID_FEE, ask_fee=ASK_FEE, inventory_limit=5, periods=252
+    )
+
+    expected = pd.DataFrame(
+        [_reference(episode, 5, 252) for _, episode in history.groupby("episode", sort=True)],
+        index=pd.Index(sorted(history["episode"].unique()), name="episode"),
+    )
+    assert list(result.columns) == METRIC_COLUMNS
+    pd.testing.assert_frame_equal(result, expected[METRIC_COLUMNS], check_dtype=False, rtol=1e-9)
+
+
+def test_column_dict_and_single_episode():
+    history = _history([30, 40])
+    columns = {col: history[col].to_numpy() for col in history.columns}
+    pd.testing.assert_frame_equal(episode_metrics(columns, init_cash=INIT_CASH), episode_metrics(history, init_cash=INIT_CASH))
+
+    # without an episode column the history is one episode
+    single = history[history["episode"] == 10].drop(columns="episode")
+    result = episode_metrics(single, init_cash=INIT_CASH)
+    assert result.index.tolist() == [0]
+    pd.testing.assert_series_equal(
+        result.iloc[0], episode_metrics(history, init_cash=INIT_CASH).loc[10], check_names=False
+    )
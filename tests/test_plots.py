@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+matplotlib = pytest.importorskip("matplotlib")
+matplotlib.use("Agg")
+
+from market_maker_algos.algorithms import AvellanedaStoikov
+from market_maker_algos.common import decimate, plot_episode_bands, plot_history
+from market_maker_algos.envs import LehalleEnv
+
+from .conftest import quiet_play
+
+
+@pytest.fixture
+def histories(cw_loader):
+    env = LehalleEnv(cw_loader, k=300, risk_factor=0.1)
+    frames = [quiet_play(AvellanedaStoikov(10), env, seed) for seed in range(3)]
+    return pd.concat(frames, keys=range(3), names=["episode", None]).reset_index(level=0)
+
+
+@pytest.mark.parametrize("method", ["minmax", "lttb"])
+def test_plot_history_renders_without_mutating(histories, tmp_path, method):
+    history = histories[histories["episode"] == 0]
+    before = history.copy()
+    path = tmp_path / "history.png"
+    figure = plot_history(history, str(path), n_points=50, method=method, plot_high_low=True)
+
+    assert path.stat().st_size > 0
+    assert len(figure.axes) == 3
+    # decimated series stay within the requested size
+    assert all(len(line.get_xdata()) <= 50 for line in figure.axes[1].get_lines())
+    pd.testing.assert_frame_equal(history, before)
+
+
+def test_plot_episode_bands_renders_without_mutating(histories, tmp_path):
+    before = histories.copy()
+    path = tmp_path / "bands.png"
+    figure = plot_episode_bands(histories, str(path), n_points=20)
+
+    assert path.stat().st_size > 0
+    assert len(figure.axes) == 2
+    pd.testing.assert_frame_equal(histories, before)
+
+
+def test_decimate_keeps_extremes():
+    x = np.arange(10_000)
+    y = np.sin(x / 100.0)
+    y[1234] = 5
+    index = decimate(x, y, 100)
+    assert len(index) <= 100 and 1234 in index
@@ -0,0 +1,68 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from market_maker_algos.algorithms import AvellanedaStoikov
+from market_maker_algos.common import ResultCache
+from market_maker_algos.envs import LehalleEnv, NpzHistorySink
+
+from .conftest import quiet_play
+
+
+def test_key_follows_calibration_not_reset_state(cw_loader, tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    cw_loader.reset_task(cw_loader.sample_ids[0])
+    env = LehalleEnv(cw_loader, k=300, risk_factor=0.1)
+    policy = AvellanedaStoikov(10)
+    quiet_play(policy, env, 0, cache)
+
+    cw_loader.set_calibration(pd.DataFrame({"k": [30.0]}, index=[cw_loader.sample_ids[0]]))
+    key = cache.make_key(fn="play", policy=policy, env=env, seed=0)
+    assert key not in cache
+    result = quiet_play(policy, env, 0, cache)
+    pd.testing.assert_frame_equal(result, quiet_play(policy, env, 0))
+
+    # reset overwrote env.k with the calibrated value, the key is unchanged
+    assert env.k == 30.0
+    assert cache.make_key(fn="play", policy=policy, env=env, seed=0) == key
+
+
+def test_play_with_history_sink(cw_loader, tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    env = LehalleEnv(cw_loader, history_sink=NpzHistorySink(str(tmp_path / "history")))
+    policy = AvellanedaStoikov(1)
+    first = quiet_play(policy, env, 0, cache)
+    pd.testing.assert_frame_equal(quiet_play(policy, env, 0, cache), first, check_dtype=False)
+    assert len(cache) == 1
+
+
+def test_key_follows_parameters_set_by_the_user(cw_loader, tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    env = LehalleEnv(cw_loader, k=1.5)
+    policy = AvellanedaStoikov(1)
+    key = cache.make_key(fn="play", policy=policy, env=env, seed=0)
+    env.k = 3.0
+    assert cache.make_key(fn="play", policy=policy, env=env, seed=0) != key
+
+
+def test_put_evicts_least_recently_used_past_the_limit(tmp_path, monkeypatch):
+    frame = pd.DataFrame({"x": np.arange(1000, dtype=np.float64)})
+    cache = ResultCache(str(tmp_path / "cache"))
+    cache.put("00", frame)
+    entry_size = cache.size
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=3 * entry_size)
+
+    scans = []
+    entries = cache._entries
+    monkeypatch.setattr(cache, "_entries", lambda: scans.append(1) or entries())
+    cache.put("01", frame)
+    cache.put("01", frame)
+    cache.put("02", frame)
+    # one scan to start the running total, none while under the limit
+    assert len(scans) == 1 and len(cache) == 3
+
+    os.utime(cache._path("00"), ns=(0, 0))
+    cache.put("03", frame)
+    assert "00" not in cache and len(cache) == 3
+    assert cache._size == cache.size == 3 * entry_size
@@ -0,0 +1,44 @@
+import multiprocessing as mp
+import os
+
+import pandas as pd
+import pytest
+
+from market_maker_algos.common import episode_metrics, run_sweep, sweep
+from market_maker_algos.common.backtest import backtest_avellaneda_stoikov
+
+GRID = {"risk_factor": [0.1, 0.5], "k": [1.5, 40.0]}
+
+
+def test_sweep_rows_are_episode_metrics(cw_loader):
+    results = run_sweep(cw_loader, GRID, n_episodes=3, n_workers=0, seed=0)
+    assert len(results) == 12 and results["error"].isna().all()
+
+    cw_loader.seed(0)
+    path = sweep.sample_paths(cw_loader, 1)[0]
+    metadata = path["metadata"]
+    history = backtest_avellaneda_stoikov(
+        path["ohlc"], 1, 0.1, 1.5, metadata["sigma"], metadata["total_time"], metadata["dt"], init_cash=0
+    )
+    row = results[(results["risk_factor"] == 0.1) & (results["k"] == 1.5) & (results["episode"] == 0)]
+    expected = episode_metrics(history, init_cash=0)
+    pd.testing.assert_frame_equal(
+        row[expected.columns].reset_index(drop=True), expected.reset_index(drop=True), check_dtype=False
+    )
+
+
+def _crash_on_first_cell(ohlc, order_quantity, risk_factor, k, *args, **kwargs):
+    if k == 1.5 and risk_factor == 0.1:
+        os._exit(1)
+    return backtest_avellaneda_stoikov(ohlc, order_quantity, risk_factor, k, *args, **kwargs)
+
+
+@pytest.mark.skipif(mp.get_start_method() != "fork", reason="workers inherit the patched backtest by fork")
+def test_worker_crash_fails_only_its_task(cw_loader, monkeypatch):
+    monkeypatch.setattr(sweep, "backtest_avellaneda_stoikov", _crash_on_first_cell)
+    results = run_sweep(cw_loader, GRID, n_episodes=2, n_workers=2, seed=0)
+    assert len(results) == 8
+    crashed = (results["risk_factor"] == 0.1) & (results["k"] == 1.5)
+    assert results.loc[crashed, "error"].str.contains("BrokenProcessPool").all()
+    assert results.loc[~crashed, "error"].isna().all()
+    assert results.loc[~crashed, "final_nav"].notna().all()
@@ -0,0 +1,61 @@
+import gymnasium as gym
+import numpy as np
+import pytest
+
+from market_maker_algos.envs.vec_task_env import SharedMemoryVectorEnv
+
+
+class _CountingEnv(gym.Env):
+    """Counts its steps, raises on ``fail_at``"""
+
+    observation_space = gym.spaces.Box(-np.inf, np.inf, (1,), np.float32)
+    action_space = gym.spaces.Box(-1, 1, (1,), np.float64)
+
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.steps = 0
+
+    def reset(self, *, seed=None, options=None):
+        self.steps = 0
+        return np.zeros(1, dtype=np.float32), {}
+
+    def step(self, action):
+        self.steps += 1
+        if self.steps == self.fail_at:
+            raise ValueError("step failed")
+        return np.full(1, self.steps, dtype=np.float32), 1.0, False, False, {}
+
+
+def test_steps_in_workers():
+    env = SharedMemoryVectorEnv([_CountingEnv] * 4, envs_per_worker=2)
+    env.reset(seed=0)
+    obs, rewards, *_ = env.step(np.zeros((4, 1)))
+    obs, rewards, *_ = env.step(np.zeros((4, 1)))
+    env.close()
+    np.testing.assert_array_equal(obs, [[2]] * 4)
+    assert all(not process.is_alive() for process, _ in env._processes)
+
+
+def test_failed_worker_is_closed():
+    env = SharedMemoryVectorEnv([_CountingEnv, lambda: _CountingEnv(fail_at=2)])
+    env.reset(seed=0)
+    env.step(np.zeros((2, 1)))
+    with pytest.raises(RuntimeError, match="step failed"):
+        env.step(np.zeros((2, 1)))
+    assert env._closed_workers == {1}
+    with pytest.raises(RuntimeError, match="failed, close"):
+        env.step(np.zeros((2, 1)))
+
+    env.close()
+    assert env.closed
+    assert all(not process.is_alive() for process, _ in env._processes)
+
+
+def test_close_terminates_dead_and_stuck_workers():
+    env = SharedMemoryVectorEnv([_CountingEnv] * 2)
+    env.reset(seed=0)
+    # a worker killed from outside, its pipe is broken
+    env._processes[0][0].kill()
+    env._processes[0][0].join()
+    env.close(timeout=1)
+    assert all(not process.is_alive() for process, _ in env._processes)